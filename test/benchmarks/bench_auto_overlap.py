@@ -0,0 +1,55 @@
+# Compares sustained auto mode waveforms per second when the next capture waits for the display against the scope
+# worker re-arming itself while the display draws. Run from the repository root with: python -m test.benchmarks.bench_auto_overlap
+from threading import Event
+from time import sleep, perf_counter
+
+from voltpeek.scopes.NS1 import NS1
+from voltpeek.scope_interface import ScopeInterface, ScopeAction
+
+from test.scopes.serial_mock import SerialMock
+
+FRAMES = 100
+# Roughly a 16 kB transfer over full speed USB and a Tk redraw.
+TRANSFER_TIME = 0.008
+RENDER_TIME = 0.006
+
+class USBSerialMock(SerialMock):
+    def readinto(self, buffer) -> int:
+        sleep(TRANSFER_TIME/self.TRANSMIT_CHUNKS)
+        return super().readinto(buffer)
+
+def render(xx) -> None: sleep(RENDER_TIME)
+
+def sequential_auto(scope_interface: ScopeInterface) -> None:
+    for _ in range(0, FRAMES):
+        scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+        scope_interface.wait_for_action()
+        render(scope_interface.latest_capture())
+
+def rearming_auto(scope_interface: ScopeInterface) -> None:
+    published = Event()
+    scope_interface.set_action_listener(lambda scope_interface, action: published.set())
+    scope_interface.set_auto_rearm(True)
+    scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+    for _ in range(0, FRAMES):
+        published.wait()
+        published.clear()
+        render(scope_interface.latest_capture())
+    scope_interface.set_auto_rearm(False)
+    while scope_interface.rearming:
+        sleep(TRANSFER_TIME)
+    scope_interface.set_action_listener(None)
+
+def main() -> None:
+    scope_interface = ScopeInterface(NS1)
+    scope_interface.scope.serial_port = USBSerialMock()
+    for name, auto in (('render then capture', sequential_auto), ('scope re-arms while rendering', rearming_auto)):
+        start, captures = perf_counter(), scope_interface.capture_count
+        auto(scope_interface)
+        elapsed = perf_counter() - start
+        print(f'{name:<40}{FRAMES/elapsed:10.1f} waveforms/s drawn'
+              f'{(scope_interface.capture_count - captures)/elapsed:10.1f} waveforms/s captured')
+    scope_interface.close()
+
+if __name__ == '__main__':
+    main()
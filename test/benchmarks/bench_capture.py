@@ -0,0 +1,29 @@
+# Worker side cost and size of a capture handed over as volts against one handed over as raw codes.
+# Run from the repository root with: python -m test.benchmarks.bench_capture
+import numpy as np
+
+from voltpeek.capture import Capture
+from voltpeek.capture_ring import CaptureRing
+from voltpeek.scopes.NS1 import NS1
+
+from test.benchmarks.timing import time_per_call, report
+
+REPEAT = 500
+FULL_SCALE = 10
+
+def main() -> None:
+    ns1 = NS1()
+    codes = np.random.default_rng(0).integers(0, NS1.SCOPE_SPECS['resolution'], NS1.SCOPE_SPECS['memory_depth'], dtype=np.uint8)
+    ring = CaptureRing(3)
+    def publish_volts() -> None: ring.publish(ns1._reconstruct_filtered(codes, FULL_SCALE))
+    def publish_codes() -> None:
+        capture = Capture(codes, ns1.capture_settings(FULL_SCALE))
+        ring.publish(capture.codes, capture.settings)
+    report('convert and publish volts', time_per_call(publish_volts, REPEAT))
+    report('publish codes', time_per_call(publish_codes, REPEAT))
+    report('convert held codes', time_per_call(lambda: Capture(codes, ns1.capture_settings(FULL_SCALE)).volts, REPEAT))
+    capture = Capture(codes, ns1.capture_settings(FULL_SCALE))
+    print(f'capture size: {capture.nbytes/1024:.0f} kB codes, {capture.volts.nbytes/1024:.0f} kB volts')
+
+if __name__ == '__main__':
+    main()
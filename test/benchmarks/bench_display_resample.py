@@ -0,0 +1,37 @@
+# Frames per second of the display resampling path alone, per frame interp1d against the cached grid.
+# Run from the repository root with: python -m test.benchmarks.bench_display_resample
+import numpy as np
+from scipy.interpolate import interp1d
+
+from voltpeek import constants
+from voltpeek.resample import Resampler, quantize_vertical, FILL_VALUE
+
+from test.benchmarks.timing import time_per_call, report
+
+REPEAT = 500
+SIZE = 810
+HOR_SETTING = 1e-3
+FS = 1.6e6
+VERT_SETTING = 1
+TIME_SHIFT = 2e-6
+
+def interp1d_frame(vector) -> None:
+    # The old path built the interpolator per frame and evaluated it twice when the trigger was corrected.
+    f = interp1d(np.arange(len(vector))/FS, vector, kind='linear', fill_value=FILL_VALUE, bounds_error=False)
+    new_T: float = HOR_SETTING/(SIZE/constants.Display.GRID_LINE_COUNT)
+    chop_time: float = (1/FS)*len(vector) - HOR_SETTING*constants.Display.GRID_LINE_COUNT
+    f(np.add(np.arange(SIZE)*new_T, (chop_time/2)))
+    quantize_vertical(f((np.arange(SIZE)*new_T) + (chop_time/2) + TIME_SHIFT), VERT_SETTING, SIZE)
+
+def cached_grid_frame(resampler: Resampler, vector) -> None:
+    resampler.resample(vector, HOR_SETTING, FS)
+    quantize_vertical(resampler.resample(vector, HOR_SETTING, FS, TIME_SHIFT), VERT_SETTING, SIZE)
+
+def main() -> None:
+    vector = np.random.default_rng(0).normal(size=16382)
+    resampler = Resampler(SIZE)
+    report('interp1d display frame', time_per_call(lambda: interp1d_frame(vector), REPEAT))
+    report('cached grid display frame', time_per_call(lambda: cached_grid_frame(resampler, vector), REPEAT))
+
+if __name__ == '__main__':
+    main()
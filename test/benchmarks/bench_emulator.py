@@ -0,0 +1,29 @@
+# End to end captures per second through the real Serial code path, served by the NS1 emulator on a pty.
+# Run from the repository root with: python -m test.benchmarks.bench_emulator
+from time import perf_counter
+
+from voltpeek.api import Session
+
+from test.benchmarks.timing import report
+from test.scopes.emulator import NS1Emulator, EmulatorSettings, SignalShape, SignalSpec
+
+CAPTURES = 50
+# Full speed USB moves roughly a megabyte per second.
+THROUGHPUTS = {'unlimited': None, 'usb full speed': 1e6}
+
+def seconds_per_capture(settings: EmulatorSettings, mode: str) -> float:
+    with NS1Emulator(SignalSpec(SignalShape.SINE, frequency=10e3, noise=0.01), settings) as emulator:
+        with Session('NS1', port=emulator.port) as session:
+            session.set_timebase(100e-6)
+            start = perf_counter()
+            for _ in session.iter_captures(CAPTURES, mode=mode):
+                pass
+            return (perf_counter() - start)/CAPTURES
+
+def main() -> None:
+    for name, throughput in THROUGHPUTS.items():
+        for mode in ('auto', 'normal'):
+            report(f'{mode} capture {name}', seconds_per_capture(EmulatorSettings(throughput=throughput), mode))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# PNG export of a full graticule, the old list of pixel tuples with putdata against Image.fromarray.
+# Run from the repository root with: python -m test.benchmarks.bench_export
+import itertools
+
+import numpy as np
+from PIL import Image
+
+from voltpeek import raster
+from voltpeek.export import ExportSettings, render_png
+
+from test.benchmarks.timing import time_per_call, report
+
+REPEAT = 5
+SIZE = 1000
+COLOR = (17, 176, 249)
+
+def rasterize(y) -> np.ndarray:
+    image = np.zeros((SIZE, SIZE, 3), dtype=np.uint8)
+    top, bottom = raster.staircase_spans(np.arange(SIZE), y, SIZE)
+    raster.fill_spans(image, *raster.thicken(top, bottom, 1), COLOR)
+    return image
+
+def tuple_export(y) -> None:
+    map = [[(int(r), int(g), int(b)) for r, g, b in row] for row in rasterize(y)]
+    image = Image.new('RGB', (SIZE, SIZE))
+    image.putdata(list(itertools.chain.from_iterable(map)))
+
+def array_export(y) -> None:
+    render_png(ExportSettings(vertical_setting=1, horizontal_setting=1e-3, probe_div=1, map=rasterize(y), cursor_data={}))
+
+def main() -> None:
+    y = SIZE/2 + SIZE/4*np.sin(np.linspace(0, 20, SIZE))
+    report('tuple list png export', time_per_call(lambda: tuple_export(y), REPEAT))
+    report('array png export', time_per_call(lambda: array_export(y), REPEAT))
+
+if __name__ == '__main__':
+    main()
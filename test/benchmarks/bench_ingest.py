@@ -0,0 +1,30 @@
+# Compares the old list based capture ingest against the preallocated buffer path.
+# Run from the repository root with: python -m test.benchmarks.bench_ingest
+from time import sleep
+
+from voltpeek.scopes.NS1 import NS1
+
+from test.scopes.serial_mock import SerialMock
+from test.benchmarks.timing import time_per_call, report
+
+REPEAT = 200
+
+def list_read_glob_data(ns1: NS1) -> list[int]:
+    codes: list[int] = []
+    while len(codes) < ns1.SCOPE_SPECS['memory_depth']:
+        codes += list(ns1.serial_port.read(ns1.serial_port.inWaiting()))
+        sleep(0.0001)
+    return codes
+
+def main() -> None:
+    ns1 = NS1()
+    ns1.serial_port = SerialMock()
+    report('list read_glob_data', time_per_call(lambda: list_read_glob_data(ns1), REPEAT))
+    report('buffer read_glob_data', time_per_call(ns1.read_glob_data, REPEAT))
+    report('list read_glob_data + _reconstruct', 
+           time_per_call(lambda: ns1._reconstruct(ns1._FIR_filter(list_read_glob_data(ns1)), 10), REPEAT))
+    report('buffer read_glob_data + _reconstruct', 
+           time_per_call(lambda: ns1._reconstruct(ns1._FIR_filter(ns1.read_glob_data()), 10), REPEAT))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+# Compares FIR filtering followed by float reconstruction against the fused table lookup.
+# Run from the repository root with: python -m test.benchmarks.bench_reconstruct
+import numpy as np
+
+from voltpeek.scopes.NS1 import NS1
+
+from test.benchmarks.timing import time_per_call, report
+
+REPEAT = 500
+
+def main() -> None:
+    ns1 = NS1()
+    codes = np.random.default_rng(0).integers(0, NS1.SCOPE_SPECS['resolution'], NS1.SCOPE_SPECS['memory_depth'], dtype=np.uint8)
+    report('_FIR_filter + _reconstruct', time_per_call(lambda: ns1._reconstruct(ns1._FIR_filter(codes), 10), REPEAT))
+    report('_reconstruct_filtered', time_per_call(lambda: ns1._reconstruct_filtered(codes, 10), REPEAT))
+
+if __name__ == '__main__':
+    main()
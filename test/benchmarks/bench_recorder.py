@@ -0,0 +1,30 @@
+# Worker side cost of handing a capture to the recorder and the rate the writer gets it to disk.
+# Run from the repository root with: python -m test.benchmarks.bench_recorder
+import os
+import tempfile
+
+import numpy as np
+
+from voltpeek.capture import Capture
+from voltpeek.recorder import Recorder
+from voltpeek.scopes.NS1 import NS1
+
+from test.benchmarks.timing import time_per_call, report
+
+REPEAT = 2000
+FULL_SCALE = 10
+
+def main() -> None:
+    memory_depth = NS1.SCOPE_SPECS['memory_depth']
+    codes = np.random.default_rng(0).integers(0, NS1.SCOPE_SPECS['resolution'], memory_depth, dtype=np.uint8)
+    capture = Capture(codes, NS1().capture_settings(FULL_SCALE))
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = Recorder(os.path.join(directory, 'scope0'), memory_depth, queue_size=REPEAT)
+        recorder.start()
+        report('submit a capture', time_per_call(lambda: recorder.submit(capture), REPEAT))
+        snapshot = recorder.stop()
+    print(f'written {snapshot.written}, dropped {snapshot.dropped}, max queue depth {snapshot.max_queue_depth}, '
+          f'{snapshot.throughput/2**20:.1f} MB/s')
+
+if __name__ == '__main__':
+    main()
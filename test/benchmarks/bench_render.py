@@ -0,0 +1,66 @@
+# Render time of one display frame at the graticule sizes used on 1080p and 4K screens. The old path deleted
+# every canvas item and recreated the grid and three polylines per trace, the current one moves existing items.
+# Needs a display. Run from the repository root with: python -m test.benchmarks.bench_render
+import tkinter as tk
+import numpy as np
+
+from voltpeek import constants
+from voltpeek.cursors import Cursors
+from voltpeek.gui.scope_display import Scope_Display
+
+from test.benchmarks.timing import time_per_call, report
+
+REPEAT = 200
+# The graticule is 0.75 of the shorter screen side.
+SIZES = {'1080p': 810, '4K': 1620}
+HOR_SETTING = 1e-3
+FS = 1.6e6
+VERT_SETTING = 1
+MEMORY_DEPTH = 16382
+SCOPE_COUNT = 2
+
+def delete_all_frame(scope_display: Scope_Display) -> None:
+    canvas, size = scope_display.canvas, scope_display.size
+    canvas.delete('all')
+    grid_spacing = int(size/constants.Display.GRID_LINE_COUNT)
+    for i in range(1, constants.Display.GRID_LINE_COUNT+1):
+        canvas.create_line(grid_spacing*i, 0, grid_spacing*i, size, fill='grey')
+        canvas.create_line(0, grid_spacing*i, size, grid_spacing*i, fill='grey')
+    for display_vector in scope_display._display_vectors:
+        coords = scope_display._vector_coords(display_vector)
+        canvas.create_line(*coords, fill='blue')
+        canvas.create_line(*[c + (0 if i % 2 == 0 else 1) for i, c in enumerate(coords)], fill='blue')
+        canvas.create_line(*[c - (0 if i % 2 == 0 else 1) for i, c in enumerate(coords)], fill='blue')
+    canvas.create_line(0, size//2, size, size//2, fill='white')
+    canvas.update_idletasks()
+
+def reused_items_frame(scope_display: Scope_Display) -> None:
+    scope_display._redraw()
+    scope_display.canvas.update_idletasks()
+
+def make_display(root: tk.Tk, size: int, rng: np.random.Generator) -> Scope_Display:
+    scope_display = Scope_Display(root, Cursors(size), size)
+    scope_display()
+    scope_display.init_vectors(SCOPE_COUNT)
+    for scope_index in range(0, SCOPE_COUNT):
+        scope_display.add_vector(rng.normal(size=MEMORY_DEPTH), scope_index)
+        scope_display.resample_vector(HOR_SETTING, VERT_SETTING, FS, MEMORY_DEPTH, None, False, scope_index)
+    scope_display.set_trigger_level(size//2)
+    return scope_display
+
+def main() -> None:
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        print('bench_render needs a display, skipping')
+        return
+    rng = np.random.default_rng(0)
+    for name, size in SIZES.items():
+        for frame_name, frame in (('delete all', delete_all_frame), ('reused items', reused_items_frame)):
+            scope_display = make_display(root, size, rng)
+            report(f'{frame_name} frame {name}', time_per_call(lambda: frame(scope_display), REPEAT))
+            scope_display.frame.destroy()
+    root.destroy()
+
+if __name__ == '__main__':
+    main()
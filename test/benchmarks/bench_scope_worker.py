@@ -0,0 +1,39 @@
+# Compares waveforms per second of a new thread per action against the persistent scope worker.
+# Run from the repository root with: python -m test.benchmarks.bench_scope_worker
+from threading import Thread, Lock
+
+from voltpeek.scopes.NS1 import NS1
+from voltpeek.scope_interface import ScopeInterface, ScopeAction
+
+from test.scopes.serial_mock import SerialMock
+from test.benchmarks.timing import time_per_call, report
+
+REPEAT = 500
+
+def mock_scope_interface() -> ScopeInterface:
+    scope_interface = ScopeInterface(NS1)
+    scope_interface.scope.serial_port = SerialMock()
+    return scope_interface
+
+def thread_per_action_capture(scope_interface: ScopeInterface, data_available: Lock) -> None:
+    data_available.acquire()
+    def force_trigger():
+        scope_interface._force_trigger()
+        data_available.release()
+    Thread(target=force_trigger).start()
+    with data_available:
+        pass
+
+def worker_capture(scope_interface: ScopeInterface) -> None:
+    scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+    scope_interface.wait_for_action()
+
+def main() -> None:
+    scope_interface = mock_scope_interface()
+    data_available = Lock()
+    report('thread per action waveform', time_per_call(lambda: thread_per_action_capture(scope_interface, data_available), REPEAT))
+    report('persistent worker waveform', time_per_call(lambda: worker_capture(scope_interface), REPEAT))
+    scope_interface.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+# Zoomed min/max frames of a held capture, reduced from the full capture against the min/max pyramid, and the
+# interpolated trace of a panned view.
+# Run from the repository root with: python -m test.benchmarks.bench_zoom
+import numpy as np
+
+from voltpeek.pyramid import MinMaxPyramid
+from voltpeek.resample import Resampler
+
+from test.benchmarks.timing import time_per_call, report
+
+REPEAT = 500
+SIZE = 810
+FS = 1.6e6
+# From the whole capture on screen down to a few samples per column
+HOR_SETTINGS = (1e-3, 100e-6, 10e-6)
+# One division of pan at 10 us/div
+PAN = 10e-6
+
+def main() -> None:
+    vector = np.random.default_rng(0).normal(size=16382)
+    resampler = Resampler(SIZE)
+    report('pyramid build', time_per_call(lambda: MinMaxPyramid(vector), REPEAT))
+    pyramid = MinMaxPyramid(vector)
+    for hor_setting in HOR_SETTINGS:
+        sample_positions = resampler.sample_positions(hor_setting, FS, len(vector))
+        samples_per_column = resampler.samples_per_column(hor_setting, FS)
+        report(f'full capture min/max {hor_setting:g} s/div', 
+               time_per_call(lambda: resampler.min_max(vector, hor_setting, FS), REPEAT))
+        report(f'pyramid min/max {hor_setting:g} s/div', 
+               time_per_call(lambda: pyramid.min_max(sample_positions, samples_per_column), REPEAT))
+    report(f'panned resample {HOR_SETTINGS[-1]:g} s/div', 
+           time_per_call(lambda: resampler.resample(vector, HOR_SETTINGS[-1], FS, PAN), REPEAT))
+
+if __name__ == '__main__':
+    main()
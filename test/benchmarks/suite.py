@@ -0,0 +1,210 @@
+# Capture to pixel benchmark suite. Every stage from the serial read to the PNG export is timed, along with the
+# waveform rate of the auto, normal and single trigger modes through ScopeInterface. Results are written as JSON
+# and compared against a stored baseline, the process exits with status 1 when a stage regressed.
+# Run from the repository root with: python -m test.benchmarks.suite [--transport mock|emulator]
+# Display stages need a Tk display and are skipped without one.
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+from unittest.mock import patch
+import json
+import os
+import platform
+import sys
+import tkinter as tk
+
+import numpy as np
+
+from voltpeek.cursors import Cursors
+from voltpeek.export import ExportSettings, render_png
+from voltpeek.gui.scope_display import Scope_Display
+from voltpeek.scope_interface import ScopeInterface, ScopeAction
+from voltpeek.scopes.NS1 import NS1
+from voltpeek.trigger import EdgeType
+
+from test.benchmarks.timing import sample_calls, summarize
+from test.scopes.emulator import NS1Emulator, SignalShape, SignalSpec
+from test.scopes.serial_mock import SerialMock
+
+BASELINE_PATH: str = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# A stage regresses when its median latency grows, or its rate drops, by more than this fraction.
+DEFAULT_TOLERANCE: float = 0.5
+REPEAT: int = 200
+MODE_REPEAT: int = 50
+# The graticule size of a 1080p screen
+DISPLAY_SIZE: int = 810
+FULL_SCALE: float = 10
+HOR_SETTING: float = 100e-6
+VERT_SETTING: float = 2
+CLOCK_DIV: int = 1
+
+@contextmanager
+def transport(name: str) -> Iterator[str]:
+    '''Yields the port the NS1 driver should open.'''
+    if name == 'emulator':
+        with NS1Emulator(SignalSpec(SignalShape.SINE, frequency=100e3, amplitude=5, noise=0.05)) as emulator:
+            yield emulator.port
+    else:
+        # voltpeek.scopes.NS1 resolves to the class, so the driver module is patched through sys.modules.
+        with patch.object(sys.modules['voltpeek.scopes.NS1'], 'Serial', new=SerialMock):
+            yield 'mock'
+
+def open_display() -> Optional[tk.Tk]:
+    try:
+        return tk.Tk()
+    except tk.TclError:
+        return None
+
+def run_action(scope_interface: ScopeInterface, action: ScopeAction) -> None:
+    scope_interface.set_scope_action(action)
+    scope_interface.wait_for_action()
+
+def driver_stages(ns1: NS1) -> dict[str, Callable[[], object]]:
+    codes = np.random.default_rng(0).integers(0, NS1.SCOPE_SPECS['resolution'], NS1.SCOPE_SPECS['memory_depth'], dtype=np.uint8)
+    def read_glob_data():
+        ns1.serial_port.write(NS1.FORCE_TRIGGER_COMMAND)
+        return ns1.read_glob_data(NS1.FORCE_TRIGGER_TIMEOUT)
+    return {
+        'read_glob_data': read_glob_data,
+        'fir_filter': lambda: ns1._FIR_filter(codes),
+        'reconstruct': lambda: ns1._reconstruct(codes, FULL_SCALE),
+        'reconstruct_filtered': lambda: ns1._reconstruct_filtered(codes, FULL_SCALE),
+        'export_png': lambda: render_png(ExportSettings(VERT_SETTING, HOR_SETTING, 1,
+                                                        np.zeros((DISPLAY_SIZE, DISPLAY_SIZE, 3), dtype=np.uint8), {})),
+    }
+
+def display_stages(root: tk.Tk, scope_interface: ScopeInterface) -> dict[str, Callable[[], object]]:
+    run_action(scope_interface, ScopeAction.FORCE_TRIGGER)
+    capture = scope_interface.latest_capture().copy()
+    fs: float = NS1.SCOPE_SPECS['sample_rate']/CLOCK_DIV
+    memory_depth: int = len(capture)
+    scope_display = Scope_Display(root, Cursors(DISPLAY_SIZE), DISPLAY_SIZE)
+    scope_display()
+    scope_display.init_vectors(1)
+    scope_display.set_trigger_level(DISPLAY_SIZE//2)
+    scope_display.add_vector(capture, 0)
+    scope_display.resample_vector(HOR_SETTING, VERT_SETTING, fs, memory_depth, EdgeType.RISING_EDGE, True, 0)
+    def redraw():
+        scope_display._redraw()
+        root.update_idletasks()
+    def capture_to_pixel():
+        run_action(scope_interface, ScopeAction.FORCE_TRIGGER)
+        scope_display.add_vector(scope_interface.latest_capture(), 0)
+        scope_display.resample_vector(HOR_SETTING, VERT_SETTING, fs, memory_depth, EdgeType.RISING_EDGE, True, 0)
+        root.update_idletasks()
+    return {
+        'resample_horizontal_vector': lambda: scope_display._resample_horizontal_vector(
+            capture, HOR_SETTING, VERT_SETTING, fs, memory_depth, EdgeType.RISING_EDGE, True, False),
+        'quantize_vertical': lambda: scope_display._quantize_vertical(capture[:DISPLAY_SIZE], VERT_SETTING),
+        'redraw': redraw,
+        'image_map': lambda: scope_display.image_map,
+        'export_png': lambda: render_png(ExportSettings(VERT_SETTING, HOR_SETTING, 1, scope_display.image_map, {})),
+        'auto_capture_to_pixel': capture_to_pixel,
+    }
+
+def mode_stages(scope_interface: ScopeInterface) -> dict[str, Callable[[], object]]:
+    def single_trigger():
+        # Arm, wait for the capture and take it, like the single trigger command.
+        run_action(scope_interface, ScopeAction.TRIGGER)
+        return scope_interface.latest_capture()
+    return {
+        'auto_trigger': lambda: run_action(scope_interface, ScopeAction.FORCE_TRIGGER),
+        'normal_trigger': lambda: run_action(scope_interface, ScopeAction.TRIGGER),
+        'single_trigger': single_trigger,
+    }
+
+def connect(port: str) -> ScopeInterface:
+    scope_interface = ScopeInterface(NS1, device=port)
+    run_action(scope_interface, ScopeAction.CONNECT)
+    scope_interface.set_full_scale(FULL_SCALE)
+    run_action(scope_interface, ScopeAction.SET_RANGE)
+    scope_interface.set_value(CLOCK_DIV)
+    run_action(scope_interface, ScopeAction.SET_CLOCK_DIV)
+    scope_interface.set_value(0)
+    run_action(scope_interface, ScopeAction.SET_TRIGGER_LEVEL)
+    return scope_interface
+
+def run_suite(transport_name: str) -> dict:
+    results: dict[str, dict[str, float]] = {}
+    skipped: list[str] = []
+    with transport(transport_name) as port:
+        ns1 = NS1(port=port)
+        ns1.connect()
+        ns1.set_range(FULL_SCALE)
+        for name, fn in driver_stages(ns1).items():
+            results[name] = summarize(sample_calls(fn, REPEAT))
+        # The scope interface opens its own port.
+        ns1.serial_port.close()
+        scope_interface = connect(port)
+        for name, fn in mode_stages(scope_interface).items():
+            results[name] = summarize(sample_calls(fn, MODE_REPEAT))
+        root = open_display()
+        if root is None:
+            skipped = ['resample_horizontal_vector', 'quantize_vertical', 'redraw', 'image_map', 'auto_capture_to_pixel']
+        else:
+            for name, fn in display_stages(root, scope_interface).items():
+                results[name] = summarize(sample_calls(fn, MODE_REPEAT if name == 'auto_capture_to_pixel' else REPEAT))
+            root.destroy()
+        scope_interface.close()
+    return {
+        'meta': {'transport': transport_name, 'python': platform.python_version(), 'numpy': np.__version__,
+                 'machine': platform.machine(), 'system': platform.system()},
+        'results': results,
+        'skipped': skipped,
+    }
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], tolerance: float) -> list[str]:
+    regressions: list[str] = []
+    for name, expected in baseline.items():
+        if name not in results:
+            continue
+        measured = results[name]
+        if measured['p50_ms'] > expected['p50_ms']*(1 + tolerance):
+            regressions.append(f'{name}: median latency {measured["p50_ms"]:.3f} ms, baseline {expected["p50_ms"]:.3f} ms')
+        if measured['per_second'] < expected['per_second']/(1 + tolerance):
+            regressions.append(f'{name}: {measured["per_second"]:.1f} /s, baseline {expected["per_second"]:.1f} /s')
+    return regressions
+
+def print_results(suite: dict) -> None:
+    for name, result in suite['results'].items():
+        print(f'{name:<30}{result["p50_ms"]:10.3f} ms p50 {result["p99_ms"]:10.3f} ms p99 {result["per_second"]:10.1f} /s')
+    for name in suite['skipped']:
+        print(f'{name:<30} skipped, no display')
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument('--transport', choices=('mock', 'emulator'), default='emulator' if os.name == 'posix' else 'mock')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+    suite = run_suite(args.transport)
+    print_results(suite)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(suite, output_file, indent=4)
+    if args.save_baseline:
+        baselines = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                baselines = json.load(baseline_file)
+        baselines[args.transport] = suite['results']
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(baselines, baseline_file, indent=4)
+        return
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}, run with --save-baseline to create one.')
+        return
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file).get(args.transport, {})
+    regressions = compare(suite['results'], baseline, args.tolerance)
+    if regressions:
+        print('PERFORMANCE REGRESSION')
+        for regression in regressions:
+            print('  ' + regression)
+        sys.exit(1)
+    print(f'No regressions against the {args.transport} baseline.')
+
+if __name__ == '__main__':
+    main()
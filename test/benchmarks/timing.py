@@ -0,0 +1,28 @@
+from typing import Callable
+from time import perf_counter
+
+import numpy as np
+from numpy.typing import NDArray
+
+def time_per_call(fn: Callable[[], object], repeat: int) -> float:
+    fn()
+    start = perf_counter()
+    for _ in range(0, repeat):
+        fn()
+    return (perf_counter() - start)/repeat
+
+def report(name: str, seconds: float) -> None: print(f'{name:<40}{seconds*1e3:10.3f} ms {1/seconds:10.1f} /s')
+
+def sample_calls(fn: Callable[[], object], repeat: int) -> NDArray[np.float64]:
+    '''Seconds taken by each of repeat calls, after one warm up call.'''
+    fn()
+    samples = np.zeros(repeat)
+    for i in range(0, repeat):
+        start = perf_counter()
+        fn()
+        samples[i] = perf_counter() - start
+    return samples
+
+def summarize(samples: NDArray[np.float64]) -> dict[str, float]:
+    return {'p50_ms': float(np.percentile(samples, 50)*1e3), 'p99_ms': float(np.percentile(samples, 99)*1e3), 
+            'per_second': float(1/np.mean(samples))}
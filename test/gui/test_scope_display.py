@@ -57,11 +57,44 @@ class TestScopeDisplay(unittest.TestCase):
         self.scope_display.decrement_trigger_level_fine()
         self.assertEqual(self.scope_display._trigger_level, initial_level + self.scope_display.FINE_STEP)
 
+    def test_redraw_reuses_canvas_items(self):
+        self.scope_display.add_vector(np.zeros(16382), 0)
+        self.scope_display.resample_vector(1e-3, 1, 1.6e6, 16382, None, False, 0)
+        item_count = len(self.scope_display.canvas.find_all())
+        self.scope_display.set_trigger_level(100)
+        self.scope_display.resample_vector(1e-3, 1, 1.6e6, 16382, None, False, 0)
+        self.assertEqual(len(self.scope_display.canvas.find_all()), item_count)
+        self.assertEqual(self.scope_display.canvas.coords(self.scope_display._trigger_item), [0, 100, self.SIZE, 100])
+
+    def test_resample_zoom(self):
+        vector = np.zeros(16382)
+        vector[8191] = 1
+        self.scope_display.add_vector(vector, 0)
+        self.scope_display.peak_detect = True
+        # 1 ms/div at 1.6 MS/s shows the whole capture, the peak detect envelope comes from the pyramid.
+        self.scope_display.resample_zoom(1e-3, 1, 1.6e6, 0, False)
+        self.assertIsNotNone(self.scope_display._display_envelopes[0])
+        self.assertEqual(len(self.scope_display._display_vectors[0]), self.SIZE)
+        # Panned past the end of the capture nothing of it is left on screen.
+        self.scope_display.resample_zoom(100e-6, 1, 1.6e6, 6e-3, False)
+        self.assertTrue(np.all(self.scope_display._display_vectors[0] < 0))
+
+    def test_zoomed_out_trace_does_not_alias(self):
+        # A 0.71 MHz sine at 1.6 MS/s has about 20 samples and 9 periods in each column at 1 ms/div.
+        self.scope_display.add_vector(np.sin(2*np.pi*0.71e6*np.arange(16382)/1.6e6), 0)
+        self.scope_display.resample_zoom(1e-3, 1, 1.6e6, 0, False)
+        self.assertIsNone(self.scope_display._display_envelopes[0])
+        self.assertLess(np.ptp(self.scope_display._display_vectors[0]), 5)
+        # Below one sample per column the samples are interpolated.
+        self.scope_display.resample_zoom(10e-6, 1, 1.6e6, 0, False)
+        self.assertGreater(np.ptp(self.scope_display._display_vectors[0]), 150)
+
     def test_image_map(self):
         self.scope_display.add_vector([0] * 16384, 0)
         image_map = self.scope_display.image_map
         self.assertEqual(len(image_map), self.SIZE)
         self.assertEqual(len(image_map[0]), self.SIZE)
+        self.assertEqual(image_map.shape, (self.SIZE, self.SIZE, 3))
         print(self.scope_display.SIGNAL_COLORS[0])
         #self.assertIn(self.scope_display.SIGNAL_COLORS[0], [pixel for row in image_map for pixel in row])
 
@@ -0,0 +1,277 @@
+'''
+Protocol level NS1 and NS0 emulators served on a Linux pseudo terminal. The drivers open the emulator port with
+the real Serial class, so every byte goes through the same code path as the hardware:
+
+    with NS1Emulator(SignalSpec(SignalShape.SQUARE, frequency=10e3)) as emulator:
+        ns1 = NS1(port=emulator.port)
+        ns1.connect()
+'''
+from dataclasses import dataclass, field
+from enum import Enum
+from threading import Thread, Event
+from time import monotonic, sleep
+from typing import Optional
+import os
+import select
+import tty
+
+import numpy as np
+from numpy.typing import NDArray
+
+from voltpeek.helpers import negative_base10_decode, negative_base10_encode
+from voltpeek.scopes.NS0 import NS0
+from voltpeek.scopes.NS1 import NS1
+
+class SignalShape(Enum):
+    DC = 'dc'
+    SINE = 'sine'
+    SQUARE = 'square'
+    NOISE = 'noise'
+
+@dataclass
+class SignalSpec:
+    shape: SignalShape = SignalShape.SINE
+    frequency: float = 1e3
+    # Peak amplitude in volts at the probe tip
+    amplitude: float = 1
+    offset: float = 0
+    # RMS volts of gaussian noise added to every shape
+    noise: float = 0
+    # Glitches are single sample spikes at random times
+    glitch_rate: float = 0
+    glitch_amplitude: float = 0
+
+@dataclass
+class EmulatorSettings:
+    # Bytes per second sent to the host, None sends as fast as the host reads.
+    throughput: Optional[float] = None
+    # Delay before the emulator answers a capture or calibration read
+    latency: float = 0
+    # How long a triggered capture waits for its event before the signal is searched for one
+    trigger_wait: float = 0
+    chunk_size: int = 4096
+    # Front end offset error in volts at the probe tip for each (high range, amplifier gain) setting
+    offset_errors: dict[tuple[bool, bool], float] = field(default_factory=dict)
+    # Front end gain error for each (high range, amplifier gain) setting, applied before the offset error
+    gain_errors: dict[tuple[bool, bool], float] = field(default_factory=dict)
+
+class SignalGenerator:
+    '''Continuous synthetic signal, time keeps running across captures so the phase changes between them.'''
+    def __init__(self, spec: SignalSpec, seed: int=0) -> None:
+        self.spec: SignalSpec = spec
+        self._rng: np.random.Generator = np.random.default_rng(seed)
+        self._time: float = 0
+
+    def samples(self, count: int, fs: float) -> NDArray[np.float64]:
+        tt = self._time + np.arange(count)/fs
+        self._time += count/fs
+        phase = 2*np.pi*self.spec.frequency*tt
+        if self.spec.shape == SignalShape.SINE:
+            volts = self.spec.amplitude*np.sin(phase)
+        elif self.spec.shape == SignalShape.SQUARE:
+            volts = self.spec.amplitude*np.where(np.sin(phase) >= 0, 1.0, -1.0)
+        elif self.spec.shape == SignalShape.NOISE:
+            volts = self._rng.normal(0, self.spec.amplitude, count)
+        else:
+            volts = np.full(count, float(self.spec.amplitude))
+        volts += self.spec.offset
+        if self.spec.noise > 0:
+            volts += self._rng.normal(0, self.spec.noise, count)
+        if self.spec.glitch_rate > 0:
+            glitch_count = self._rng.poisson(self.spec.glitch_rate*count/fs)
+            volts[self._rng.integers(0, count, glitch_count)] += self.spec.glitch_amplitude
+        return volts
+
+class ScopeEmulator:
+    '''
+    Speaks the single byte command set of the NS1 firmware on the master side of a pty. Captures are
+    memory_depth ADC codes, commands that take a value are followed by ASCII digits and a null byte.
+    '''
+    SCOPE = NS1
+    # Capture commands and the calibration read are answered, the rest only change the emulator state.
+    VALUE_COMMANDS: tuple[bytes, ...] = (NS1.TRIGGER_LEVEL_COMMAND, NS1.CLOCK_DIV_COMMAND, NS1.SET_CAL_COMMAND)
+    # A triggered capture gives up on the signal after this many captures worth of samples and waits again.
+    TRIGGER_SEARCH_CAPTURES: int = 4
+    POLL_INTERVAL: float = 0.01
+
+    def __init__(self, signal: Optional[SignalSpec]=None, settings: Optional[EmulatorSettings]=None, seed: int=0) -> None:
+        self.generator: SignalGenerator = SignalGenerator(signal or SignalSpec(), seed)
+        self.settings: EmulatorSettings = settings or EmulatorSettings()
+        self.high_range: bool = True
+        self.amplifier_gain: bool = False
+        self.rising_edge: bool = True
+        self.trigger_code: int = self.SCOPE.SCOPE_SPECS['resolution']//2
+        self.clock_div: int = 1
+        self.signal_trigger: bool = False
+        self.recording: bool = False
+        self.calibration_codes: list[int] = [0, 0, 0, 0]
+        # Every command byte received, in order
+        self.commands: list[bytes] = []
+        self.captures_sent: int = 0
+        self._pending_trigger: Optional[float] = None
+        self._closing: Event = Event()
+        self._master_fd: Optional[int] = None
+        self._slave_fd: Optional[int] = None
+        self._thread: Optional[Thread] = None
+        self._port: Optional[str] = None
+
+    def __enter__(self) -> 'ScopeEmulator':
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None: self.close()
+
+    def start(self) -> str:
+        self._master_fd, self._slave_fd = os.openpty()
+        # Raw mode so command bytes are neither echoed nor translated before the driver opens the port.
+        tty.setraw(self._slave_fd)
+        self._port = os.ttyname(self._slave_fd)
+        self._thread = Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self._port
+
+    def close(self) -> None:
+        self._closing.set()
+        if self._thread is not None:
+            self._thread.join()
+        for fd in (self._master_fd, self._slave_fd):
+            if fd is not None:
+                os.close(fd)
+        self._master_fd, self._slave_fd = None, None
+
+    @property
+    def port(self) -> Optional[str]: return self._port
+
+    @property
+    def fs(self) -> float: return self.SCOPE.SCOPE_SPECS['sample_rate']/self.clock_div
+
+    def _serve(self) -> None:
+        pending_input = bytearray()
+        while not self._closing.is_set():
+            readable, _, _ = select.select([self._master_fd], [], [], self.POLL_INTERVAL)
+            if readable:
+                try:
+                    pending_input += os.read(self._master_fd, 1024)
+                except OSError:
+                    # The host side closed, wait for it to reopen.
+                    sleep(self.POLL_INTERVAL)
+            pending_input = self._process(pending_input)
+            if self._pending_trigger is not None and monotonic() >= self._pending_trigger:
+                codes = self._triggered_codes()
+                if codes is not None:
+                    self._pending_trigger = None
+                    self._send_capture(codes)
+
+    def _process(self, pending_input: bytearray) -> bytearray:
+        while len(pending_input) > 0:
+            command = bytes(pending_input[:1])
+            if command in self.VALUE_COMMANDS:
+                if 0 not in pending_input:
+                    return pending_input
+                end = pending_input.index(0)
+                value = pending_input[1:end].decode('utf-8')
+                del pending_input[:end+1]
+                self.commands.append(command)
+                self._handle_value(command, value)
+            else:
+                del pending_input[:1]
+                self.commands.append(command)
+                self._handle(command)
+        return pending_input
+
+    def _handle_value(self, command: bytes, value: str) -> None:
+        if command == NS1.TRIGGER_LEVEL_COMMAND:
+            self.trigger_code = int(value)
+        elif command == NS1.CLOCK_DIV_COMMAND:
+            self.clock_div = int(value)
+        else:
+            digits = NS1.CAL_MEMORY_DIGITS
+            self.calibration_codes = [int(value[i:i+digits]) for i in range(0, len(value), digits)]
+
+    def _handle(self, command: bytes) -> None:
+        if command == NS1.FORCE_TRIGGER_COMMAND:
+            self._pending_trigger = None
+            sleep(self.settings.latency)
+            self._send_capture(self.generator_codes(self.SCOPE.SCOPE_SPECS['memory_depth']))
+        elif command == NS1.TRIGGER_COMMAND:
+            # A new trigger command rearms, any capture still waiting for its event is abandoned.
+            self._pending_trigger = monotonic() + self.settings.latency + self.settings.trigger_wait
+        elif command == NS1.STOP_COMMAND:
+            self._pending_trigger = None
+        elif command == NS1.HIGH_RANGE_COMMAND or command == NS1.LOW_RANGE_COMMAND:
+            self.high_range = command == NS1.HIGH_RANGE_COMMAND
+        elif command == NS1.AMPLIFIER_GAIN_COMMAND or command == NS1.AMPLIFIER_UNITY_COMMAND:
+            self.amplifier_gain = command == NS1.AMPLIFIER_GAIN_COMMAND
+        elif command == NS1.RISING_EDGE_TRIGGER_COMMAND or command == NS1.FALLING_EDGE_TRIGGER_COMMAND:
+            self.rising_edge = command == NS1.RISING_EDGE_TRIGGER_COMMAND
+        elif command == NS1.ENABLE_SIGNAL_TRIGGER_COMMAND or command == NS1.DISABLE_SIGNAL_TRIGGER_COMMAND:
+            self.signal_trigger = command == NS1.ENABLE_SIGNAL_TRIGGER_COMMAND
+        elif command == NS1.READ_CAL_COMMAND:
+            sleep(self.settings.latency)
+            self._send(b''.join(code.to_bytes(2, 'little') for code in self.calibration_codes))
+        elif command == NS1.START_RECORD:
+            self.recording = True
+        elif command == NS1.RECORD_SAMPLE:
+            self._send(bytes(self.generator_codes(1)))
+
+    def attenuation(self) -> float:
+        attenuation = self.SCOPE.SCOPE_SPECS['attenuation']['range_high' if self.high_range else 'range_low']
+        return attenuation*2 if self.amplifier_gain else attenuation
+
+    def to_codes(self, volts: NDArray[np.float64]) -> NDArray[np.uint8]:
+        specs = self.SCOPE.SCOPE_SPECS
+        offset_error: float = self.settings.offset_errors.get((self.high_range, self.amplifier_gain), 0)
+        gain_error: float = self.settings.gain_errors.get((self.high_range, self.amplifier_gain), 1)
+        adc_input = (volts*gain_error + offset_error)*self.attenuation() + specs['bias']
+        LSB: float = specs['voltage_ref']/specs['resolution']
+        return np.clip(np.round(adc_input/LSB), 0, specs['resolution'] - 1).astype(np.uint8)
+
+    def generator_codes(self, count: int) -> NDArray[np.uint8]: return self.to_codes(self.generator.samples(count, self.fs))
+
+    def _triggered_codes(self) -> Optional[NDArray[np.uint8]]:
+        # The trigger event sits in the middle of the capture like on the hardware.
+        depth: int = self.SCOPE.SCOPE_SPECS['memory_depth']
+        for _ in range(0, self.TRIGGER_SEARCH_CAPTURES):
+            codes = self.generator_codes(2*depth).astype(np.int16)
+            before, after = codes[depth//2-1:depth//2+depth-1], codes[depth//2:depth//2+depth]
+            if self.rising_edge:
+                events = np.flatnonzero((before < self.trigger_code) & (after >= self.trigger_code))
+            else:
+                events = np.flatnonzero((before > self.trigger_code) & (after <= self.trigger_code))
+            if len(events) > 0:
+                return codes[events[0]:events[0] + depth].astype(np.uint8)
+        return None
+
+    def _send_capture(self, codes: NDArray[np.uint8]) -> None:
+        self._send(codes.tobytes())
+        self.captures_sent += 1
+
+    def _send(self, data: bytes) -> None:
+        view = memoryview(data)
+        while len(view) > 0 and not self._closing.is_set():
+            chunk = view[:self.settings.chunk_size]
+            _, writable, _ = select.select([], [self._master_fd], [], self.POLL_INTERVAL)
+            if not writable:
+                continue
+            written: int = os.write(self._master_fd, chunk)
+            view = view[written:]
+            if self.settings.throughput is not None:
+                sleep(written/self.settings.throughput)
+
+class NS1Emulator(ScopeEmulator):
+    SCOPE = NS1
+
+class NS0Emulator(ScopeEmulator):
+    '''The NS0 is a bare Pi Pico ADC, codes map straight onto 0 to 3.3 V with no front end.'''
+    SCOPE = NS0
+
+    def to_codes(self, volts: NDArray[np.float64]) -> NDArray[np.uint8]:
+        specs = self.SCOPE.SCOPE_SPECS
+        LSB: float = specs['voltage_ref']/specs['resolution']
+        return np.clip(np.round(volts/LSB), 0, specs['resolution'] - 1).astype(np.uint8)
+
+def decode_calibration(codes: list[int]) -> list[float]:
+    return [negative_base10_decode(code, NS1.CAL_BITS)/NS1.CAL_INT_MULTIPLIER for code in codes]
+
+def encode_calibration(offsets: list[float]) -> list[int]:
+    return [negative_base10_encode(int(offset*NS1.CAL_INT_MULTIPLIER), NS1.CAL_BITS) for offset in offsets]
@@ -4,6 +4,10 @@ from math import sin, pi
 from voltpeek.scopes.NS1 import NS1
 
 class SerialMock(MagicMock):
+    # Mid scale code, this reconstructs to zero volts with no calibration offset.
+    SCOPE_CODE: int = 128
+    TRANSMIT_CHUNKS: int = 4
+
     def open(self): self.opened = True
 
     def flush(self):
@@ -15,27 +19,40 @@ class SerialMock(MagicMock):
     def flushOutput(self):
         pass
 
-    def inWaiting(self):
+    def write(self, data): return len(data)
+
+    def reset_input_buffer(self):
+        pass
+
+    def reset_output_buffer(self):
         pass
 
+    def inWaiting(self): return len(self._transmit_buffer[self._read_index % self.TRANSMIT_CHUNKS])
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.created = True
         self.baudrate = None
         self.port = None
         self.timeout = None
+        self.in_waiting = 0
         self._read_index = 0
+        continues_buffer = self._get_scope_data()
+        quarter_transmit = NS1.SCOPE_SPECS['memory_depth']//self.TRANSMIT_CHUNKS
+        self._transmit_buffer = [continues_buffer[:quarter_transmit],
+                                 continues_buffer[quarter_transmit:2*quarter_transmit],
+                                 continues_buffer[2*quarter_transmit:3*quarter_transmit],
+                                 continues_buffer[3*quarter_transmit:]]
 
-    def _get_scope_data(self): return [300 for _ in range(0, NS1.SCOPE_SPECS['memory_depth'])]
+    def _get_scope_data(self) -> bytes: return bytes([self.SCOPE_CODE for _ in range(0, NS1.SCOPE_SPECS['memory_depth'])])
 
     def read(self, in_waiting):
-        continues_buffer = self._get_scope_data()
-        quarter_transmit = NS1.SCOPE_SPECS['memory_depth']//4
-        transmit_buffer = [continues_buffer[:quarter_transmit], 
-                           continues_buffer[quarter_transmit:2*quarter_transmit], 
-                           continues_buffer[2*quarter_transmit:3*quarter_transmit],
-                           continues_buffer[3*quarter_transmit:]]  
         self._read_index += 1
         if self._read_index == 5:
             self._read_index = 1
-        return transmit_buffer[self._read_index-1]
\ No newline at end of file
+        return self._transmit_buffer[self._read_index-1]
+
+    def readinto(self, buffer) -> int:
+        chunk = self.read(len(buffer))[:len(buffer)]
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
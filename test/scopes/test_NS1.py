@@ -7,6 +7,7 @@ import unittest
 from unittest.mock import patch
 
 from voltpeek.scopes.NS1 import NS1
+from voltpeek.filters import parse_filter
 
 from test.scopes.serial_mock import SerialMock
 
@@ -36,6 +37,19 @@ class TestNS1(unittest.TestCase):
             self.assertEqual(code, 300)
     '''
 
+    def test_read_glob_data_reads_full_capture(self):
+        self.ns1.serial_port = SerialMock()
+        codes = self.ns1.read_glob_data()
+        self.assertEqual(codes.dtype, np.uint8)
+        self.assertEqual(len(codes), NS1.SCOPE_SPECS['memory_depth'])
+        self.assertTrue(np.all(codes == SerialMock.SCOPE_CODE))
+
+    def test_read_glob_data_reuses_capture_buffer(self):
+        self.ns1.serial_port = SerialMock()
+        first_codes = self.ns1.read_glob_data()
+        second_codes = self.ns1.read_glob_data()
+        self.assertTrue(np.shares_memory(first_codes, second_codes))
+
     def test_reconstruct(self):
         codes = [(NS1.SCOPE_SPECS['resolution']/2) for _ in range(0, NS1.SCOPE_SPECS['memory_depth'])]
         vv = self.ns1._reconstruct(codes, 10, offset_null=False)
@@ -52,4 +66,41 @@ class TestNS1(unittest.TestCase):
         N = NS1.FIR_LENGTH
         test_list = [1, 2, 3, 4,5,6]
         result_list = [(1/N)+(2/N)+(3/N), (2/N)+(3/N)+(4/N), (3/N)+(4/N)+(5/N), (4/N)+(5/N)+(6/N)]  
-        np.testing.assert_allclose(list(self.ns1._FIR_filter(test_list)), result_list)
\ No newline at end of file
+        np.testing.assert_allclose(list(self.ns1._FIR_filter(test_list)), result_list)
+
+    def test_read_glob_data_returns_none_on_timeout(self):
+        self.ns1.serial_port = SerialMock()
+        self.ns1.serial_port.readinto = lambda buffer: 0
+        self.assertIsNone(self.ns1.read_glob_data(timeout=0.01))
+
+    def test_reconstruct_table_matches_arithmetic(self):
+        self.ns1._cal_offsets['range_low'] = 0.25
+        codes = np.arange(0, NS1.SCOPE_SPECS['resolution'], dtype=np.uint8)
+        for full_scale in NS1.SCOPE_SPECS['scales']:
+            np.testing.assert_allclose(self.ns1._reconstruct(codes, full_scale), 
+                                       self.ns1._reconstruct(codes.astype(float), full_scale))
+
+    def test_reconstruct_filtered_matches_filter_then_reconstruct(self):
+        codes = np.random.default_rng(0).integers(0, NS1.SCOPE_SPECS['resolution'], 1000, dtype=np.uint8)
+        for full_scale in NS1.SCOPE_SPECS['scales']:
+            np.testing.assert_allclose(self.ns1._reconstruct_filtered(codes, full_scale), 
+                                       self.ns1._reconstruct(self.ns1._FIR_filter(codes), full_scale))
+
+    def test_conversion_tables_rebuilt_after_reading_calibration_offsets(self):
+        codes = np.full(10, NS1.SCOPE_SPECS['resolution']//2, dtype=np.uint8)
+        np.testing.assert_allclose(self.ns1._reconstruct_filtered(codes, 10), 0)
+        self.ns1.serial_port = SerialMock()
+        # 100 mV on the high range only
+        offset_bytes = bytes([100, 0, 0, 0, 0, 0, 0, 0])
+        self.ns1.serial_port.readinto = lambda buffer: buffer.__setitem__(slice(0, 8), offset_bytes) or 8
+        self.assertTrue(self.ns1.read_calibration_offsets())
+        np.testing.assert_allclose(self.ns1._reconstruct_filtered(codes, 10), 0.1)
+
+    def test_reconstruct_filtered_uses_selected_filter(self):
+        codes = np.random.default_rng(0).integers(0, NS1.SCOPE_SPECS['resolution'], 1000, dtype=np.uint8)
+        for filter_text in ('none', 'boxcar:9', 'sinc:31'):
+            self.ns1.set_filter(parse_filter(filter_text))
+            self.assertEqual(self.ns1.fir_length, self.ns1.fir_filter.length)
+            np.testing.assert_allclose(self.ns1._reconstruct_filtered(codes, 10), 
+                                       self.ns1._reconstruct(self.ns1._FIR_filter(codes), 10), atol=1e-9)
+            self.assertEqual(len(self.ns1._reconstruct_filtered(codes, 10)), len(codes) - (self.ns1.fir_length - 1))
@@ -0,0 +1,294 @@
+import sys
+sys.path.append('..')
+
+from threading import Event, Timer
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from voltpeek.api import Session
+from voltpeek.filters import NO_FILTER
+from voltpeek.recorder import Recorder, read_recording
+from voltpeek.scopes.NS0 import NS0
+from voltpeek.scopes.NS1 import NS1
+from voltpeek.scopes.scope_base import ReadOutcome
+from voltpeek.scope_interface import ScopeInterface, ScopeAction
+
+from test.scopes.emulator import (NS0Emulator, NS1Emulator, EmulatorSettings, SignalShape, SignalSpec, 
+                                  encode_calibration, decode_calibration)
+
+class TestNS1Emulator(unittest.TestCase):
+    FULL_SCALE = 10
+
+    def start(self, signal: SignalSpec, settings: EmulatorSettings=None) -> NS1:
+        self.emulator = NS1Emulator(signal, settings)
+        self.emulator.start()
+        self.addCleanup(self.emulator.close)
+        ns1 = NS1(port=self.emulator.port)
+        ns1.connect()
+        self.assertFalse(ns1.error)
+        ns1.set_range(self.FULL_SCALE)
+        ns1.set_amplifier_gain(self.FULL_SCALE)
+        return ns1
+
+    def test_force_trigger_sine(self):
+        ns1 = self.start(SignalSpec(SignalShape.SINE, frequency=100e3, amplitude=2))
+        xx = ns1.get_scope_force_trigger_data(self.FULL_SCALE)
+        self.assertEqual(len(xx), NS1.SCOPE_SPECS['memory_depth'] - (ns1.fir_length - 1))
+        self.assertAlmostEqual(xx.max(), 2, delta=0.1)
+        self.assertAlmostEqual(xx.min(), -2, delta=0.1)
+        self.assertEqual(self.emulator.captures_sent, 1)
+
+    def test_settings_reach_the_emulator(self):
+        ns1 = self.start(SignalSpec())
+        ns1.set_range(1)
+        ns1.set_amplifier_gain(1)
+        ns1.set_clock_div(5)
+        ns1.set_falling_edge_trigger()
+        ns1.enable_signal_trigger()
+        ns1.get_scope_force_trigger_data(1)
+        self.assertFalse(self.emulator.high_range)
+        self.assertTrue(self.emulator.amplifier_gain)
+        self.assertEqual(self.emulator.clock_div, 5)
+        self.assertFalse(self.emulator.rising_edge)
+        self.assertTrue(self.emulator.signal_trigger)
+
+    def test_clock_div_slows_the_signal(self):
+        ns1 = self.start(SignalSpec(SignalShape.SQUARE, frequency=1e6))
+        ns1.set_clock_div(5)
+        xx = ns1.get_scope_force_trigger_data(self.FULL_SCALE)
+        edges = np.count_nonzero(np.diff(np.sign(xx)) > 0)
+        expected_edges = 1e6*len(xx)/(NS1.SCOPE_SPECS['sample_rate']/5)
+        self.assertAlmostEqual(edges, expected_edges, delta=2)
+
+    def test_trigger_event_is_centered(self):
+        ns1 = self.start(SignalSpec(SignalShape.SQUARE, frequency=100e3, amplitude=2))
+        ns1.set_trigger_voltage(0, self.FULL_SCALE)
+        ns1.set_rising_edge_trigger()
+        xx = ns1.get_scope_trigger_data(self.FULL_SCALE)
+        center = len(xx)//2
+        self.assertLess(xx[center - 5], 0)
+        self.assertGreater(xx[center + 5], 0)
+
+    def test_stop_without_trigger_event(self):
+        ns1 = self.start(SignalSpec(SignalShape.DC, amplitude=0))
+        ns1.set_trigger_voltage(1, self.FULL_SCALE)
+        Timer(0.1, ns1.stop_trigger).start()
+        start = time.perf_counter()
+        self.assertEqual(len(ns1.get_scope_trigger_data(self.FULL_SCALE)), 0)
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(self.emulator.captures_sent, 0)
+
+    def test_incomplete_capture_is_not_returned(self):
+        # The capture takes four seconds to send, the read gives up long before that.
+        ns1 = self.start(SignalSpec(), EmulatorSettings(throughput=4096))
+        ns1.FORCE_TRIGGER_TIMEOUT = 0.2
+        self.assertEqual(len(ns1.get_scope_force_trigger_data(self.FULL_SCALE)), 0)
+        self.assertEqual(ns1.last_read, ReadOutcome.INCOMPLETE)
+
+    def test_stopped_capture_is_counted(self):
+        self.emulator = NS1Emulator(SignalSpec(SignalShape.DC, amplitude=0))
+        self.addCleanup(self.emulator.close)
+        scope_interface = ScopeInterface(NS1, device=self.emulator.start())
+        self.addCleanup(scope_interface.close)
+        for action in (ScopeAction.CONNECT, ScopeAction.FORCE_TRIGGER, ScopeAction.TRIGGER):
+            scope_interface.set_scope_action(action)
+            if action == ScopeAction.TRIGGER:
+                Timer(0.1, scope_interface.stop_trigger).start()
+            scope_interface.wait_for_action()
+        snapshot = scope_interface.stats.snapshot()
+        self.assertEqual((snapshot.captures, snapshot.stops), (1, 1))
+        self.assertEqual(scope_interface.last_outcome, ReadOutcome.STOPPED)
+        self.assertEqual(scope_interface.capture_count, 1)
+
+    def test_stop_before_the_read_starts(self):
+        self.emulator = NS1Emulator(SignalSpec(SignalShape.DC, amplitude=0))
+        self.addCleanup(self.emulator.close)
+        scope_interface = ScopeInterface(NS1, device=self.emulator.start())
+        self.addCleanup(scope_interface.close)
+        scope_interface.set_scope_action(ScopeAction.CONNECT)
+        scope_interface.wait_for_action()
+        scope = scope_interface.scope
+        scope.set_trigger_voltage(1, self.FULL_SCALE)
+        released = Event()
+        purge = scope._purge_serial_buffers
+        scope._purge_serial_buffers = lambda: released.wait(5) and purge()
+        # The stop arrives while the worker is still purging before the triggered read.
+        scope_interface.set_scope_action(ScopeAction.TRIGGER)
+        scope_interface.stop_trigger()
+        released.set()
+        self.assertTrue(scope_interface.wait_for_action(2))
+        self.assertEqual(scope_interface.last_outcome, ReadOutcome.STOPPED)
+        # A stop while idle does not end the next capture.
+        scope_interface.stop_trigger()
+        scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+        self.assertTrue(scope_interface.wait_for_action(2))
+        self.assertEqual(scope_interface.last_outcome, ReadOutcome.COMPLETE)
+
+    def test_calibration_round_trip(self):
+        offsets = [0.5, -0.25, 0.125, -1]
+        ns1 = self.start(SignalSpec())
+        self.emulator.calibration_codes = encode_calibration(offsets)
+        self.assertTrue(ns1.read_calibration_offsets())
+        self.assertEqual(list(ns1._cal_offsets.values()), offsets)
+        ns1.serial_port.write(NS1.SET_CAL_COMMAND)
+        ns1.serial_port.write(bytes(ns1._encode_calibration_offsets() + '\0', 'utf-8'))
+        ns1.get_scope_force_trigger_data(self.FULL_SCALE)
+        self.assertEqual(decode_calibration(self.emulator.calibration_codes), offsets)
+
+    def test_offset_error_is_nulled_by_calibration(self):
+        ns1 = self.start(SignalSpec(SignalShape.DC, amplitude=0), EmulatorSettings(offset_errors={(True, False): 0.5}))
+        self.assertAlmostEqual(np.mean(ns1.get_scope_force_trigger_data(self.FULL_SCALE)), 0.5, delta=0.05)
+        ns1.set_calibration_offsets(self.FULL_SCALE)
+        self.assertAlmostEqual(np.mean(ns1.get_scope_force_trigger_data(self.FULL_SCALE)), 0, delta=0.05)
+
+    def test_calibration_nulls_every_vertical_setting(self):
+        offset_errors = {(True, False): 0.5, (True, True): -0.2, (False, False): 0.1, (False, True): -0.05}
+        ns1 = self.start(SignalSpec(SignalShape.DC, amplitude=0, noise=0.02), EmulatorSettings(offset_errors=offset_errors))
+        report = ns1.set_calibration_offsets(self.FULL_SCALE)
+        self.assertTrue(report.converged)
+        self.assertEqual([setting.setting for setting in report.settings], [key for key, _ in NS1.CALIBRATION_SETTINGS])
+        for _, full_scale in NS1.CALIBRATION_SETTINGS:
+            ns1.set_range(full_scale)
+            ns1.set_amplifier_gain(full_scale)
+            self.assertAlmostEqual(np.mean(ns1.get_scope_force_trigger_data(full_scale)), 0, delta=0.01*full_scale)
+        # The captures above follow the calibration write, so the emulator has stored it.
+        self.assertEqual(self.emulator.calibration_codes, 
+                         encode_calibration([ns1.calibration_offsets[key] for key, _ in NS1.CALIBRATION_SETTINGS]))
+
+    def test_gain_calibration_with_a_reference(self):
+        settings = EmulatorSettings(offset_errors={(False, False): 0.1}, gain_errors={(False, False): 1.1})
+        ns1 = self.start(SignalSpec(SignalShape.DC, amplitude=0, noise=0.01), settings)
+        ns1.set_calibration_offsets(self.FULL_SCALE)
+        self.emulator.generator.spec.amplitude = 1
+        report = ns1.set_gain_calibration(1, self.FULL_SCALE)
+        # The one volt reference does not fit the one volt full scale.
+        self.assertEqual([setting.setting for setting in report.settings], ['range_high', 'range_high_gain', 'range_low'])
+        self.assertAlmostEqual(ns1.calibration_gains['range_low'], 1/1.1, delta=0.01)
+        self.assertEqual(ns1.calibration_gains['range_low_gain'], 1)
+        ns1.set_range(2)
+        ns1.set_amplifier_gain(2)
+        self.assertAlmostEqual(np.mean(ns1.get_scope_force_trigger_data(2)), 1, delta=0.02)
+
+    def test_unchanged_settings_are_not_sent(self):
+        ns1 = self.start(SignalSpec(SignalShape.DC, amplitude=0))
+        ns1.set_clock_div(4)
+        ns1.set_trigger_voltage(0.5, self.FULL_SCALE)
+        ns1.set_rising_edge_trigger()
+        ns1.enable_signal_trigger()
+        # The emulator handles commands in order, so a capture shows every earlier command has arrived.
+        ns1.get_scope_force_trigger_data(self.FULL_SCALE)
+        sent = len(self.emulator.commands)
+        ns1.set_range(self.FULL_SCALE)
+        ns1.set_amplifier_gain(self.FULL_SCALE)
+        ns1.set_clock_div(4)
+        ns1.set_trigger_voltage(0.5, self.FULL_SCALE)
+        ns1.set_rising_edge_trigger()
+        ns1.enable_signal_trigger()
+        ns1.get_scope_force_trigger_data(self.FULL_SCALE)
+        self.assertEqual(self.emulator.commands[sent:], [NS1.FORCE_TRIGGER_COMMAND])
+        # From 10 V to 5 V full scale only the amplifier gain changes.
+        ns1.set_range(5)
+        ns1.set_amplifier_gain(5)
+        ns1.set_falling_edge_trigger()
+        ns1.get_scope_force_trigger_data(5)
+        self.assertEqual(self.emulator.commands[sent + 1:], [NS1.AMPLIFIER_GAIN_COMMAND, NS1.FALLING_EDGE_TRIGGER_COMMAND, 
+                                                             NS1.FORCE_TRIGGER_COMMAND])
+        self.assertEqual(ns1.device_state.clock_div, 4)
+        ns1.invalidate_device_state()
+        self.assertIsNone(ns1.device_state.high_range)
+
+    def test_capture_keeps_the_codes(self):
+        ns1 = self.start(SignalSpec(SignalShape.DC, amplitude=1))
+        capture = ns1.get_scope_force_trigger_capture(self.FULL_SCALE)
+        self.assertFalse(capture.converted)
+        self.assertEqual(capture.codes.dtype, np.uint8)
+        self.assertEqual(capture.settings.clock_div, 1)
+        self.assertEqual(np.argmax(capture.code_histogram()), int(np.median(capture.codes)))
+        self.assertAlmostEqual(np.mean(capture.volts), 1, delta=0.05)
+
+    def test_history_frame_matches_the_capture(self):
+        self.emulator = NS1Emulator(SignalSpec(SignalShape.SINE, frequency=100e3, amplitude=2), 
+                                    EmulatorSettings(offset_errors={(True, False): 0.3}))
+        self.emulator.start()
+        self.addCleanup(self.emulator.close)
+        scope_interface = ScopeInterface(NS1, device=self.emulator.port)
+        self.addCleanup(scope_interface.close)
+        for action in (ScopeAction.CONNECT, ScopeAction.READ_CAL_OFFSETS, ScopeAction.FORCE_TRIGGER):
+            scope_interface.set_scope_action(action)
+            scope_interface.wait_for_action(5)
+        # The display converts the held capture once it takes it.
+        self.assertFalse(scope_interface.take_capture().converted)
+        frame = scope_interface.history.get(scope_interface.history.newest)
+        self.assertEqual(frame.capture.codes.dtype, np.uint8)
+        self.assertEqual(frame.capture.settings.clock_div, 1)
+        self.assertTrue(frame.capture.settings.high_range)
+        np.testing.assert_allclose(frame.capture.volts, scope_interface.latest_capture())
+        # Later calibration changes do not change a stored frame.
+        scope_interface.scope.load_calibration_offsets({'range_high': 1, 'range_high_gain': 0, 'range_low': 0, 
+                                                        'range_low_gain': 0})
+        np.testing.assert_allclose(frame.capture.volts, scope_interface.xx)
+
+    def test_recorded_captures_match_the_history(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.emulator = NS1Emulator(SignalSpec(SignalShape.SINE, frequency=100e3, amplitude=2))
+        self.emulator.start()
+        self.addCleanup(self.emulator.close)
+        scope_interface = ScopeInterface(NS1, device=self.emulator.port)
+        self.addCleanup(scope_interface.close)
+        recorder = Recorder(os.path.join(directory.name, 'scope0'), NS1.SCOPE_SPECS['memory_depth'])
+        recorder.start()
+        scope_interface.set_recorder(recorder)
+        for action in (ScopeAction.CONNECT, ScopeAction.FORCE_TRIGGER, ScopeAction.FORCE_TRIGGER):
+            scope_interface.set_scope_action(action)
+            scope_interface.wait_for_action(5)
+        scope_interface.set_recorder(None)
+        self.assertEqual(recorder.stop(5).written, 2)
+        frames = list(read_recording(recorder.directory))
+        frame = scope_interface.history.get(scope_interface.history.newest)
+        np.testing.assert_array_equal(frames[-1].capture.codes, frame.capture.codes)
+        self.assertEqual(frames[-1].capture.settings, frame.capture.settings)
+        np.testing.assert_allclose(frames[-1].capture.volts, scope_interface.latest_capture())
+
+    def test_throughput_limit(self):
+        ns1 = self.start(SignalSpec(), EmulatorSettings(throughput=NS1.SCOPE_SPECS['memory_depth']/0.2))
+        start = time.perf_counter()
+        ns1.get_scope_force_trigger_data(self.FULL_SCALE)
+        self.assertGreater(time.perf_counter() - start, 0.15)
+
+    def test_glitches(self):
+        ns1 = self.start(SignalSpec(SignalShape.DC, amplitude=0, glitch_rate=1e5, glitch_amplitude=3))
+        ns1.set_filter(NO_FILTER)
+        self.assertGreater(ns1.get_scope_force_trigger_data(self.FULL_SCALE).max(), 2)
+
+    def test_session_over_emulator(self):
+        self.emulator = NS1Emulator(SignalSpec(SignalShape.SINE, frequency=10e3))
+        with self.emulator, Session('NS1', port=self.emulator.port) as session:
+            session.set_timebase(100e-6)
+            waveforms = [waveform.sequence for waveform in session.iter_captures(3)]
+        self.assertEqual(waveforms, [1, 2, 3])
+
+    def test_session_calibrate(self):
+        self.emulator = NS1Emulator(SignalSpec(SignalShape.DC, amplitude=0), EmulatorSettings(offset_errors={(True, False): 0.3}))
+        with self.emulator, Session('NS1', port=self.emulator.port) as session:
+            session.set_vertical(2)
+            report = session.calibrate()
+            self.assertTrue(report.converged)
+            self.assertEqual(session.vertical, 2)
+            self.assertAlmostEqual(np.mean(session.capture().volts), 0, delta=0.1)
+
+class TestNS0Emulator(unittest.TestCase):
+    def test_force_trigger(self):
+        with NS0Emulator(SignalSpec(SignalShape.DC, amplitude=1.65)) as emulator:
+            ns0 = NS0(port=emulator.port)
+            ns0.connect()
+            xx = ns0.get_scope_force_trigger_data(3.3)
+        self.assertEqual(len(xx), NS0.SCOPE_SPECS['memory_depth'])
+        self.assertAlmostEqual(np.mean(xx), 1.65, delta=0.02)
+
+if __name__ == '__main__':
+    unittest.main()
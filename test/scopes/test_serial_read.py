@@ -0,0 +1,38 @@
+import unittest
+from threading import Event, Timer
+from time import sleep, monotonic
+
+from voltpeek.scopes.serial_read import read_exact
+
+from test.scopes.serial_mock import SerialMock
+
+class IdleSerialMock:
+    POLL_INTERVAL: float = 0.01
+
+    def __init__(self): self.reads = 0
+
+    def readinto(self, buffer) -> int:
+        self.reads += 1
+        sleep(self.POLL_INTERVAL)
+        return 0
+
+class TestSerialRead(unittest.TestCase):
+    def test_read_exact_fills_buffer(self):
+        buffer = bytearray(100)
+        self.assertEqual(read_exact(SerialMock(), memoryview(buffer)), 100)
+        self.assertEqual(buffer, bytes([SerialMock.SCOPE_CODE for _ in range(0, 100)]))
+
+    def test_read_exact_returns_partial_count_on_timeout(self):
+        serial_port = IdleSerialMock()
+        start = monotonic()
+        self.assertEqual(read_exact(serial_port, memoryview(bytearray(10)), timeout=0.05), 0)
+        self.assertLess(monotonic() - start, 0.5)
+        # Every read blocks so waiting for data does not spin.
+        self.assertLess(serial_port.reads, 10)
+
+    def test_read_exact_stops_when_stop_is_set(self):
+        stop = Event()
+        Timer(0.05, stop.set).start()
+        start = monotonic()
+        self.assertEqual(read_exact(IdleSerialMock(), memoryview(bytearray(10)), stop), 0)
+        self.assertLess(monotonic() - start, 0.5)
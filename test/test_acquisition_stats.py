@@ -0,0 +1,58 @@
+import sys
+sys.path.append('..')
+
+import unittest
+
+from voltpeek.acquisition_stats import AcquisitionStats
+from voltpeek.scopes.scope_base import ReadOutcome
+
+class TestAcquisitionStats(unittest.TestCase):
+    def setUp(self): self.stats = AcquisitionStats(window_length=10)
+
+    def test_empty_snapshot(self):
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot.captures, 0)
+        self.assertIsNone(snapshot.capture_rate)
+        self.assertIsNone(snapshot.dead_time)
+
+    def test_rate_and_dead_time(self):
+        # A capture every 20 ms, each arriving 5 ms after the scope was armed
+        for i in range(0, 6):
+            self.stats.record(ReadOutcome.COMPLETE, i*0.02 - 0.005, i*0.02)
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot.captures, 6)
+        self.assertAlmostEqual(snapshot.capture_rate, 50)
+        self.assertAlmostEqual(snapshot.dead_time, 0.005)
+
+    def test_failed_captures_are_counted_but_not_timed(self):
+        self.stats.record(ReadOutcome.COMPLETE, 0, 0.001)
+        self.stats.record(ReadOutcome.INCOMPLETE, 0.001, 2)
+        self.stats.record(ReadOutcome.TIMEOUT, 2, 4)
+        self.stats.record(ReadOutcome.STOPPED, 4, 5)
+        self.stats.record(ReadOutcome.ERROR, 5, 5)
+        snapshot = self.stats.snapshot()
+        self.assertEqual((snapshot.captures, snapshot.incomplete, snapshot.timeouts, snapshot.stops, snapshot.errors), 
+                         (1, 1, 1, 1, 1))
+        self.assertIsNone(snapshot.capture_rate)
+        self.assertAlmostEqual(snapshot.dead_time, 0.001)
+
+    def test_window_keeps_the_most_recent_captures(self):
+        for i in range(0, 10):
+            self.stats.record(ReadOutcome.COMPLETE, i - 0.5, i)
+        for i in range(10, 20):
+            self.stats.record(ReadOutcome.COMPLETE, i*2 - 0.1, i*2)
+        snapshot = self.stats.snapshot()
+        self.assertAlmostEqual(snapshot.capture_rate, 0.5)
+        self.assertAlmostEqual(snapshot.dead_time, 0.1)
+        self.assertEqual(snapshot.captures, 20)
+
+    def test_reset(self):
+        self.stats.record(ReadOutcome.COMPLETE, 0, 1)
+        self.stats.record(ReadOutcome.TIMEOUT, 1, 2)
+        self.stats.reset()
+        snapshot = self.stats.snapshot()
+        self.assertEqual((snapshot.captures, snapshot.timeouts), (0, 0))
+        self.assertIsNone(snapshot.dead_time)
+
+if __name__ == '__main__':
+    unittest.main()
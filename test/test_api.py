@@ -0,0 +1,113 @@
+import sys
+sys.path.append('..')
+
+import subprocess
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from voltpeek.api import Session
+from voltpeek.scopes.NS1 import NS1
+from voltpeek.trigger import EdgeType
+
+from test.scopes.serial_mock import SerialMock
+
+class TestSession(unittest.TestCase):
+    PORT = '/dev/ttyMOCK'
+
+    def setUp(self):
+        # voltpeek.scopes.NS1 resolves to the class, so the driver module is patched through sys.modules.
+        serial_patch = patch.object(sys.modules['voltpeek.scopes.NS1'], 'Serial', new=SerialMock)
+        serial_patch.start()
+        self.addCleanup(serial_patch.stop)
+        self.session = Session('NS1', port=self.PORT)
+        self.session.connect()
+
+    def tearDown(self): self.session.close()
+
+    def test_unknown_scope(self):
+        with self.assertRaises(ValueError):
+            Session('NS9')
+
+    def test_connect_applies_default_settings(self):
+        self.assertIsInstance(self.session.scope, NS1)
+        self.assertEqual(self.session.scope.port, self.PORT)
+        self.assertEqual(self.session.timebase, 1e-3)
+        self.assertEqual(self.session.fs, self.session.scope.fs)
+
+    def test_capture(self):
+        waveform = self.session.capture()
+        self.assertEqual(len(waveform.volts), NS1.SCOPE_SPECS['memory_depth'] - (NS1.FIR_LENGTH - 1))
+        # The mock serves one code, the calibration offsets read from it shift the level.
+        np.testing.assert_allclose(waveform.volts, waveform.volts[0])
+        self.assertEqual(waveform.sequence, 1)
+        self.assertFalse(waveform.triggered)
+        self.assertEqual(waveform.fs, self.session.fs)
+        self.assertEqual(len(waveform.times), len(waveform.volts))
+        self.assertEqual(waveform.times[len(waveform.volts)//2], 0)
+        self.assertEqual(len(waveform.codes), NS1.SCOPE_SPECS['memory_depth'])
+        self.assertEqual(len(np.unique(waveform.codes)), 1)
+
+    def test_captures_are_independent_arrays(self):
+        waveforms = list(self.session.captures(4))
+        self.assertEqual([waveform.sequence for waveform in waveforms], [1, 2, 3, 4])
+        self.assertEqual(len({id(waveform.volts) for waveform in waveforms}), 4)
+        self.assertTrue(all(first.time <= second.time for first, second in zip(waveforms, waveforms[1:])))
+
+    def test_triggered_capture(self):
+        self.assertTrue(self.session.capture(triggered=True, timeout=1).triggered)
+
+    def test_set_timebase_changes_sample_rate(self):
+        self.session.set_timebase(10e-3)
+        self.assertEqual(self.session.timebase, 10e-3)
+        self.assertEqual(self.session.fs, self.session.scope.fs)
+        self.assertLess(self.session.fs, NS1.SCOPE_SPECS['sample_rate'])
+
+    def test_set_vertical(self):
+        self.session.set_vertical(self.session.verticals[0])
+        self.assertEqual(self.session.vertical, self.session.verticals[0])
+        with self.assertRaises(ValueError):
+            self.session.set_vertical(3.3)
+
+    def test_set_trigger(self):
+        self.session.set_trigger(0.5, EdgeType.FALLING_EDGE)
+        with self.assertRaises(ValueError):
+            self.session.set_timebase(3e-3)
+
+    def test_iter_captures(self):
+        waveforms = [(waveform.sequence, waveform.volts.copy()) for waveform in self.session.iter_captures(5)]
+        self.assertEqual([sequence for sequence, _ in waveforms], [1, 2, 3, 4, 5])
+        self.assertTrue(all(len(volts) == NS1.SCOPE_SPECS['memory_depth'] - (NS1.FIR_LENGTH - 1) for _, volts in waveforms))
+        # The session is usable again once the stream is closed.
+        self.assertEqual(self.session.capture().sequence, 1)
+
+    def test_iter_captures_normal_mode(self):
+        for waveform in self.session.iter_captures(2, mode='normal'):
+            self.assertTrue(waveform.triggered)
+
+    def test_iter_captures_reuses_buffers(self):
+        bases = {id(waveform.volts.base) for waveform in self.session.iter_captures(10, buffer_count=2)}
+        self.assertEqual(len(bases), 1)
+
+    def test_iter_captures_drop_newest_reports_drops(self):
+        last = None
+        for waveform in self.session.iter_captures(4, policy='drop_newest', buffer_count=2):
+            time.sleep(0.05)
+            last = waveform
+        self.assertGreater(last.dropped, 0)
+        self.assertGreater(last.sequence, 4)
+
+    def test_iter_captures_rejects_unknown_settings(self):
+        with self.assertRaises(ValueError):
+            next(self.session.iter_captures(mode='single'))
+        with self.assertRaises(ValueError):
+            next(self.session.iter_captures(policy='grow'))
+
+    def test_api_does_not_import_tk(self):
+        check = "import sys, voltpeek.api; sys.exit(any(m.split('.')[0] in ('tkinter', 'PIL') for m in sys.modules))"
+        self.assertEqual(subprocess.run([sys.executable, '-c', check]).returncode, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import sys
+sys.path.append('..')
+
+import unittest
+
+import numpy as np
+
+from voltpeek.calibration import AveragingCalibrator, CalibrationReport, SettingCalibration
+
+class FakeInput:
+    '''Captures of a DC level with gaussian noise, the first settle_captures are still moving towards it.'''
+    def __init__(self, level: float, noise: float=0, settle_captures: int=0, length: int=1000) -> None:
+        self._rng = np.random.default_rng(0)
+        self.level = level
+        self.noise = noise
+        self.settle_captures = settle_captures
+        self.length = length
+        self.captures = 0
+
+    def __call__(self):
+        self.captures += 1
+        level = self.level + (1 if self.captures <= self.settle_captures else 0)*(self.settle_captures - self.captures + 1)
+        return level + self._rng.normal(0, self.noise, self.length) if self.noise > 0 else np.full(self.length, level)
+
+class TestAveragingCalibrator(unittest.TestCase):
+    def test_noise_free_input_converges_at_the_minimum(self):
+        result = AveragingCalibrator().measure('range_high', 10, FakeInput(0.25))
+        self.assertTrue(result.converged)
+        self.assertEqual(result.captures, AveragingCalibrator.MIN_CAPTURES)
+        self.assertAlmostEqual(result.mean, 0.25)
+        self.assertAlmostEqual(result.noise, 0)
+
+    def test_settling_captures_are_discarded(self):
+        fake_input = FakeInput(0.1, settle_captures=3)
+        result = AveragingCalibrator().measure('range_low', 2, fake_input)
+        self.assertAlmostEqual(result.mean, 0.1)
+        self.assertEqual(fake_input.captures, 3 + 2 + AveragingCalibrator.MIN_CAPTURES - 1)
+
+    def test_noise_is_averaged(self):
+        result = AveragingCalibrator().measure('range_low', 2, FakeInput(-0.05, noise=0.01))
+        self.assertTrue(result.converged)
+        self.assertAlmostEqual(result.mean, -0.05, delta=1e-3)
+        self.assertAlmostEqual(result.noise, 0.01, delta=1e-3)
+
+    def test_stops_after_max_captures(self):
+        fake_input = FakeInput(0, noise=1, length=10)
+        result = AveragingCalibrator(max_captures=8).measure('range_high', 10, fake_input)
+        self.assertFalse(result.converged)
+        self.assertEqual(result.captures, 8)
+        self.assertLessEqual(fake_input.captures, 8 + AveragingCalibrator.MAX_SETTLE_CAPTURES)
+
+    def test_failed_captures(self):
+        result = AveragingCalibrator(max_captures=4).measure('range_high', 10, lambda: np.array([]))
+        self.assertFalse(result.converged)
+        self.assertEqual(result.captures, 0)
+
+    def test_invalid_capture_counts(self):
+        with self.assertRaises(ValueError):
+            AveragingCalibrator(min_captures=1)
+        with self.assertRaises(ValueError):
+            AveragingCalibrator(min_captures=4, max_captures=3)
+
+class TestCalibrationReport(unittest.TestCase):
+    def test_converged_and_describe(self):
+        report = CalibrationReport((SettingCalibration('range_high', 10, 0.012, 0.003, 3, True),
+                                    SettingCalibration('range_low', 2, -0.004, 0.001, 32, False, 1.02)), 1.5)
+        self.assertFalse(report.converged)
+        description = report.describe()
+        self.assertIn('range_high: mean 12.00 mV, noise 3.00 mVrms, 3 captures', description)
+        self.assertIn('gain 1.0200, did not converge', description)
+
+if __name__ == '__main__':
+    unittest.main()
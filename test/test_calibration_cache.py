@@ -0,0 +1,92 @@
+import sys
+sys.path.append('..')
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from voltpeek.calibration_cache import CalibrationCache, DeviceIdentity
+
+class TestCalibrationCache(unittest.TestCase):
+    OFFSETS = {'range_high': 0.12, 'range_high_gain': -0.05, 'range_low': 0.01, 'range_low_gain': 0.002}
+    IDENTITY = DeviceIdentity('E6614C311B4B6C2A', 'Board in FS mode', '/dev/ttyACM0')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'voltpeek', 'calibration.json')
+        self.cache = CalibrationCache(self.path)
+
+    def test_missing_file(self): self.assertIsNone(self.cache.load(self.IDENTITY))
+
+    def test_round_trip(self):
+        self.cache.store(self.IDENTITY, self.OFFSETS)
+        self.assertEqual(CalibrationCache(self.path).load(self.IDENTITY), self.OFFSETS)
+
+    def test_scopes_are_kept_apart(self):
+        other = DeviceIdentity('0000000000000001', self.IDENTITY.description, '/dev/ttyACM1')
+        other_offsets = {key: 0.0 for key in self.OFFSETS}
+        self.cache.store(self.IDENTITY, self.OFFSETS)
+        self.cache.store(other, other_offsets)
+        self.assertEqual(self.cache.load(self.IDENTITY), self.OFFSETS)
+        self.assertEqual(self.cache.load(other), other_offsets)
+
+    def test_another_port_still_matches(self):
+        self.cache.store(self.IDENTITY, self.OFFSETS)
+        moved = DeviceIdentity(self.IDENTITY.serial_number, self.IDENTITY.description, '/dev/ttyACM3')
+        self.assertEqual(self.cache.load(moved), self.OFFSETS)
+
+    def test_new_firmware_description_misses(self):
+        self.cache.store(self.IDENTITY, self.OFFSETS)
+        updated = DeviceIdentity(self.IDENTITY.serial_number, 'NS1 v2', self.IDENTITY.port)
+        self.assertIsNone(self.cache.load(updated))
+
+    def test_old_entries_expire(self):
+        with patch('voltpeek.calibration_cache.time', return_value=1000):
+            self.cache.store(self.IDENTITY, self.OFFSETS)
+        with patch('voltpeek.calibration_cache.time', return_value=1000 + CalibrationCache.MAX_AGE + 1):
+            self.assertIsNone(self.cache.load(self.IDENTITY))
+
+    def test_invalidate_one_scope(self):
+        other = DeviceIdentity('0000000000000001', self.IDENTITY.description, '/dev/ttyACM1')
+        self.cache.store(self.IDENTITY, self.OFFSETS)
+        self.cache.store(other, self.OFFSETS)
+        self.cache.invalidate(self.IDENTITY.serial_number)
+        self.assertIsNone(self.cache.load(self.IDENTITY))
+        self.assertEqual(self.cache.load(other), self.OFFSETS)
+
+    def test_invalidate_every_scope(self):
+        self.cache.store(self.IDENTITY, self.OFFSETS)
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.load(self.IDENTITY))
+
+    def test_gains_outlive_the_offsets(self):
+        gains = {key: 1.01 for key in self.OFFSETS}
+        with patch('voltpeek.calibration_cache.time', return_value=1000):
+            self.cache.store(self.IDENTITY, self.OFFSETS, gains)
+        with patch('voltpeek.calibration_cache.time', return_value=1000 + CalibrationCache.MAX_AGE + 1):
+            self.assertIsNone(self.cache.load(self.IDENTITY))
+            self.assertEqual(self.cache.load_gains(self.IDENTITY), gains)
+        self.cache.invalidate(self.IDENTITY.serial_number)
+        self.assertIsNone(self.cache.load(self.IDENTITY))
+        self.assertEqual(self.cache.load_gains(self.IDENTITY), gains)
+        self.cache.invalidate()
+        self.assertEqual(self.cache.load_gains(self.IDENTITY), gains)
+        # Offsets read again from the scope keep the stored gains.
+        self.cache.store(self.IDENTITY, self.OFFSETS)
+        self.assertEqual(self.cache.load(self.IDENTITY), self.OFFSETS)
+        self.assertEqual(self.cache.load_gains(self.IDENTITY), gains)
+
+    def test_corrupt_file_is_ignored(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as cache_file:
+            cache_file.write('{not json')
+        self.assertIsNone(self.cache.load(self.IDENTITY))
+        self.cache.store(self.IDENTITY, self.OFFSETS)
+        with open(self.path) as cache_file:
+            self.assertEqual(json.load(cache_file)['version'], CalibrationCache.VERSION)
+
+if __name__ == '__main__':
+    unittest.main()
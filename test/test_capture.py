@@ -0,0 +1,61 @@
+import sys
+sys.path.append('..')
+
+import unittest
+
+import numpy as np
+
+from voltpeek.capture import Capture, CaptureSettings
+from voltpeek.filters import NO_FILTER, FilterSpec, FilterType, apply_filter
+
+def settings(fir_filter: FilterSpec=NO_FILTER) -> CaptureSettings:
+    # Half a volt per code around code 128, with a 10 mV offset and a 2 % gain correction
+    return CaptureSettings(10, True, False, 1, 62.5e6, fir_filter, 0.5, 128, 0.01, 1.02)
+
+CODES = np.array([128, 130, 132, 134, 120], dtype=np.uint8)
+
+class TestCapture(unittest.TestCase):
+    def test_volts(self):
+        np.testing.assert_allclose(Capture(CODES, settings()).volts, 
+                                   ((CODES.astype(float) - 128)*0.5 + 0.01)*1.02)
+
+    def test_filtered_volts(self):
+        unfiltered = Capture(CODES, settings()).volts
+        for fir_filter in (FilterSpec(FilterType.BOXCAR, 3), FilterSpec(FilterType.SINC, 3)):
+            capture = Capture(CODES, settings(fir_filter))
+            self.assertEqual(len(capture), 3)
+            np.testing.assert_allclose(capture.volts, apply_filter(unfiltered, fir_filter, 62.5e6))
+
+    def test_volts_are_converted_once(self):
+        capture = Capture(CODES, settings())
+        self.assertFalse(capture.converted)
+        self.assertEqual(len(capture), len(CODES))
+        self.assertFalse(capture.converted)
+        self.assertIs(capture.volts, capture.volts)
+        self.assertTrue(capture.converted)
+
+    def test_from_volts(self):
+        capture = Capture.from_volts([1, 2, 3])
+        self.assertIsNone(capture.codes)
+        self.assertEqual(len(capture), 3)
+        self.assertEqual(capture.nbytes, 24)
+        with self.assertRaises(ValueError):
+            capture.code_histogram()
+
+    def test_copy_owns_its_codes(self):
+        codes = CODES.copy()
+        capture = Capture(codes, settings())
+        copy = capture.copy()
+        codes[:] = 0
+        np.testing.assert_array_equal(copy.codes, CODES)
+        self.assertEqual(copy.settings, capture.settings)
+        self.assertEqual(copy.nbytes, len(CODES))
+
+    def test_code_histogram(self):
+        histogram = Capture(CODES, settings()).code_histogram()
+        self.assertEqual(len(histogram), 256)
+        self.assertEqual(histogram[128], 1)
+        self.assertEqual(histogram.sum(), len(CODES))
+
+if __name__ == '__main__':
+    unittest.main()
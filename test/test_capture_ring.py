@@ -0,0 +1,89 @@
+import unittest
+from time import perf_counter
+
+import numpy as np
+
+from voltpeek.capture_ring import CaptureRing
+
+class TestCaptureRing(unittest.TestCase):
+    def setUp(self): self.ring = CaptureRing(3)
+
+    def test_ring_needs_two_slots(self):
+        with self.assertRaises(ValueError):
+            CaptureRing(1)
+
+    def test_take_latest_is_none_before_any_capture(self):
+        self.assertIsNone(self.ring.take_latest())
+        self.assertIsNone(self.ring.held)
+
+    def test_take_latest_returns_published_capture(self):
+        self.ring.publish(np.array([1.0, 2.0, 3.0]))
+        np.testing.assert_array_equal(self.ring.take_latest(), [1.0, 2.0, 3.0])
+        np.testing.assert_array_equal(self.ring.held, [1.0, 2.0, 3.0])
+
+    def test_held_time_is_publish_time(self):
+        self.assertIsNone(self.ring.held_time)
+        before = perf_counter()
+        self.ring.publish(np.array([1.0]))
+        self.ring.take_latest()
+        self.assertGreaterEqual(self.ring.held_time, before)
+        self.assertLessEqual(self.ring.held_time, perf_counter())
+
+    def test_has_newest_until_taken(self):
+        self.assertFalse(self.ring.has_newest)
+        self.ring.publish(np.array([1.0]))
+        self.assertTrue(self.ring.has_newest)
+        self.ring.take_latest()
+        self.assertFalse(self.ring.has_newest)
+
+    def test_stale_captures_are_dropped(self):
+        self.ring.publish(np.array([1.0]))
+        self.ring.publish(np.array([2.0]))
+        self.ring.publish(np.array([3.0]))
+        np.testing.assert_array_equal(self.ring.take_latest(), [3.0])
+        self.assertEqual(self.ring.dropped, 2)
+
+    def test_held_capture_is_not_overwritten(self):
+        self.ring.publish(np.array([1.0]))
+        held = self.ring.take_latest()
+        for value in range(2, 10):
+            self.assertTrue(self.ring.publish(np.array([float(value)])))
+        np.testing.assert_array_equal(held, [1.0])
+        np.testing.assert_array_equal(self.ring.take_latest(), [9.0])
+
+    def test_take_latest_keeps_held_capture_without_new_capture(self):
+        self.ring.publish(np.array([1.0]))
+        first = self.ring.take_latest()
+        self.assertIs(self.ring.take_latest().base, first.base)
+
+    def test_two_slot_ring_drops_new_capture_when_full(self):
+        ring = CaptureRing(2)
+        ring.publish(np.array([1.0]))
+        ring.take_latest()
+        ring.publish(np.array([2.0]))
+        self.assertFalse(ring.has_free_slot)
+        self.assertFalse(ring.publish(np.array([3.0])))
+        np.testing.assert_array_equal(ring.take_latest(), [2.0])
+
+    def test_buffers_are_reused(self):
+        self.ring.publish(np.zeros(10))
+        first = self.ring.take_latest()
+        self.ring.publish(np.zeros(10))
+        self.ring.publish(np.zeros(10))
+        self.ring.take_latest()
+        self.ring.publish(np.zeros(10))
+        self.assertIs(self.ring.take_latest().base, first.base)
+
+    def test_shorter_capture_uses_part_of_the_buffer(self):
+        self.ring.publish(np.zeros(10))
+        self.ring.take_latest()
+        self.ring.publish(np.ones(4))
+        self.assertEqual(len(self.ring.take_latest()), 4)
+
+    def test_metadata_follows_the_capture(self):
+        self.assertIsNone(self.ring.held_metadata)
+        self.ring.publish(np.zeros(4, dtype=np.uint8), 'first')
+        self.ring.publish(np.ones(4, dtype=np.uint8), 'second')
+        held = self.ring.take_latest()
+        self.assertEqual(held.dtype, np.uint8)
+        self.assertEqual(self.ring.held_metadata, 'second')
@@ -0,0 +1,97 @@
+import sys
+sys.path.append('..')
+
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from voltpeek.capture_stream import BackPressure, CaptureStream
+
+class TestCaptureStream(unittest.TestCase):
+    SLOT_COUNT = 3
+    LENGTH = 8
+
+    def capture(self, value: float): return np.full(self.LENGTH, value)
+
+    def fill(self, stream: CaptureStream, count: int) -> list[bool]:
+        return [stream.publish(self.capture(i), float(i)) for i in range(1, count+1)]
+
+    def test_needs_two_slots(self):
+        with self.assertRaises(ValueError):
+            CaptureStream(1, self.LENGTH, BackPressure.BLOCK)
+
+    def test_captures_are_taken_in_order(self):
+        stream = CaptureStream(self.SLOT_COUNT, self.LENGTH, BackPressure.BLOCK)
+        self.fill(stream, 2)
+        first, second = stream.take(), stream.take()
+        self.assertEqual((first.sequence, second.sequence), (1, 2))
+        self.assertEqual(second.data[0], 2)
+        self.assertEqual(second.time, 2)
+
+    def test_take_returns_views_of_preallocated_buffers(self):
+        stream = CaptureStream(2, self.LENGTH, BackPressure.BLOCK)
+        bases = set()
+        for i in range(0, 6):
+            stream.publish(self.capture(i), i)
+            bases.add(id(stream.take().data.base))
+        self.assertEqual(len(bases), 1)
+
+    def test_shorter_capture(self):
+        stream = CaptureStream(self.SLOT_COUNT, self.LENGTH, BackPressure.BLOCK)
+        stream.publish(np.ones(self.LENGTH - 2), 0)
+        self.assertEqual(len(stream.take().data), self.LENGTH - 2)
+        with self.assertRaises(ValueError):
+            stream.publish(np.ones(self.LENGTH + 1), 0)
+
+    def test_drop_newest(self):
+        stream = CaptureStream(self.SLOT_COUNT, self.LENGTH, BackPressure.DROP_NEWEST)
+        self.assertEqual(self.fill(stream, 5), [True, True, True, False, False])
+        self.assertEqual(stream.dropped, 2)
+        self.assertEqual([stream.take().sequence for _ in range(0, 3)], [1, 2, 3])
+        stream.publish(self.capture(6), 6)
+        self.assertEqual(stream.take().sequence, 6)
+
+    def test_drop_oldest(self):
+        stream = CaptureStream(self.SLOT_COUNT, self.LENGTH, BackPressure.DROP_OLDEST)
+        self.assertTrue(all(self.fill(stream, 5)))
+        self.assertEqual(stream.dropped, 2)
+        capture = stream.take()
+        self.assertEqual(capture.sequence, 3)
+        self.assertEqual(capture.data[0], 3)
+        self.assertEqual(capture.dropped, 2)
+
+    def test_held_capture_is_never_overwritten(self):
+        stream = CaptureStream(2, self.LENGTH, BackPressure.DROP_OLDEST)
+        stream.publish(self.capture(1), 1)
+        held = stream.take()
+        self.fill(stream, 4)
+        self.assertEqual(held.data[0], 1)
+
+    def test_block_waits_for_consumer(self):
+        stream = CaptureStream(2, self.LENGTH, BackPressure.BLOCK)
+        self.fill(stream, 2)
+        self.assertFalse(stream.wait_for_space(timeout=0.01))
+        producer = threading.Thread(target=lambda: stream.publish(self.capture(3), 3))
+        producer.start()
+        time.sleep(0.05)
+        self.assertTrue(producer.is_alive())
+        stream.take()
+        stream.take()
+        producer.join(1)
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(stream.take().sequence, 3)
+        self.assertEqual(stream.dropped, 0)
+
+    def test_close_wakes_consumer(self):
+        stream = CaptureStream(2, self.LENGTH, BackPressure.BLOCK)
+        error = ConnectionError('gone')
+        threading.Timer(0.02, lambda: stream.close(error)).start()
+        self.assertIsNone(stream.take())
+        self.assertIs(stream.error, error)
+        stream.close()
+        self.assertIs(stream.error, error)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import sys
+sys.path.append('..')
+
+import unittest
+from enum import Enum
+from time import sleep
+
+from voltpeek import timing
+from voltpeek.event_scheduler import EventScheduler
+from voltpeek.timing import StageTimings
+
+class QueuedEvent(Enum):
+    CONNECT = 0
+    SET_RANGE = 1
+    SET_TRIGGER_LEVEL = 2
+    RISING_EDGE = 3
+    FALLING_EDGE = 4
+    AUTO_TRIGGER = 5
+    NORMAL_TRIGGER = 6
+
+PRIORITIES = {QueuedEvent.AUTO_TRIGGER: 1, QueuedEvent.NORMAL_TRIGGER: 1}
+GROUPS = {
+    QueuedEvent.SET_RANGE: 'range',
+    QueuedEvent.SET_TRIGGER_LEVEL: 'trigger level',
+    QueuedEvent.RISING_EDGE: 'edge',
+    QueuedEvent.FALLING_EDGE: 'edge',
+    QueuedEvent.AUTO_TRIGGER: 'trigger',
+    QueuedEvent.NORMAL_TRIGGER: 'trigger',
+}
+
+class TestEventScheduler(unittest.TestCase):
+    def setUp(self):
+        self.timings = StageTimings()
+        self.timings.enabled = True
+        self.scheduler = EventScheduler(PRIORITIES, GROUPS, self.timings)
+
+    def test_order_within_a_priority(self):
+        for event in (QueuedEvent.CONNECT, QueuedEvent.SET_RANGE, QueuedEvent.SET_TRIGGER_LEVEL):
+            self.scheduler.add(event)
+        self.assertEqual(len(self.scheduler), 3)
+        self.assertEqual([self.scheduler.pop() for _ in range(0, 3)], 
+                         [QueuedEvent.CONNECT, QueuedEvent.SET_RANGE, QueuedEvent.SET_TRIGGER_LEVEL])
+        self.assertIsNone(self.scheduler.peek())
+        with self.assertRaises(IndexError):
+            self.scheduler.pop()
+
+    def test_settings_go_before_trigger_cycles(self):
+        self.scheduler.add(QueuedEvent.AUTO_TRIGGER)
+        self.scheduler.add(QueuedEvent.SET_RANGE)
+        self.assertEqual(list(self.scheduler), [QueuedEvent.SET_RANGE, QueuedEvent.AUTO_TRIGGER])
+        self.assertEqual(self.scheduler.peek(), QueuedEvent.SET_RANGE)
+
+    def test_repeated_settings_are_coalesced_in_place(self):
+        for _ in range(0, 20):
+            self.scheduler.add(QueuedEvent.SET_RANGE)
+            self.scheduler.add(QueuedEvent.SET_TRIGGER_LEVEL)
+            self.scheduler.add(QueuedEvent.NORMAL_TRIGGER)
+        self.assertEqual(list(self.scheduler), 
+                         [QueuedEvent.SET_RANGE, QueuedEvent.SET_TRIGGER_LEVEL, QueuedEvent.NORMAL_TRIGGER])
+        self.assertEqual(self.scheduler.coalesced, 57)
+
+    def test_latest_event_of_a_group_wins(self):
+        self.scheduler.add(QueuedEvent.RISING_EDGE)
+        self.scheduler.add(QueuedEvent.SET_RANGE)
+        self.scheduler.add(QueuedEvent.FALLING_EDGE)
+        self.scheduler.add(QueuedEvent.AUTO_TRIGGER)
+        self.scheduler.add(QueuedEvent.NORMAL_TRIGGER)
+        self.assertEqual(list(self.scheduler), 
+                         [QueuedEvent.FALLING_EDGE, QueuedEvent.SET_RANGE, QueuedEvent.NORMAL_TRIGGER])
+
+    def test_events_without_a_group_are_not_coalesced(self):
+        self.scheduler.add(QueuedEvent.CONNECT)
+        self.scheduler.add(QueuedEvent.CONNECT)
+        self.assertEqual(len(self.scheduler), 2)
+
+    def test_records_the_wait_from_the_first_request(self):
+        self.scheduler.add(QueuedEvent.SET_RANGE)
+        sleep(0.01)
+        self.scheduler.add(QueuedEvent.SET_RANGE)
+        self.scheduler.pop()
+        self.assertGreaterEqual(self.timings.percentiles(timing.QUEUE_WAIT_PREFIX + 'SET_RANGE')[0], 0.01)
+        self.assertEqual(self.timings.count(timing.QUEUE_WAIT_PREFIX + 'SET_RANGE'), 1)
+
+    def test_clear(self):
+        self.scheduler.add(QueuedEvent.SET_RANGE)
+        self.scheduler.add(QueuedEvent.AUTO_TRIGGER)
+        self.scheduler.clear()
+        self.assertEqual(len(self.scheduler), 0)
+        self.scheduler.add(QueuedEvent.SET_RANGE)
+        self.assertEqual(self.scheduler.pop(), QueuedEvent.SET_RANGE)
+
+    def test_discard(self):
+        self.scheduler.add(QueuedEvent.SET_RANGE)
+        self.scheduler.add(QueuedEvent.NORMAL_TRIGGER)
+        self.scheduler.discard(QueuedEvent.NORMAL_TRIGGER)
+        self.scheduler.discard(QueuedEvent.AUTO_TRIGGER)
+        self.assertEqual(list(self.scheduler), [QueuedEvent.SET_RANGE])
+
+if __name__ == '__main__':
+    unittest.main()
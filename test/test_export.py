@@ -0,0 +1,23 @@
+import sys
+sys.path.append('..')
+
+import unittest
+
+import numpy as np
+
+from voltpeek.export import ExportSettings, render_png
+
+class TestExport(unittest.TestCase):
+    SIZE = 100
+
+    def test_render_png_uses_map(self):
+        map = np.zeros((self.SIZE, self.SIZE, 3), dtype=np.uint8)
+        map[80:, :] = (17, 176, 249)
+        settings = ExportSettings(vertical_setting=1, horizontal_setting=1e-3, probe_div=1, map=map, cursor_data={})
+        image = render_png(settings)
+        self.assertEqual(image.size, (self.SIZE, self.SIZE))
+        self.assertEqual(image.mode, 'RGB')
+        self.assertEqual(image.getpixel((50, 90)), (17, 176, 249))
+
+if __name__ == '__main__':
+    unittest.main()
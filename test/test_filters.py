@@ -0,0 +1,50 @@
+import sys
+sys.path.append('..')
+
+import unittest
+
+import numpy as np
+
+from voltpeek.filters import FilterSpec, FilterType, NO_FILTER, parse_filter, get_kernel, apply_filter, OVERLAP_ADD_LENGTH
+
+class TestFilters(unittest.TestCase):
+    FS = 62.5e6
+
+    def test_parse_filter(self):
+        self.assertEqual(parse_filter('none'), NO_FILTER)
+        self.assertEqual(parse_filter('boxcar:5'), FilterSpec(FilterType.BOXCAR, 5))
+        self.assertEqual(parse_filter('sinc:63'), FilterSpec(FilterType.SINC, 63))
+
+    def test_parse_filter_rejects_invalid_filters(self):
+        for filter_text in ('lowpass:3', 'boxcar', 'boxcar:0', 'sinc:abc', 'sinc:100000'):
+            with self.assertRaises(ValueError):
+                parse_filter(filter_text)
+
+    def test_filter_spec_str_round_trips(self):
+        for filter_text in ('none', 'boxcar:3', 'sinc:31'):
+            self.assertEqual(str(parse_filter(filter_text)), filter_text)
+
+    def test_kernels_are_cached(self):
+        self.assertIs(get_kernel(FilterType.SINC, 31, self.FS), get_kernel(FilterType.SINC, 31, self.FS))
+        self.assertFalse(get_kernel(FilterType.SINC, 31, self.FS).flags.writeable)
+
+    def test_sinc_kernel_has_unity_dc_gain(self):
+        for fs in (self.FS, 1e6):
+            self.assertAlmostEqual(np.sum(get_kernel(FilterType.SINC, 31, fs)), 1)
+
+    def test_boxcar_matches_convolution(self):
+        xx = np.random.default_rng(0).integers(0, 256, 1000, dtype=np.uint8)
+        for length in (1, 3, 100):
+            np.testing.assert_allclose(apply_filter(xx, FilterSpec(FilterType.BOXCAR, length), self.FS), 
+                                       np.convolve(xx, np.full(length, 1/length), mode='valid'))
+
+    def test_long_kernels_match_direct_convolution(self):
+        xx = np.random.default_rng(0).normal(size=4000)
+        fir_filter = FilterSpec(FilterType.SINC, OVERLAP_ADD_LENGTH + 1)
+        kernel = get_kernel(FilterType.SINC, fir_filter.length, self.FS)
+        np.testing.assert_allclose(apply_filter(xx, fir_filter, self.FS), np.convolve(xx, kernel, mode='valid'), atol=1e-12)
+
+    def test_filtered_length(self):
+        xx = np.zeros(16384)
+        for fir_filter in (NO_FILTER, FilterSpec(FilterType.BOXCAR, 7), FilterSpec(FilterType.SINC, 15), FilterSpec(FilterType.SINC, 255)):
+            self.assertEqual(len(apply_filter(xx, fir_filter, self.FS)), len(xx) - (fir_filter.length - 1))
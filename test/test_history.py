@@ -0,0 +1,81 @@
+import sys
+sys.path.append('..')
+
+import unittest
+
+import numpy as np
+
+from voltpeek.capture import Capture, CaptureSettings
+from voltpeek.filters import NO_FILTER
+from voltpeek.history import WaveformHistory
+
+SETTINGS = CaptureSettings(10, True, False, 1, 62.5e6, NO_FILTER, 0.5, 128, 0.01, 1)
+
+def capture(value: int) -> Capture: return Capture(np.full(100, value, dtype=np.uint8), SETTINGS)
+
+class TestWaveformHistory(unittest.TestCase):
+    def setUp(self):
+        # Room for four frames of 100 codes
+        self.history = WaveformHistory(400)
+
+    def add(self, value: int) -> int: return self.history.add(capture(value))
+
+    def test_frames_are_copied(self):
+        added = capture(0)
+        sequence = self.history.add(added, timestamp=12.5)
+        added.codes[:] = 7
+        frame = self.history.get(sequence)
+        self.assertEqual(frame.capture.codes.max(), 0)
+        self.assertEqual(frame.capture.settings, SETTINGS)
+        self.assertEqual(frame.timestamp, 12.5)
+        self.assertEqual(self.history.nbytes, 100)
+
+    def test_step_through_frames(self):
+        self.assertIsNone(self.history.newest)
+        sequences = [self.add(value) for value in range(0, 3)]
+        self.assertEqual(self.history.newest, sequences[-1])
+        self.assertEqual(self.history.previous(sequences[2]), sequences[1])
+        self.assertIsNone(self.history.previous(sequences[0]))
+        self.assertEqual(self.history.next(sequences[0]), sequences[1])
+        self.assertIsNone(self.history.next(sequences[2]))
+
+    def test_oldest_frames_are_evicted(self):
+        sequences = [self.add(value) for value in range(0, 6)]
+        self.assertEqual(len(self.history), 4)
+        self.assertEqual(self.history.evicted, 2)
+        self.assertLessEqual(self.history.nbytes, self.history.max_bytes)
+        self.assertIsNone(self.history.get(sequences[0]))
+        self.assertEqual(self.history.previous(sequences[2]), None)
+
+    def test_viewed_frame_outlives_older_frames(self):
+        sequences = [self.add(value) for value in range(0, 4)]
+        self.assertEqual(self.history.get(sequences[0]).capture.codes[0], 0)
+        self.add(4)
+        self.add(5)
+        self.assertIsNotNone(self.history.get(sequences[0]))
+        self.assertIsNone(self.history.get(sequences[1]))
+        # Stepping skips the evicted frames.
+        self.assertEqual(self.history.next(sequences[0]), sequences[3])
+
+    def test_newest_frame_is_kept(self):
+        history = WaveformHistory(50)
+        sequence = history.add(capture(0))
+        self.assertEqual(len(history), 1)
+        history.get(sequence)
+        history.add(capture(1))
+        self.assertEqual(len(history), 1)
+        self.assertIsNone(history.get(sequence))
+
+    def test_clear(self):
+        self.add(0)
+        self.history.clear()
+        self.assertEqual(len(self.history), 0)
+        self.assertEqual(self.history.nbytes, 0)
+        self.assertIsNone(self.history.newest)
+
+    def test_invalid_cap(self):
+        with self.assertRaises(ValueError):
+            WaveformHistory(0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,13 @@
+from threading import Event
+import time
 import unittest
+from unittest.mock import MagicMock, patch
 
+from voltpeek import interface
 from voltpeek.interface import UserInterface, Mode
+from voltpeek.scopes.NS1 import NS1
+
+from test.scopes.emulator import NS1Emulator, SignalSpec
 
 class TestUserInterface(unittest.TestCase):
     def setUp(self):
@@ -14,4 +21,128 @@ class TestUserInterface(unittest.TestCase):
         self.assertEqual(self.interface._calibration, False)
         self.assertEqual(self.interface._triggered, False)
         self.assertEqual(self.interface._scope_interfaces, [])
-        self.assertEqual(self.interface.mode, Mode.COMMAND)
\ No newline at end of file
+        self.assertEqual(self.interface.mode, Mode.COMMAND)
+
+class TestConnect(unittest.TestCase):
+    '''Connects the interface to an emulated NS1 and runs its start and end events, the Tk widgets are mocked.'''
+    def setUp(self):
+        self.emulator = NS1Emulator(SignalSpec())
+        self.emulator.start()
+        self.addCleanup(self.emulator.close)
+        port: str = self.emulator.port
+        class EmulatedNS1(NS1):
+            @classmethod
+            def find_scope_ports(cls) -> list[str]: return [port]
+        for name in ('tk', 'Scope_Display', 'CommandInput', 'Readout'):
+            patcher = patch.object(interface, name)
+            self.addCleanup(patcher.stop)
+            mock = patcher.start()
+            if name == 'tk':
+                mock.Tk.return_value.winfo_screenwidth.return_value = 800
+                mock.Tk.return_value.winfo_screenheight.return_value = 600
+        patcher = patch.object(interface, 'get_available_scopes', lambda: [{NS1.ID: EmulatedNS1}])
+        self.addCleanup(patcher.stop)
+        patcher.start()
+        self.interface = UserInterface()
+
+    def run_events(self) -> None:
+        for _ in range(0, 50):
+            self.interface.check_state()
+            for scope_interface in self.interface._scope_interfaces:
+                self.assertTrue(scope_interface.wait_for_action(5))
+            if all(len(queue) == 0 for queue in self.interface._start_event_queue + self.interface._end_event_queue):
+                return
+        self.fail('The scope events did not finish.')
+
+    def tearDown(self):
+        for scope_interface in self.interface._scope_interfaces:
+            scope_interface.close()
+
+    def test_connect(self):
+        self.interface.process_command(f'connect {NS1.ID}')
+        self.assertEqual(len(self.interface._scope_interfaces), 1)
+        self.assertEqual(list(self.interface._start_event_queue[0]),
+                         [interface.Event.CONNECT, interface.Event.SET_RANGE, interface.Event.SET_AMPLIFIER_GAIN,
+                          interface.Event.READ_CAL_OFFSETS])
+        self.run_events()
+        scope_interface = self.interface._scope_interfaces[0]
+        self.assertFalse(scope_interface.disconnected_error)
+        self.assertIsNotNone(scope_interface.calibration_ints)
+        self.assertFalse(self.interface.command_input.set_error.called)
+
+    def test_cal_reference_waits_for_a_busy_scope(self):
+        self.interface.process_command(f'connect {NS1.ID}')
+        scope = self.interface._scope_interfaces[0].scope
+        released = Event()
+        connect = scope.connect
+        scope.connect = lambda: released.wait(5) and connect()
+        calibrations = []
+        scope.set_calibration_offsets = lambda full_scale: calibrations.append(None) or MagicMock(converged=True)
+        scope.set_gain_calibration = lambda reference, full_scale: calibrations.append(reference) or MagicMock(converged=True)
+        # The cal command arrives while the scope is still connecting.
+        self.interface.check_state()
+        self.assertFalse(self.interface._scope_interfaces[0].data_available)
+        self.interface.process_command('cal 1.5')
+        released.set()
+        self.run_events()
+        self.interface.process_command('cal')
+        self.run_events()
+        self.assertEqual(calibrations, [1.5, None])
+
+    def test_stop_drops_a_pending_normal_trigger(self):
+        self.interface.process_command(f'connect {NS1.ID}')
+        self.run_events()
+        self.interface.process_command('normal')
+        self.assertIn(interface.Event.NORMAL_TRIGGER, list(self.interface._start_event_queue[0]))
+        self.interface.process_command('stop')
+        self.assertNotIn(interface.Event.NORMAL_TRIGGER, list(self.interface._start_event_queue[0]))
+        self.run_events()
+
+    def run_until(self, condition) -> None:
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            self.interface.check_state()
+            time.sleep(0.001)
+
+    def test_auto_draws_while_the_scope_rearms(self):
+        self.interface.process_command(f'connect {NS1.ID}')
+        self.run_events()
+        scope_interface = self.interface._scope_interfaces[0]
+        add_vector = self.interface.scope_display.add_vector
+        self.interface.process_command('auto')
+        self.run_until(lambda: add_vector.call_count >= 3)
+        self.assertTrue(scope_interface.rearming)
+        self.assertEqual(self.interface._end_event_queue[0], [interface.Event.AUTO_TRIGGER])
+        # A setting change ends the re-arming and auto mode resumes after it.
+        self.interface.process_command('trigfalling')
+        self.run_until(lambda: not self.emulator.rising_edge)
+        drawn = add_vector.call_count
+        self.run_until(lambda: add_vector.call_count >= drawn + 3)
+        self.assertTrue(scope_interface.rearming)
+        self.assertEqual(len(self.interface._start_event_queue[0]), 0)
+        self.interface.process_command('stop')
+        self.run_until(lambda: not scope_interface.rearming and len(self.interface._end_event_queue[0]) == 0)
+        self.assertTrue(scope_interface.wait_for_action(5))
+
+    def test_filter_redraws_the_held_capture(self):
+        self.interface.process_command(f'connect {NS1.ID}')
+        self.run_events()
+        scope_interface = self.interface._scope_interfaces[0]
+        scope_interface.set_scope_action(interface.ScopeAction.FORCE_TRIGGER)
+        self.assertTrue(scope_interface.wait_for_action(5))
+        held = scope_interface.take_capture()
+        self.interface.process_command('filter boxcar:9')
+        self.assertEqual(scope_interface.scope.fir_length, 9)
+        self.assertIs(scope_interface.capture.codes, held.codes)
+        self.assertEqual(scope_interface.capture.settings.fir_filter.length, 9)
+        self.assertEqual(len(scope_interface.xx), len(held.codes) - 8)
+        self.interface.scope_display.add_vector.assert_called_with(scope_interface.xx, 0)
+        self.assertEqual(self.interface.scope_display.resample_vector.call_args.kwargs['FIR_length'], 9)
+        # A scale change redraws with the filter of the held capture, not the one set since.
+        scope_interface.scope.set_filter(interface.parse_filter('boxcar:3'))
+        self.interface._finish_change_scale(0)
+        self.assertEqual(self.interface.scope_display.resample_vector.call_args.kwargs['FIR_length'], 9)
+
+if __name__ == '__main__':
+    unittest.main()
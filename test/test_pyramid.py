@@ -0,0 +1,55 @@
+import sys
+sys.path.append('..')
+
+import unittest
+
+import numpy as np
+
+from voltpeek.pyramid import MinMaxPyramid
+from voltpeek.resample import Resampler, FILL_VALUE
+
+class TestMinMaxPyramid(unittest.TestCase):
+    def setUp(self):
+        self.vector = np.random.default_rng(0).normal(size=16382)
+        self.pyramid = MinMaxPyramid(self.vector)
+
+    def test_levels(self):
+        self.assertEqual(len(self.pyramid), 16382)
+        # 16382 samples halve down to a single block after 14 levels.
+        self.assertEqual(self.pyramid.levels, 15)
+        self.assertEqual(self.pyramid.level(1), 0)
+        self.assertEqual(self.pyramid.level(7.9), 2)
+        self.assertEqual(self.pyramid.level(1e9), 14)
+
+    def test_matches_the_full_reduction_on_block_edges(self):
+        sample_positions = np.arange(0, 16384 - 64, 64, dtype=np.float64)
+        mins, maxs = self.pyramid.min_max(sample_positions, 64)
+        for i, position in enumerate(sample_positions.astype(int)):
+            self.assertEqual(mins[i], self.vector[position:position + 64].min())
+            self.assertEqual(maxs[i], self.vector[position:position + 64].max())
+
+    def test_matches_the_resampler_at_full_resolution(self):
+        resampler = Resampler(500)
+        hor_setting, fs = 10e-6, 1.6e6
+        expected = resampler.min_max(self.vector, hor_setting, fs)
+        result = self.pyramid.min_max(resampler.sample_positions(hor_setting, fs, len(self.vector)), 
+                                      resampler.samples_per_column(hor_setting, fs))
+        np.testing.assert_array_equal(result[0], expected[0])
+        np.testing.assert_array_equal(result[1], expected[1])
+
+    def test_glitch_survives_zooming_out(self):
+        vector = np.zeros(16382)
+        vector[5001] = 3
+        mins, maxs = MinMaxPyramid(vector).min_max(np.arange(0, 16382, 40.5), 40.5)
+        self.assertEqual(maxs.max(), 3)
+        self.assertEqual(np.count_nonzero(maxs), 1)
+        self.assertEqual(mins.min(), 0)
+
+    def test_columns_outside_the_capture(self):
+        mins, maxs = self.pyramid.min_max(np.array([-100.0, 0.0, 20000.0]), 10)
+        self.assertEqual(mins[0], FILL_VALUE)
+        self.assertEqual(maxs[2], FILL_VALUE)
+        self.assertNotEqual(maxs[1], FILL_VALUE)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import sys
+sys.path.append('..')
+
+import unittest
+
+import numpy as np
+
+from voltpeek import raster
+
+class TestRaster(unittest.TestCase):
+    WIDTH = 10
+    COLOR = (17, 176, 249)
+
+    def test_staircase_spans_join_neighbouring_samples(self):
+        top, bottom = raster.staircase_spans(np.array([0, 1, 2]), np.array([5., 2., 7.]), self.WIDTH)
+        np.testing.assert_array_equal(top[:3], [5, 2, 2])
+        np.testing.assert_array_equal(bottom[:3], [5, 5, 7])
+        self.assertTrue(np.all(top[3:] > bottom[3:]))
+
+    def test_column_spans_skip_columns_outside_image(self):
+        top, bottom = raster.column_spans(np.array([-1, 3, self.WIDTH]), np.array([1., 2., 3.]), np.array([4., 5., 6.]), self.WIDTH)
+        self.assertEqual((top[3], bottom[3]), (2, 5))
+        self.assertEqual(np.count_nonzero(top <= bottom), 1)
+
+    def test_thicken(self):
+        top, bottom = raster.column_spans(np.array([5]), np.array([4.]), np.array([4.]), self.WIDTH)
+        top, bottom = raster.thicken(top, bottom, 1)
+        np.testing.assert_array_equal(np.flatnonzero(top <= bottom), [4, 5, 6])
+        self.assertEqual((top[4], bottom[6]), (3, 5))
+
+    def test_fill_spans(self):
+        image = np.zeros((self.WIDTH, self.WIDTH, 3), dtype=np.uint8)
+        top, bottom = raster.staircase_spans(np.array([0, 1, 2]), np.array([5., 2., 7.]), self.WIDTH)
+        raster.fill_spans(image, top, bottom, self.COLOR)
+        filled = np.all(image == self.COLOR, axis=2)
+        np.testing.assert_array_equal(np.flatnonzero(filled[:, 1]), [2, 3, 4, 5])
+        self.assertEqual(np.count_nonzero(filled), 1 + 4 + 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import sys
+sys.path.append('..')
+
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from voltpeek.capture import Capture, CaptureSettings
+from voltpeek.filters import FilterSpec, FilterType
+from voltpeek.recorder import Recorder, read_recording, INDEX_FILENAME, codes_filename
+
+SETTINGS = CaptureSettings(10, True, False, 4, 62.5e6/4, FilterSpec(FilterType.BOXCAR, 5), 0.5, 128, 0.01, 1.02)
+
+def capture(value: int) -> Capture: return Capture(np.full(100, value, dtype=np.uint8), SETTINGS)
+
+class TestRecorder(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = os.path.join(directory.name, 'scope0')
+
+    def test_round_trip_over_segments(self):
+        recorder = Recorder(self.directory, 100, segment_frames=3)
+        recorder.start()
+        for value in range(0, 7):
+            self.assertTrue(recorder.submit(capture(value), timestamp=float(value)))
+        snapshot = recorder.stop(5)
+        self.assertFalse(recorder.recording)
+        self.assertEqual((snapshot.written, snapshot.dropped, snapshot.bytes_written), (7, 0, 700))
+        self.assertIsNone(snapshot.error)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, codes_filename(2))))
+        frames = list(read_recording(self.directory))
+        self.assertEqual([frame.sequence for frame in frames], list(range(1, 8)))
+        self.assertEqual([frame.timestamp for frame in frames], [float(value) for value in range(0, 7)])
+        self.assertEqual([frame.capture.codes[0] for frame in frames], list(range(0, 7)))
+        self.assertEqual(frames[0].capture.settings, SETTINGS)
+        np.testing.assert_array_equal(frames[3].capture.volts, capture(3).volts)
+
+    def wait_for_frames(self, count: int) -> list:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            frames = list(read_recording(self.directory))
+            if len(frames) >= count:
+                return frames
+            time.sleep(0.01)
+        self.fail(f'{count} frames were not indexed.')
+
+    def test_read_while_recording(self):
+        recorder = Recorder(self.directory, 100, segment_frames=3, index_interval=0.05)
+        recorder.start()
+        self.addCleanup(recorder.stop, 5)
+        for value in range(0, 4):
+            recorder.submit(capture(value))
+        # The partly written second segment is indexed without a capture arriving or stop being called.
+        frames = self.wait_for_frames(4)
+        self.assertTrue(recorder.recording)
+        self.assertEqual([frame.capture.codes[0] for frame in frames], list(range(0, 4)))
+
+    def test_full_segment_is_indexed(self):
+        recorder = Recorder(self.directory, 100, segment_frames=3, index_interval=60)
+        recorder.start()
+        self.addCleanup(recorder.stop, 5)
+        for value in range(0, 3):
+            recorder.submit(capture(value))
+        self.assertEqual(len(self.wait_for_frames(3)), 3)
+
+    def test_submitted_capture_is_copied(self):
+        recorder = Recorder(self.directory, 100)
+        recorder.start()
+        submitted = capture(1)
+        recorder.submit(submitted)
+        submitted.codes[:] = 9
+        recorder.stop(5)
+        self.assertEqual(next(read_recording(self.directory)).capture.codes.max(), 1)
+
+    def test_full_queue_drops(self):
+        # Without a writer running nothing leaves the queue.
+        recorder = Recorder(self.directory, 100, queue_size=2)
+        self.assertTrue(recorder.submit(capture(0)))
+        self.assertTrue(recorder.submit(capture(1)))
+        self.assertFalse(recorder.submit(capture(2)))
+        self.assertFalse(recorder.submit(Capture(np.zeros(50, dtype=np.uint8), SETTINGS)))
+        self.assertFalse(recorder.submit(Capture.from_volts(np.zeros(100))))
+        snapshot = recorder.snapshot()
+        self.assertEqual((snapshot.dropped, snapshot.queue_depth, snapshot.max_queue_depth), (3, 2, 2))
+        # Queued captures are written once the writer starts, dropped ones leave a gap in the sequence.
+        recorder.start()
+        recorder.submit(capture(5))
+        self.assertEqual(recorder.stop(5).written, 3)
+        self.assertEqual([frame.sequence for frame in read_recording(self.directory)], [1, 2, 6])
+
+    def test_empty_recording(self):
+        recorder = Recorder(self.directory, 100)
+        recorder.start()
+        self.assertTrue(os.path.exists(os.path.join(self.directory, INDEX_FILENAME)))
+        self.assertEqual(recorder.stop(5).written, 0)
+        self.assertEqual(list(read_recording(self.directory)), [])
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            Recorder(self.directory, 100, queue_size=0)
+
+if __name__ == '__main__':
+    unittest.main()
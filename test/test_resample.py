@@ -0,0 +1,94 @@
+import sys
+sys.path.append('..')
+
+import unittest
+
+import numpy as np
+from scipy.interpolate import interp1d
+
+from voltpeek import constants
+from voltpeek.resample import Resampler, quantize_vertical, FILL_VALUE
+
+def interp1d_resample(vector, hor_setting: float, fs: float, size: int, time_shift: float=0):
+    f = interp1d(np.arange(len(vector))/fs, vector, kind='linear', fill_value=FILL_VALUE, bounds_error=False)
+    new_T: float = hor_setting/(size/constants.Display.GRID_LINE_COUNT)
+    chop_time: float = (1/fs)*len(vector) - hor_setting*constants.Display.GRID_LINE_COUNT
+    return f(np.arange(size)*new_T + chop_time/2 + time_shift)
+
+class TestResampler(unittest.TestCase):
+    SIZE = 800
+    MEMORY_DEPTH = 16382
+
+    def setUp(self): 
+        self.resampler = Resampler(self.SIZE)
+        self.vector = np.random.default_rng(0).normal(size=self.MEMORY_DEPTH)
+
+    def test_resample_matches_interp1d(self):
+        for hor_setting, fs in ((1e-3, 1.6e6), (100e-6, 15.6e6), (1e-6, 62.5e6), (100e-9, 62.5e6)):
+            np.testing.assert_allclose(self.resampler.resample(self.vector, hor_setting, fs), 
+                                       interp1d_resample(self.vector, hor_setting, fs, self.SIZE), atol=1e-9)
+
+    def test_resample_with_time_shift_matches_interp1d(self):
+        for time_shift in (-3e-6, 1e-7, 5e-6):
+            np.testing.assert_allclose(self.resampler.resample(self.vector, 1e-6, 62.5e6, time_shift), 
+                                       interp1d_resample(self.vector, 1e-6, 62.5e6, self.SIZE, time_shift), atol=1e-9)
+
+    def test_columns_outside_capture_are_filled(self):
+        # A 1 us/div window is longer than a 100 sample capture at 62.5 MS/s.
+        resampled = self.resampler.resample(self.vector[:100], 1e-6, 62.5e6)
+        self.assertEqual(resampled[0], FILL_VALUE)
+        self.assertEqual(resampled[-1], FILL_VALUE)
+
+    def test_grids_are_cached(self):
+        positions = self.resampler.sample_positions(1e-3, 1.6e6, self.MEMORY_DEPTH)
+        self.assertIs(self.resampler.sample_positions(1e-3, 1.6e6, self.MEMORY_DEPTH), positions)
+        self.assertIsNot(self.resampler.sample_positions(1e-4, 1.6e6, self.MEMORY_DEPTH), positions)
+
+    def test_shifted_grids_are_cached(self):
+        positions = self.resampler.sample_positions(1e-3, 1.6e6, self.MEMORY_DEPTH)
+        shifted = self.resampler.sample_positions(1e-3, 1.6e6, self.MEMORY_DEPTH, 1e-3)
+        self.assertIs(self.resampler.sample_positions(1e-3, 1.6e6, self.MEMORY_DEPTH, 1e-3), shifted)
+        np.testing.assert_allclose(shifted, positions + 1e-3*1.6e6)
+        # However many shifts are seen the unshifted grid is kept.
+        for step in range(0, 2*Resampler.MAX_CACHED_GRIDS):
+            self.resampler.resample(self.vector, 1e-3, 1.6e6, (step + 1)*1e-5)
+        self.assertIs(self.resampler.sample_positions(1e-3, 1.6e6, self.MEMORY_DEPTH), positions)
+
+    def test_resample_reuses_output_buffer(self):
+        first = self.resampler.resample(self.vector, 1e-3, 1.6e6)
+        self.assertIs(self.resampler.resample(self.vector, 1e-4, 15.6e6), first)
+
+    def test_quantize_vertical(self):
+        pixels_per_division = self.SIZE/constants.Display.GRID_LINE_COUNT
+        np.testing.assert_allclose(quantize_vertical(np.array([0, 1, -2]), 1, self.SIZE), 
+                                   [self.SIZE//2, self.SIZE//2 + pixels_per_division, self.SIZE//2 - 2*pixels_per_division])
+
+    def test_min_max_keeps_single_sample_glitch(self):
+        vector = np.zeros(self.MEMORY_DEPTH)
+        vector[self.MEMORY_DEPTH//2 + 7] = 5
+        # 20 samples per pixel column, interpolation misses the glitch.
+        self.assertLess(self.resampler.resample(vector, 1e-3, 1.6e6).max(), 5)
+        mins, maxs = self.resampler.min_max(vector, 1e-3, 1.6e6)
+        self.assertEqual(maxs.max(), 5)
+        self.assertEqual(np.count_nonzero(maxs == 5), 1)
+        self.assertEqual(mins.max(), 0)
+
+    def test_min_max_matches_column_slices(self):
+        hor_setting, fs = 1e-3, 1.6e6
+        mins, maxs = self.resampler.min_max(self.vector, hor_setting, fs)
+        positions = self.resampler.sample_positions(hor_setting, fs, self.MEMORY_DEPTH)
+        step = self.resampler.samples_per_column(hor_setting, fs)
+        for column in (0, 1, self.SIZE//2, self.SIZE - 1):
+            column_slice = self.vector[int(np.floor(positions[column])):int(np.floor(positions[column] + step))]
+            self.assertEqual(mins[column], column_slice.min())
+            self.assertEqual(maxs[column], column_slice.max())
+
+    def test_min_max_columns_outside_capture_are_filled(self):
+        mins, maxs = self.resampler.min_max(self.vector, 1e-3, 1.6e6, time_shift=-5e-3)
+        self.assertEqual(mins[0], FILL_VALUE)
+        self.assertEqual(maxs[0], FILL_VALUE)
+        self.assertNotEqual(maxs[-1], FILL_VALUE)
+
+    def test_peak_detect_available(self):
+        self.assertTrue(self.resampler.peak_detect_available(1e-3, 1.6e6))
+        self.assertFalse(self.resampler.peak_detect_available(100e-9, 62.5e6))
@@ -43,5 +43,17 @@ class TestScale(unittest.TestCase):
             self.scale.probe_div = 5
         self.assertEqual(str(context.exception), 'Not an existing probe division.')
 
+    def test_set_vert(self):
+        self.scale.set_vert(0.4)
+        self.assertEqual(self.scale.vert, 0.4)
+        with self.assertRaises(ValueError):
+            self.scale.set_vert(0.3)
+
+    def test_set_hor(self):
+        self.scale.set_hor(100e-6)
+        self.assertEqual(self.scale.hor, 100e-6)
+        with self.assertRaises(ValueError):
+            self.scale.set_hor(3e-3)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
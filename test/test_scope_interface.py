@@ -1,12 +1,17 @@
 from enum import Enum
+import os
+import tempfile
 import time
 import sys
 sys.path.append('..')
 
 import unittest
 
+from voltpeek.calibration_cache import CalibrationCache, DeviceIdentity
+from voltpeek.filters import FilterSpec, FilterType
 from voltpeek.scopes.NS1 import NS1
 from voltpeek.scope_interface import ScopeInterface, ScopeAction
+from voltpeek.scopes.scope_base import ReadOutcome
 
 class MockRange(Enum):
     LOW = 0
@@ -64,6 +69,8 @@ class MockNS1:
 
     def stop(self) -> None:
         self.stop_flag = True
+
+    def stop_trigger(self) -> None: self.stop_flag = True
     
     def read_calibration_offsets(self) -> list[int]:
         return [0 for _ in range(0, 4)]
@@ -75,6 +82,8 @@ class TestScopeInterface(unittest.TestCase):
         self.scope = MockNS1
         self.scope_interface = ScopeInterface(self.scope)
 
+    def tearDown(self): self.scope_interface.close()
+
     def test_scope_class(self):
         self.assertTrue(isinstance(self.scope, type))
         self.assertEqual(self.scope.__name__, 'MockNS1')
@@ -91,10 +100,11 @@ class TestScopeInterface(unittest.TestCase):
 
     def test_scope_interface_connect(self):
         self.scope_interface.set_scope_action(ScopeAction.CONNECT)
+        self.scope_interface.wait_for_action()
         self.assertTrue(self.scope_interface._scope.connected)
         self.assertTrue(self.scope_interface._scope_connected)
         self.assertTrue(self.scope_interface._action_complete)
-        self.assertFalse(self.scope_interface._data_available.locked())
+        self.assertTrue(self.scope_interface.data_available)
 
     def test_scope_interface_trigger(self):
         self.scope_interface.set_scope_action(ScopeAction.TRIGGER)
@@ -107,25 +117,80 @@ class TestScopeInterface(unittest.TestCase):
         self.assertEqual(len(self.scope_interface._xx), NS1.SCOPE_SPECS['memory_depth'])
         self.assertEqual(self.scope_interface._xx, [0 for _ in range(0, NS1.SCOPE_SPECS['memory_depth'])])
         self.assertTrue(self.scope_interface._action_complete)
-        self.assertFalse(self.scope_interface._data_available.locked())
+        self.assertTrue(self.scope_interface.data_available)
 
     def test_scope_interface_force_trigger(self):
         self.scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+        self.scope_interface.wait_for_action()
         self.assertEqual(len(self.scope_interface._xx), NS1.SCOPE_SPECS['memory_depth'])
         self.assertEqual(self.scope_interface._xx, [0 for _ in range(0, NS1.SCOPE_SPECS['memory_depth'])])
         self.assertTrue(self.scope_interface._action_complete)
-        self.assertFalse(self.scope_interface._data_available.locked())
+        self.assertTrue(self.scope_interface.data_available)
+
+    def test_force_trigger_records_a_complete_capture(self):
+        self.scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+        self.scope_interface.wait_for_action()
+        self.assertEqual(self.scope_interface.last_outcome, ReadOutcome.COMPLETE)
+        self.assertEqual(self.scope_interface.stats.snapshot().captures, 1)
+        self.assertEqual(self.scope_interface.capture_count, 1)
+
+    def test_failed_capture_after_a_stop_is_incomplete(self):
+        self.scope_interface.stop_trigger()
+        self.scope_interface._scope.get_scope_force_trigger_data = lambda full_scale: []
+        self.scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+        self.scope_interface.wait_for_action()
+        self.assertEqual(self.scope_interface.last_outcome, ReadOutcome.INCOMPLETE)
+        self.assertEqual(self.scope_interface.stats.snapshot().incomplete, 1)
+
+    def wait_for_captures(self, count: int) -> None:
+        deadline = time.monotonic() + 5
+        while self.scope_interface.capture_count < count:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+
+    def test_auto_rearm_until_an_action_is_queued(self):
+        self.scope_interface.set_auto_rearm(True)
+        self.scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+        self.wait_for_captures(3)
+        # The scope accepts actions while it re-arms.
+        self.assertTrue(self.scope_interface.data_available)
+        self.assertTrue(self.scope_interface.new_capture_available)
+        self.assertTrue(self.scope_interface.set_scope_action(ScopeAction.SET_RANGE))
+        self.scope_interface.wait_for_action()
+        self.assertFalse(self.scope_interface.rearming)
+        count = self.scope_interface.capture_count
+        time.sleep(0.02)
+        self.assertEqual(self.scope_interface.capture_count, count)
+
+    def test_auto_rearm_ends_when_cleared(self):
+        self.scope_interface.set_auto_rearm(True)
+        self.scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+        self.wait_for_captures(2)
+        self.scope_interface.set_auto_rearm(False)
+        deadline = time.monotonic() + 5
+        while self.scope_interface.rearming:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+        self.assertTrue(self.scope_interface.data_available)
+
+    def test_force_trigger_without_auto_rearm_takes_one_capture(self):
+        self.scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+        self.scope_interface.wait_for_action()
+        self.assertFalse(self.scope_interface.rearming)
+        self.assertEqual(self.scope_interface.capture_count, 1)
 
     def test_scope_interface_set_clock_div(self):
         self.scope_interface.set_value(2)
         self.scope_interface.set_scope_action(ScopeAction.SET_CLOCK_DIV)
+        self.scope_interface.wait_for_action()
         self.assertTrue(self.scope_interface._action_complete)
-        self.assertFalse(self.scope_interface._data_available.locked())
+        self.assertTrue(self.scope_interface.data_available)
         self.assertEqual(self.scope_interface._scope.clock_div, 2)
 
     def test_scope_interface_set_high_range(self):
         self.scope_interface.set_full_scale(NS1.LOW_RANGE_THRESHOLD + 1)
         self.scope_interface.set_scope_action(ScopeAction.SET_RANGE)
+        self.scope_interface.wait_for_action()
         self.assertTrue(self.scope_interface._action_complete)
         self.assertTrue(self.scope_interface.data_available)
         self.assertEqual(self.scope_interface._scope.range, MockRange.HIGH)
@@ -133,7 +198,160 @@ class TestScopeInterface(unittest.TestCase):
     def test_scope_interface_set_low_range(self):
         self.scope_interface.set_full_scale(NS1.LOW_RANGE_THRESHOLD - 1)
         self.scope_interface.set_scope_action(ScopeAction.SET_RANGE)
+        self.scope_interface.wait_for_action()
         self.assertTrue(self)
         self.assertTrue(self.scope_interface._action_complete)
         self.assertTrue(self.scope_interface.data_available)
-        self.assertEqual(self.scope_interface._scope.range, MockRange.LOW)
\ No newline at end of file
+        self.assertEqual(self.scope_interface._scope.range, MockRange.LOW)
+
+    def test_scope_interface_rejects_action_while_busy(self):
+        self.assertTrue(self.scope_interface.set_scope_action(ScopeAction.TRIGGER))
+        self.assertFalse(self.scope_interface.data_available)
+        self.assertFalse(self.scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER))
+        self.assertTrue(self.scope_interface.wait_for_action(1))
+
+    def test_scope_interface_reuses_worker_thread(self):
+        worker = self.scope_interface._worker
+        for _ in range(0, 3):
+            self.scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+            self.scope_interface.wait_for_action()
+        self.assertIs(self.scope_interface._worker, worker)
+        self.assertTrue(worker.is_alive())
+
+    def test_scope_interface_close_stops_worker(self):
+        self.scope_interface.close()
+        self.scope_interface._worker.join(1)
+        self.assertFalse(self.scope_interface._worker.is_alive())
+
+    def test_scope_interface_latest_capture(self):
+        self.assertIsNone(self.scope_interface.latest_capture())
+        self.scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+        self.scope_interface.wait_for_action()
+        xx = self.scope_interface.latest_capture()
+        self.assertEqual(len(xx), NS1.SCOPE_SPECS['memory_depth'])
+        self.assertIs(self.scope_interface.xx.base, xx.base)
+
+    def test_driver_without_codes(self):
+        self.scope_interface.set_scope_action(ScopeAction.FORCE_TRIGGER)
+        self.scope_interface.wait_for_action()
+        capture = self.scope_interface.take_capture()
+        self.assertIsNone(capture.codes)
+        self.assertIs(self.scope_interface.capture, capture)
+        self.assertEqual(len(self.scope_interface.history), 0)
+        self.assertIs(self.scope_interface.refilter_capture(FilterSpec(FilterType.BOXCAR, 5)), capture)
+
+    def test_scope_interface_notifies_action_listener(self):
+        completed_actions = []
+        self.scope_interface.set_action_listener(lambda scope_interface, action: completed_actions.append((scope_interface, action)))
+        self.scope_interface.set_scope_action(ScopeAction.SET_RANGE)
+        self.scope_interface.wait_for_action()
+        self.scope_interface.close()
+        self.scope_interface._worker.join(1)
+        self.assertEqual(completed_actions, [(self.scope_interface, ScopeAction.SET_RANGE)])
+
+class MockCachedNS1(MockNS1):
+    OFFSETS = {'range_high': 0.1, 'range_high_gain': 0.2, 'range_low': 0.3, 'range_low_gain': 0.4}
+
+    def __init__(self):
+        super().__init__()
+        self.port = '/dev/ttyACM0'
+        self.offsets = dict(self.OFFSETS)
+        # The driver exposes its offsets as a dictionary.
+        self.calibration_offsets = self.offsets
+        self.offset_reads = 0
+        self.force_trigger_fails = False
+        self.gains = {'range_high': 1, 'range_high_gain': 1, 'range_low': 1, 'range_low_gain': 1}
+        self.calibration_gains = self.gains
+
+    def device_identity(self, device): return DeviceIdentity('E6614C311B4B6C2A', 'Board in FS mode', device)
+
+    def read_calibration_offsets(self):
+        self.offset_reads += 1
+        return True
+
+    def load_calibration_offsets(self, offsets):
+        self.offsets = dict(offsets)
+        self.calibration_offsets = self.offsets
+
+    def get_scope_force_trigger_data(self, full_scale: float) -> list[float]:
+        return [] if self.force_trigger_fails else super().get_scope_force_trigger_data(full_scale)
+
+    def set_calibration_offsets(self, full_scale: float) -> str: return 'offsets'
+
+    def set_gain_calibration(self, reference: float, full_scale: float) -> str:
+        self.gains['range_high'] = reference
+        return 'report'
+
+    def load_calibration_gains(self, gains):
+        self.gains = dict(gains)
+        self.calibration_gains = self.gains
+
+class TestScopeInterfaceCalibrationCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = CalibrationCache(os.path.join(directory.name, 'calibration.json'))
+
+    def connect(self) -> ScopeInterface:
+        scope_interface = ScopeInterface(MockCachedNS1, calibration_cache=self.cache)
+        self.addCleanup(scope_interface.close)
+        self.run_action(scope_interface, ScopeAction.READ_CAL_OFFSETS)
+        return scope_interface
+
+    def run_action(self, scope_interface: ScopeInterface, action: ScopeAction) -> None:
+        scope_interface.set_scope_action(action)
+        scope_interface.wait_for_action()
+
+    def test_reconnect_skips_the_device_read(self):
+        self.assertEqual(self.connect().scope.offset_reads, 1)
+        scope_interface = self.connect()
+        self.assertEqual(scope_interface.scope.offset_reads, 0)
+        self.assertEqual(scope_interface.scope.offsets, MockCachedNS1.OFFSETS)
+        self.assertTrue(scope_interface.calibration_ints)
+
+    def test_failed_first_capture_reads_the_device(self):
+        self.connect()
+        scope_interface = self.connect()
+        scope_interface.scope.force_trigger_fails = True
+        self.run_action(scope_interface, ScopeAction.FORCE_TRIGGER)
+        self.assertEqual(scope_interface.scope.offset_reads, 1)
+        # The offsets were read again and cached again.
+        self.assertEqual(self.connect().scope.offset_reads, 0)
+
+    def test_cache_is_kept_after_a_complete_capture(self):
+        self.connect()
+        scope_interface = self.connect()
+        self.run_action(scope_interface, ScopeAction.FORCE_TRIGGER)
+        scope_interface.scope.force_trigger_fails = True
+        self.run_action(scope_interface, ScopeAction.FORCE_TRIGGER)
+        self.assertEqual(scope_interface.scope.offset_reads, 0)
+
+    def test_gain_calibration_is_cached(self):
+        scope_interface = self.connect()
+        scope_interface.set_calibration_reference(1.05)
+        self.run_action(scope_interface, ScopeAction.SET_CAL_OFFSETS)
+        self.assertEqual(scope_interface.calibration_report, 'report')
+        self.assertEqual(self.connect().scope.gains['range_high'], 1.05)
+
+    def test_reference_is_used_once(self):
+        scope_interface = self.connect()
+        scope_interface.set_calibration_reference(1.05)
+        self.run_action(scope_interface, ScopeAction.SET_CAL_OFFSETS)
+        self.assertEqual(scope_interface.calibration_report, 'report')
+        self.run_action(scope_interface, ScopeAction.SET_CAL_OFFSETS)
+        self.assertEqual(scope_interface.calibration_report, 'offsets')
+
+    def test_invalidate(self):
+        scope_interface = self.connect()
+        scope_interface.invalidate_calibration_cache()
+        self.run_action(scope_interface, ScopeAction.READ_CAL_OFFSETS)
+        self.assertEqual(scope_interface.scope.offset_reads, 2)
+
+    def test_invalidate_keeps_the_gains(self):
+        scope_interface = self.connect()
+        scope_interface.set_calibration_reference(1.05)
+        self.run_action(scope_interface, ScopeAction.SET_CAL_OFFSETS)
+        scope_interface.invalidate_calibration_cache()
+        scope_interface = self.connect()
+        self.assertEqual(scope_interface.scope.offset_reads, 1)
+        self.assertEqual(scope_interface.scope.gains['range_high'], 1.05)
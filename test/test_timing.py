@@ -0,0 +1,52 @@
+import sys
+sys.path.append('..')
+
+import unittest
+from time import sleep
+
+from voltpeek import timing
+from voltpeek.timing import StageTimings
+
+class TestStageTimings(unittest.TestCase):
+    def setUp(self):
+        self.timings = StageTimings(window_length=100)
+        self.timings.enabled = True
+
+    def test_disabled_timings_record_nothing(self):
+        self.timings.enabled = False
+        self.timings.record(timing.SERIAL, 1)
+        with self.timings.measure(timing.DRAW):
+            pass
+        self.assertEqual(self.timings.stages, [])
+        self.assertIsNone(self.timings.percentiles(timing.SERIAL))
+
+    def test_percentiles(self):
+        for milliseconds in range(1, 101):
+            self.timings.record(timing.SERIAL, milliseconds*1e-3)
+        p50, p99 = self.timings.percentiles(timing.SERIAL)
+        self.assertAlmostEqual(p50, 50.5e-3)
+        self.assertAlmostEqual(p99, 99.01e-3)
+
+    def test_window_keeps_the_most_recent_durations(self):
+        for _ in range(0, 100):
+            self.timings.record(timing.DRAW, 1)
+        for _ in range(0, 100):
+            self.timings.record(timing.DRAW, 2)
+        self.assertEqual(self.timings.count(timing.DRAW), 100)
+        self.assertEqual(self.timings.percentiles(timing.DRAW), (2, 2))
+
+    def test_measure(self):
+        with self.timings.measure(timing.RESAMPLE):
+            sleep(0.01)
+        self.assertGreaterEqual(self.timings.percentiles(timing.RESAMPLE)[0], 0.01)
+
+    def test_report_lists_every_stage(self):
+        self.timings.record(timing.SERIAL, 1e-3)
+        self.timings.record(timing.DRAW, 2e-3)
+        report: str = self.timings.report()
+        self.assertIn(timing.SERIAL, report)
+        self.assertIn(timing.DRAW, report)
+        self.assertIn('2.000', report)
+
+if __name__ == '__main__':
+    unittest.main()
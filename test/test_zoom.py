@@ -0,0 +1,47 @@
+import sys
+sys.path.append('..')
+
+import unittest
+
+from voltpeek.scale import Scale
+from voltpeek.zoom import Zoom
+
+class TestZoom(unittest.TestCase):
+    def setUp(self):
+        # 10 ms of capture acquired at 1 ms/div
+        self.zoom = Zoom(1e-3, 10e-3)
+
+    def test_zoom_in_and_out(self):
+        self.zoom.zoom_in()
+        self.assertEqual(self.zoom.hor, 500e-6)
+        self.zoom.zoom_out()
+        self.assertEqual(self.zoom.hor, 1e-3)
+        # The whole capture is already on screen.
+        self.zoom.zoom_out()
+        self.assertEqual(self.zoom.hor, 1e-3)
+        for _ in range(0, Scale.MAX_HOR_INDEX + 1):
+            self.zoom.zoom_in()
+        self.assertEqual(self.zoom.hor, Scale.HORIZONTALS[0])
+
+    def test_pan_stays_inside_the_capture(self):
+        self.zoom.pan_right()
+        self.assertEqual(self.zoom.offset, 0)
+        self.zoom.zoom_in()
+        self.zoom.pan_right()
+        self.assertAlmostEqual(self.zoom.offset, 500e-6)
+        for _ in range(0, 20):
+            self.zoom.pan_right()
+        self.assertAlmostEqual(self.zoom.offset, 2.5e-3)
+        for _ in range(0, 20):
+            self.zoom.pan_left()
+        self.assertAlmostEqual(self.zoom.offset, -2.5e-3)
+
+    def test_zoom_out_pulls_the_view_back_inside(self):
+        self.zoom.zoom_in()
+        for _ in range(0, 10):
+            self.zoom.pan_left()
+        self.zoom.zoom_out()
+        self.assertEqual(self.zoom.offset, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+from collections import deque
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from voltpeek.scopes.scope_base import ReadOutcome
+
+@dataclass(frozen=True)
+class AcquisitionSnapshot:
+    captures: int
+    incomplete: int
+    timeouts: int
+    stops: int
+    errors: int
+    # Waveforms per second over the recent captures, None until two have arrived
+    capture_rate: Optional[float]
+    # Mean seconds from arming the scope to the capture arriving, None until one has arrived
+    dead_time: Optional[float]
+
+class AcquisitionStats:
+    '''
+    Counts how each capture of one scope ended and measures the capture rate and dead time over the most
+    recent captures. Captures are recorded on the scope worker and read from the Tk thread.
+    '''
+    WINDOW_LENGTH: int = 50
+
+    def __init__(self, window_length: int=WINDOW_LENGTH) -> None:
+        self._arrivals: deque[float] = deque(maxlen=window_length)
+        self._dead_times: deque[float] = deque(maxlen=window_length)
+        self._outcomes: dict[ReadOutcome, int] = {outcome: 0 for outcome in ReadOutcome}
+        self._lock: Lock = Lock()
+
+    def record(self, outcome: ReadOutcome, armed: float, finished: float) -> None:
+        with self._lock:
+            self._outcomes[outcome] += 1
+            if outcome == ReadOutcome.COMPLETE:
+                self._arrivals.append(finished)
+                self._dead_times.append(finished - armed)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._arrivals.clear()
+            self._dead_times.clear()
+            self._outcomes = {outcome: 0 for outcome in ReadOutcome}
+
+    def snapshot(self) -> AcquisitionSnapshot:
+        with self._lock:
+            capture_rate: Optional[float] = None
+            if len(self._arrivals) > 1 and self._arrivals[-1] > self._arrivals[0]:
+                capture_rate = (len(self._arrivals) - 1)/(self._arrivals[-1] - self._arrivals[0])
+            dead_time: Optional[float] = None
+            if len(self._dead_times) > 0:
+                dead_time = sum(self._dead_times)/len(self._dead_times)
+            return AcquisitionSnapshot(self._outcomes[ReadOutcome.COMPLETE], self._outcomes[ReadOutcome.INCOMPLETE],
+                                       self._outcomes[ReadOutcome.TIMEOUT], self._outcomes[ReadOutcome.STOPPED],
+                                       self._outcomes[ReadOutcome.ERROR], capture_rate, dead_time)
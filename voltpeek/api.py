@@ -0,0 +1,280 @@
+from dataclasses import dataclass
+from threading import Thread
+from typing import Iterator, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+from voltpeek import commands
+from voltpeek.calibration import CalibrationReport
+from voltpeek.calibration_cache import CalibrationCache
+from voltpeek.capture import Capture
+from voltpeek.capture_stream import BackPressure, CaptureStream
+from voltpeek.scale import Scale
+from voltpeek.scope_interface import ScopeInterface, ScopeAction
+from voltpeek.scopes import get_available_scopes
+from voltpeek.scopes.NS1 import NS1
+from voltpeek.trigger import EdgeType
+
+@dataclass(frozen=True)
+class Waveform:
+    volts: NDArray[np.float64]
+    fs: float
+    # perf_counter time the capture arrived from the scope
+    time: float
+    # Counts the captures of a session from 1
+    sequence: int
+    triggered: bool
+    # Captures a stream has dropped so far because the consumer fell behind
+    dropped: int = 0
+    # The raw ADC codes of a single capture, for code domain analysis. None for streams and scopes without them.
+    codes: Optional[NDArray[np.uint8]] = None
+
+    # Sample times relative to the trigger point in the middle of the capture
+    @property
+    def times(self) -> NDArray[np.float64]: return (np.arange(len(self.volts)) - len(self.volts)//2)/self.fs
+
+    @property
+    def duration(self) -> float: return len(self.volts)/self.fs
+
+class Session:
+    '''
+    Drives one scope without the graphical interface. Every call blocks until the scope has finished, so it is
+    meant for scripts and test racks. It uses the same Scale and ScopeInterface as the graphical interface.
+
+        with Session('NS1') as session:
+            session.set_timebase(1e-3)
+            session.set_vertical(1)
+            for waveform in session.captures(100):
+                print(waveform.volts.max())
+    '''
+    ACTION_TIMEOUT: float = 5
+    STREAM_BUFFER_COUNT: int = 4
+    # How often a closing stream repeats the stop request while it waits for the acquisition thread
+    STREAM_STOP_INTERVAL: float = 0.1
+    # Every vertical setting is averaged over up to a few dozen captures.
+    CALIBRATION_TIMEOUT: float = 60
+
+    def __init__(self, identifier: str='NS1', port: Optional[str]=None, 
+                 calibration_cache: Optional[CalibrationCache]=None) -> None:
+        scopes = {scope_id: scope for scope in get_available_scopes() for scope_id, scope in scope.items()}
+        if identifier not in scopes:
+            raise ValueError(f'{identifier} is not a supported scope.')
+        self._scope_class = scopes[identifier]
+        self._port: Optional[str] = port
+        # Without a cache the calibration offsets are read from the scope on every connect.
+        self._calibration_cache: Optional[CalibrationCache] = calibration_cache
+        self._scope_interface: Optional[ScopeInterface] = None
+        self._scale: Optional[Scale] = None
+        self._trigger_level: float = 0
+        self._edge: EdgeType = EdgeType.RISING_EDGE
+        self._sequence: int = 0
+
+    def __enter__(self) -> 'Session':
+        self.connect()
+        return self
+
+    def __exit__(self, *_) -> None: self.close()
+
+    def connect(self) -> None:
+        if self._port is None:
+            ports: list[str] = self._scope_class.find_scope_ports()
+            if len(ports) == 0:
+                raise ConnectionError(f'No {self._scope_class.ID} is connected.')
+            self._port = ports[0]
+        self._scope_interface = ScopeInterface(self._scope_class, device=self._port, 
+                                               calibration_cache=self._calibration_cache)
+        self._run(ScopeAction.CONNECT)
+        if getattr(self._scope_interface.scope, 'error', False):
+            raise ConnectionError(f'Could not open {self._port}.')
+        specs = self._scope_class.SCOPE_SPECS
+        self._scale = Scale(specs['scales'], specs['sample_rate'])
+        if isinstance(self._scope_interface.scope, NS1):
+            self._run(ScopeAction.READ_CAL_OFFSETS)
+        # Applying the vertical scale also sets the trigger.
+        self._apply_vertical()
+        self._apply_timebase()
+
+    def close(self) -> None:
+        if self._scope_interface is not None:
+            self._scope_interface.stop_trigger()
+            self._scope_interface.wait_for_action(self.ACTION_TIMEOUT)
+            self._scope_interface.close()
+            self._scope_interface.scope.disconnect()
+            self._scope_interface = None
+
+    def _run(self, action: ScopeAction, timeout: Optional[float]=None) -> None:
+        self._start_action(action)
+        if not self._scope_interface.wait_for_action(self.ACTION_TIMEOUT if timeout is None else timeout):
+            raise TimeoutError(f'{action.name} did not finish.')
+        self._check_action(action)
+
+    def _start_action(self, action: ScopeAction) -> None:
+        if self._scope_interface is None:
+            raise ConnectionError('The session is not connected.')
+        if not self._scope_interface.set_scope_action(action):
+            raise RuntimeError(f'The scope is busy, {action.name} was not started.')
+
+    def _check_action(self, action: ScopeAction) -> None:
+        if self._scope_interface.disconnected_error:
+            self._scope_interface.clear_disconnected_error()
+            raise ConnectionError(f'{action.name} failed, the scope may be disconnected.')
+
+    def _apply_vertical(self) -> None:
+        self._scope_interface.set_full_scale(self._scale.vert*(self._scale.GRID_COUNT/2))
+        self._run(ScopeAction.SET_RANGE)
+        self._run(ScopeAction.SET_AMPLIFIER_GAIN)
+        # The trigger code depends on the range.
+        self._apply_trigger()
+
+    def _apply_timebase(self) -> None:
+        specs = self._scope_class.SCOPE_SPECS
+        self._scale.update_sample_rate(specs['sample_rate'], specs['memory_depth'])
+        self._scope_interface.set_value(self._scale.clock_div)
+        self._run(ScopeAction.SET_CLOCK_DIV)
+
+    def _apply_trigger(self) -> None:
+        self._scope_interface.set_value(self._trigger_level)
+        self._run(ScopeAction.SET_TRIGGER_LEVEL)
+        self._run(ScopeAction.SET_RISING_EDGE_TRIGGER if self._edge == EdgeType.RISING_EDGE
+                  else ScopeAction.SET_FALLING_EDGE_TRIGGER)
+
+    def set_timebase(self, seconds_per_div: float) -> None:
+        self._connected_scale().set_hor(seconds_per_div)
+        self._apply_timebase()
+
+    def set_vertical(self, volts_per_div: float) -> None:
+        self._connected_scale().set_vert(volts_per_div)
+        self._apply_vertical()
+
+    def set_trigger(self, level: float, edge: EdgeType=EdgeType.RISING_EDGE) -> None:
+        self._connected_scale()
+        self._trigger_level = level
+        self._edge = edge
+        self._apply_trigger()
+
+    def calibrate(self, reference: Optional[float]=None) -> CalibrationReport:
+        '''
+        Calibrate the offsets of every vertical setting with the input disconnected. With a reference, the
+        offsets must already be calibrated and the reference volts applied to the input, then the gain of
+        every vertical setting that can hold the reference is calibrated.
+        '''
+        self._connected_scale()
+        if not isinstance(self._scope_interface.scope, NS1):
+            raise ValueError(f'The {self._scope_class.ID} cannot be calibrated.')
+        self._scope_interface.set_calibration_reference(reference)
+        self._run(ScopeAction.SET_CAL_OFFSETS, self.CALIBRATION_TIMEOUT)
+        # The calibration changes the range and gain while it measures, so the session's settings are restored.
+        self._apply_vertical()
+        return self._scope_interface.calibration_report
+
+    def _connected_scale(self) -> Scale:
+        if self._scale is None:
+            raise ConnectionError('The session is not connected.')
+        return self._scale
+
+    def capture(self, triggered: bool=False, timeout: Optional[float]=None) -> Waveform:
+        '''
+        Capture one waveform. A triggered capture waits for a trigger event, if none arrives before the timeout
+        the capture is stopped and TimeoutError is raised. Without a timeout it waits indefinitely.
+        '''
+        self._connected_scale()
+        capture_count: int = self._scope_interface.capture_count
+        if triggered:
+            self._start_action(ScopeAction.TRIGGER)
+            if not self._scope_interface.wait_for_action(timeout):
+                self._scope_interface.stop_trigger()
+                self._scope_interface.wait_for_action(self.ACTION_TIMEOUT)
+                raise TimeoutError('No trigger event before the timeout.')
+            self._check_action(ScopeAction.TRIGGER)
+        else:
+            self._run(ScopeAction.FORCE_TRIGGER, timeout)
+        if self._scope_interface.capture_count == capture_count:
+            raise ConnectionError('The scope did not return a capture.')
+        capture: Capture = self._scope_interface.take_capture()
+        codes: Optional[NDArray[np.uint8]] = None if capture.codes is None else capture.codes.copy()
+        self._sequence += 1
+        return Waveform(capture.volts.copy(), self.fs, self._scope_interface.capture_time, self._sequence, triggered,
+                        codes=codes)
+
+    def captures(self, count: Optional[int]=None, triggered: bool=False,
+                 timeout: Optional[float]=None) -> Iterator[Waveform]:
+        '''Yield count captures, or captures until the caller stops iterating when count is None.'''
+        captured: int = 0
+        while count is None or captured < count:
+            yield self.capture(triggered, timeout)
+            captured += 1
+
+    # Scale rounds the sample rate to an integer, the waveform times use the exact rate.
+    def iter_captures(self, n: Optional[int]=None, mode: str=commands.AUTO_TRIGGER, policy: str=BackPressure.BLOCK.value, 
+                      buffer_count: Optional[int]=None) -> Iterator[Waveform]:
+        '''
+        Yield n captures, or captures until the caller stops iterating when n is None, while the scope keeps
+        acquiring in the background. mode is auto to force every capture or normal to wait for trigger events.
+        Captures wait in a fixed pool of buffers. When the consumer falls behind, policy is block to pause the
+        scope, drop_oldest to replace the oldest waiting capture or drop_newest to discard the new one. Each
+        waveform's volts is a view of a pool buffer that is reused once the next waveform is requested, copy it
+        to keep it. Gaps in the sequence numbers and the dropped count show captures that were lost.
+        '''
+        if mode not in (commands.AUTO_TRIGGER, commands.NORMAL_TRIGGER):
+            raise ValueError(f'Stream mode must be {commands.AUTO_TRIGGER} or {commands.NORMAL_TRIGGER}.')
+        self._connected_scale()
+        triggered: bool = mode == commands.NORMAL_TRIGGER
+        capture_length: int = self._scope_class.SCOPE_SPECS['memory_depth'] - (self._scope_interface.scope.fir_length - 1)
+        stream = CaptureStream(self.STREAM_BUFFER_COUNT if buffer_count is None else buffer_count, capture_length, 
+                               BackPressure(policy))
+        acquisition = Thread(target=self._acquire_stream, args=(stream, triggered), daemon=True)
+        acquisition.start()
+        try:
+            taken: int = 0
+            while n is None or taken < n:
+                capture = stream.take()
+                if capture is None:
+                    raise stream.error or ConnectionError('The capture stream stopped.')
+                yield Waveform(capture.data, self.fs, capture.time, capture.sequence, triggered, capture.dropped)
+                taken += 1
+        finally:
+            stream.close()
+            # A stop request can land just before the next capture starts, so it is repeated until the thread ends.
+            while acquisition.is_alive():
+                self._scope_interface.stop_trigger()
+                acquisition.join(self.STREAM_STOP_INTERVAL)
+
+    # Runs on the stream's acquisition thread.
+    def _acquire_stream(self, stream: CaptureStream, triggered: bool) -> None:
+        action: ScopeAction = ScopeAction.TRIGGER if triggered else ScopeAction.FORCE_TRIGGER
+        while not stream.closed:
+            if stream.policy == BackPressure.BLOCK and not stream.wait_for_space():
+                return
+            capture_count: int = self._scope_interface.capture_count
+            try:
+                self._start_action(action)
+                self._scope_interface.wait_for_action()
+                self._check_action(action)
+            except Exception as error:
+                stream.close(error)
+                return
+            if stream.closed:
+                return
+            if self._scope_interface.capture_count == capture_count:
+                stream.close(ConnectionError('The scope did not return a capture.'))
+                return
+            stream.publish(self._scope_interface.latest_capture(), self._scope_interface.capture_time)
+
+    @property
+    def fs(self) -> float: return self._scope_class.SCOPE_SPECS['sample_rate']/self._connected_scale().clock_div
+
+    @property
+    def timebase(self) -> float: return self._connected_scale().hor
+
+    @property
+    def vertical(self) -> float: return self._connected_scale().vert
+
+    @property
+    def verticals(self) -> list[float]: return self._connected_scale().verticals
+
+    @property
+    def timebases(self) -> tuple[float, ...]: return Scale.HORIZONTALS
+
+    @property
+    def scope(self): return None if self._scope_interface is None else self._scope_interface.scope
@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+@dataclass(frozen=True)
+class SettingCalibration:
+    setting: str
+    full_scale: float
+    # Mean volts measured with the offset and gain corrections off
+    mean: float
+    # RMS volts of a capture around its own mean
+    noise: float
+    captures: int
+    converged: bool
+    # Reference volts divided by the offset corrected mean, None without a reference
+    gain: Optional[float] = None
+
+@dataclass(frozen=True)
+class CalibrationReport:
+    settings: tuple[SettingCalibration, ...]
+    reference: Optional[float] = None
+
+    @property
+    def converged(self) -> bool: return all(setting.converged for setting in self.settings)
+
+    def describe(self) -> str:
+        lines: list[str] = []
+        for setting in self.settings:
+            gain: str = '' if setting.gain is None else f', gain {setting.gain:.4f}'
+            state: str = '' if setting.converged else ', did not converge'
+            lines.append(f'{setting.setting}: mean {setting.mean*1e3:.2f} mV, noise {setting.noise*1e3:.2f} mVrms, '
+                         f'{setting.captures} captures{gain}{state}')
+        return '\n'.join(lines)
+
+class AveragingCalibrator:
+    '''
+    Measures the mean input of one vertical setting from repeated captures. Captures are discarded until
+    consecutive means agree within SETTLE_TOLERANCE, which replaces a fixed settling delay after a range or
+    gain change. Captures are then averaged until the standard error of the mean drops below TOLERANCE.
+    '''
+    # Half the resolution the offsets are stored with on the scope
+    TOLERANCE: float = 0.5e-3
+    SETTLE_TOLERANCE: float = 2e-3
+    MAX_SETTLE_CAPTURES: int = 10
+    MIN_CAPTURES: int = 3
+    MAX_CAPTURES: int = 32
+
+    def __init__(self, tolerance: float=TOLERANCE, min_captures: int=MIN_CAPTURES,
+                 max_captures: int=MAX_CAPTURES) -> None:
+        if min_captures < 2 or max_captures < min_captures:
+            raise ValueError('A calibration needs at least two captures and max_captures >= min_captures.')
+        self.tolerance: float = tolerance
+        self.min_captures: int = min_captures
+        self.max_captures: int = max_captures
+
+    def _settle(self, capture: Callable[[], NDArray[np.float64]]) -> Optional[NDArray[np.float64]]:
+        previous: Optional[float] = None
+        xx: Optional[NDArray[np.float64]] = None
+        for _ in range(0, self.MAX_SETTLE_CAPTURES):
+            xx = capture()
+            if len(xx) == 0:
+                continue
+            if previous is not None and abs(np.mean(xx) - previous) < self.SETTLE_TOLERANCE:
+                break
+            previous = float(np.mean(xx))
+        return xx
+
+    def measure(self, setting: str, full_scale: float, capture: Callable[[], NDArray[np.float64]]) -> SettingCalibration:
+        '''capture returns one capture in volts with the corrections off, empty if it failed.'''
+        xx = self._settle(capture)
+        means: list[float] = []
+        noise: list[float] = []
+        converged: bool = False
+        # The settled capture is the first one averaged.
+        for attempt in range(0, self.max_captures):
+            if attempt > 0:
+                xx = capture()
+            if xx is None or len(xx) == 0:
+                continue
+            means.append(float(np.mean(xx)))
+            noise.append(float(np.std(xx)))
+            if len(means) >= self.min_captures and np.std(means, ddof=1)/np.sqrt(len(means)) < self.tolerance:
+                converged = True
+                break
+        if len(means) == 0:
+            return SettingCalibration(setting, full_scale, 0, 0, 0, False)
+        return SettingCalibration(setting, full_scale, float(np.mean(means)), float(np.sqrt(np.mean(np.square(noise)))),
+                                  len(means), converged)
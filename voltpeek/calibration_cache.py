@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from threading import Lock
+from time import time
+from typing import Optional
+import json
+import os
+
+Offsets = dict[str, float]
+Gains = dict[str, float]
+
+@dataclass(frozen=True)
+class DeviceIdentity:
+    # USB serial number, unique per scope
+    serial_number: str
+    # USB product description, it changes with the firmware build
+    description: str
+    port: str
+
+def default_cache_path() -> str:
+    cache_home: str = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'voltpeek', 'calibration.json')
+
+class CalibrationCache:
+    '''
+    Calibration offsets and gains of each scope kept on disk between sessions, keyed by USB serial number. Offsets are
+    only used while the device still reports the same description and they are younger than MAX_AGE. Gains can only be
+    measured again with a reference voltage, so they are kept when the offsets expire or are invalidated.
+    Several scopes share one file, so writes are serialized and replace the file in one step.
+    '''
+    MAX_AGE: float = 30*24*60*60
+    VERSION: int = 1
+
+    def __init__(self, path: Optional[str]=None) -> None:
+        self._path: str = default_cache_path() if path is None else path
+        self._lock: Lock = Lock()
+
+    def _read(self) -> dict:
+        try:
+            with open(self._path, 'r') as cache_file:
+                contents = json.load(cache_file)
+        except (OSError, ValueError) as _:
+            return {}
+        if not isinstance(contents, dict) or contents.get('version') != self.VERSION:
+            return {}
+        return contents.get('devices', {})
+
+    def _write(self, devices: dict) -> None:
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            temporary_path: str = self._path + '.tmp'
+            with open(temporary_path, 'w') as cache_file:
+                json.dump({'version': self.VERSION, 'devices': devices}, cache_file, indent=4)
+            os.replace(temporary_path, self._path)
+        except OSError as _:
+            # The cache only saves time, a read only home directory must not stop the scope.
+            pass
+
+    def _device(self, serial_number: str) -> Optional[dict]:
+        with self._lock:
+            return self._read().get(serial_number)
+
+    def load(self, identity: DeviceIdentity) -> Optional[Offsets]:
+        entry: Optional[dict] = self._device(identity.serial_number)
+        if entry is None or entry.get('offsets') is None or entry.get('description') != identity.description:
+            return None
+        if time() - entry.get('saved', 0) > self.MAX_AGE:
+            return None
+        return {key: float(value) for key, value in entry['offsets'].items()}
+
+    # Gains are only stored once a reference calibration has been run.
+    def load_gains(self, identity: DeviceIdentity) -> Optional[Gains]:
+        entry: Optional[dict] = self._device(identity.serial_number)
+        if entry is None or entry.get('gains') is None:
+            return None
+        return {key: float(value) for key, value in entry['gains'].items()}
+
+    def store(self, identity: DeviceIdentity, offsets: Offsets, gains: Optional[Gains]=None) -> None:
+        '''Store the offsets, and the gains when given. Without gains the stored gains are kept.'''
+        with self._lock:
+            devices = self._read()
+            if gains is None:
+                gains = devices.get(identity.serial_number, {}).get('gains')
+            devices[identity.serial_number] = {'description': identity.description, 'port': identity.port,
+                                               'saved': time(), 'offsets': dict(offsets)}
+            if gains is not None:
+                devices[identity.serial_number]['gains'] = dict(gains)
+            self._write(devices)
+
+    def invalidate(self, serial_number: Optional[str]=None) -> None:
+        '''Forget the offsets of one scope, or of every scope when no serial number is given. Gains are kept.'''
+        with self._lock:
+            devices = self._read()
+            for serial in (list(devices) if serial_number is None else [serial_number]):
+                gains: Optional[Gains] = devices.get(serial, {}).get('gains')
+                if gains is None:
+                    devices.pop(serial, None)
+                else:
+                    devices[serial] = {'gains': gains}
+            self._write(devices)
+
+    @property
+    def path(self) -> str: return self._path
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+from voltpeek import timing
+from voltpeek.filters import FilterSpec, FilterType, apply_filter
+from voltpeek.timing import stage_timings
+
+@dataclass(frozen=True)
+class CaptureSettings:
+    '''The vertical and horizontal settings a capture was taken with, enough to convert its codes to volts.'''
+    full_scale: float
+    high_range: bool
+    amplifier_gain: bool
+    clock_div: int
+    fs: float
+    fir_filter: FilterSpec
+    # Volts are ((code - zero_code)*volts_per_code + calibration_offset)*calibration_gain.
+    volts_per_code: float
+    zero_code: float
+    # Calibration offset and gain of the vertical setting when the capture was taken
+    calibration_offset: float
+    calibration_gain: float
+
+@lru_cache(maxsize=32)
+def conversion_table(settings: CaptureSettings, window_length: int) -> NDArray[np.float64]:
+    '''Maps the sum of window_length codes straight to volts. With a window of one this is a 256 entry table.'''
+    zeroed_codes = np.subtract(np.arange(255*window_length + 1)/window_length, settings.zero_code)
+    table = np.multiply(np.add(np.multiply(zeroed_codes, settings.volts_per_code), settings.calibration_offset), 
+                        settings.calibration_gain)
+    # Tables are shared between captures through the cache.
+    table.setflags(write=False)
+    return table
+
+def window_sums(codes: NDArray[np.uint8], window_length: int) -> NDArray:
+    if window_length == 1:
+        return codes
+    code_sums = np.cumsum(codes, dtype=np.uint32)
+    sums = code_sums[window_length-1:].copy()
+    sums[1:] -= code_sums[:-window_length]
+    return sums
+
+class Capture:
+    '''
+    One capture as the raw ADC codes and the settings that convert them. The volts are computed the first time
+    a consumer asks for them and kept for every later consumer, so a capture that is dropped, stored or only
+    looked at in codes is never converted. Drivers without raw codes hand over volts instead.
+    '''
+    def __init__(self, codes: Optional[NDArray[np.uint8]], settings: Optional[CaptureSettings],
+                 volts: Optional[NDArray[np.float64]]=None) -> None:
+        self._codes: Optional[NDArray[np.uint8]] = codes
+        self._settings: Optional[CaptureSettings] = settings
+        self._volts: Optional[NDArray[np.float64]] = volts
+
+    @classmethod
+    def from_volts(cls, volts: NDArray[np.float64]) -> 'Capture': return cls(None, None, np.asarray(volts, dtype=np.float64))
+
+    def _convert(self) -> NDArray[np.float64]:
+        fir_filter: FilterSpec = self._settings.fir_filter
+        # A moving average and the code to volt conversion are done in one table lookup on the summed codes.
+        if fir_filter.filter_type in (FilterType.BOXCAR, FilterType.NONE):
+            window_length: int = fir_filter.length if fir_filter.filter_type == FilterType.BOXCAR else 1
+            with stage_timings.measure(timing.RECONSTRUCT):
+                return conversion_table(self._settings, window_length)[window_sums(self._codes, window_length)]
+        with stage_timings.measure(timing.RECONSTRUCT):
+            volts = conversion_table(self._settings, 1)[self._codes]
+        with stage_timings.measure(timing.FILTER):
+            return apply_filter(volts, fir_filter, self._settings.fs)
+
+    @property
+    def volts(self) -> NDArray[np.float64]:
+        if self._volts is None:
+            self._volts = self._convert()
+        return self._volts
+
+    @property
+    def converted(self) -> bool: return self._volts is not None
+
+    # None for drivers without raw codes
+    @property
+    def codes(self) -> Optional[NDArray[np.uint8]]: return self._codes
+
+    @property
+    def settings(self) -> Optional[CaptureSettings]: return self._settings
+
+    def copy(self) -> 'Capture':
+        '''A capture that owns its codes, for keeping one whose buffer the driver reuses. Volts are not copied.'''
+        if self._codes is None:
+            return Capture.from_volts(self._volts.copy())
+        return Capture(self._codes.copy(), self._settings)
+
+    def code_histogram(self) -> NDArray[np.int64]:
+        '''How many samples took each of the 256 codes, without a conversion to volts.'''
+        if self._codes is None:
+            raise ValueError('The capture has no raw codes.')
+        return np.bincount(self._codes, minlength=256)
+
+    # The stored size, codes for captures that have them
+    @property
+    def nbytes(self) -> int: return self._codes.nbytes if self._codes is not None else self._volts.nbytes
+
+    # The number of volts samples, known without converting
+    def __len__(self) -> int:
+        if self._volts is not None or self._codes is None:
+            return len(self._volts)
+        return max(len(self._codes) - (self._settings.fir_filter.length - 1), 0)
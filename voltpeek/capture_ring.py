@@ -0,0 +1,96 @@
+from typing import Any, Optional
+from threading import Lock
+from time import perf_counter
+
+import numpy as np
+from numpy.typing import NDArray
+
+class CaptureRing:
+    '''
+    A small ring of capture buffers shared by one writer (the scope worker) and one reader (the display).
+    The writer fills a buffer that is neither the newest capture nor the one held by the reader, so the
+    next capture can run while the previous one is drawn. The reader always takes the newest capture and
+    any capture it never took is dropped. Each capture can carry metadata, such as the settings that convert
+    its codes.
+    '''
+    def __init__(self, slot_count: int) -> None:
+        if slot_count < 2:
+            raise ValueError('A capture ring needs at least two slots.')
+        self._slot_count: int = slot_count
+        # Buffers are allocated on the first capture and only grow if a longer capture arrives.
+        self._slots: list[Optional[NDArray]] = [None for _ in range(0, slot_count)]
+        self._lengths: list[int] = [0 for _ in range(0, slot_count)]
+        self._metadata: list[Any] = [None for _ in range(0, slot_count)]
+        # perf_counter time each capture was published
+        self._times: list[float] = [0 for _ in range(0, slot_count)]
+        self._newest: Optional[int] = None
+        self._held: Optional[int] = None
+        self._dropped: int = 0
+        self._lock: Lock = Lock()
+
+    def _free_slot(self) -> Optional[int]:
+        for i in range(0, self._slot_count):
+            if i != self._newest and i != self._held:
+                return i
+        return None
+
+    @property
+    def has_free_slot(self) -> bool:
+        with self._lock:
+            return self._free_slot() is not None
+
+    # Set while a capture waits that the reader has not taken.
+    @property
+    def has_newest(self) -> bool:
+        with self._lock:
+            return self._newest is not None
+
+    def publish(self, capture: NDArray, metadata: Any=None) -> bool:
+        with self._lock:
+            slot: Optional[int] = self._free_slot()
+            if slot is None:
+                self._dropped += 1
+                return False
+        # Only the writer touches a free slot so the copy does not need the lock.
+        capture = np.asarray(capture)
+        if self._slots[slot] is None or len(capture) > len(self._slots[slot]) or capture.dtype != self._slots[slot].dtype:
+            self._slots[slot] = np.zeros(len(capture), dtype=capture.dtype)
+        self._slots[slot][:len(capture)] = capture
+        with self._lock:
+            self._lengths[slot] = len(capture)
+            self._metadata[slot] = metadata
+            self._times[slot] = perf_counter()
+            if self._newest is not None:
+                self._dropped += 1
+            self._newest = slot
+        return True
+
+    def take_latest(self) -> Optional[NDArray]:
+        with self._lock:
+            if self._newest is not None:
+                self._held = self._newest
+                self._newest = None
+            return self._held_view()
+
+    def _held_view(self) -> Optional[NDArray]:
+        if self._held is None:
+            return None
+        return self._slots[self._held][:self._lengths[self._held]]
+
+    @property
+    def held(self) -> Optional[NDArray]:
+        with self._lock:
+            return self._held_view()
+
+    @property
+    def held_time(self) -> Optional[float]:
+        with self._lock:
+            return None if self._held is None else self._times[self._held]
+
+    @property
+    def held_metadata(self) -> Any:
+        with self._lock:
+            return None if self._held is None else self._metadata[self._held]
+
+    @property
+    def dropped(self) -> int: return self._dropped
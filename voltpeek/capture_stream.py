@@ -0,0 +1,115 @@
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from threading import Condition
+from typing import Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+class BackPressure(Enum):
+    # Pause acquisition until the consumer frees a buffer.
+    BLOCK = 'block'
+    # Replace the oldest capture the consumer has not taken yet.
+    DROP_OLDEST = 'drop_oldest'
+    # Discard the new capture.
+    DROP_NEWEST = 'drop_newest'
+
+@dataclass(frozen=True)
+class StreamedCapture:
+    data: NDArray[np.float64]
+    sequence: int
+    # perf_counter time the capture arrived
+    time: float
+    dropped: int
+
+class CaptureStream:
+    '''
+    A fixed pool of capture buffers between one producer and one consumer. The producer copies each capture
+    into a free buffer and the consumer takes them in order. A taken capture is a view that stays valid until
+    the next take. When every buffer is full the back pressure policy decides what happens, so memory never
+    grows past the pool. Sequence numbers count every capture offered, including dropped ones.
+    '''
+    def __init__(self, slot_count: int, capture_length: int, policy: BackPressure) -> None:
+        if slot_count < 2:
+            raise ValueError('A capture stream needs at least two buffers.')
+        self._policy: BackPressure = policy
+        self._slots: NDArray[np.float64] = np.zeros((slot_count, capture_length), dtype=np.float64)
+        self._lengths: list[int] = [0 for _ in range(0, slot_count)]
+        self._free: deque[int] = deque(range(0, slot_count))
+        # (slot, sequence, time) of captures waiting for the consumer, oldest first
+        self._ready: deque[tuple[int, int, float]] = deque()
+        self._held: Optional[int] = None
+        self._sequence: int = 0
+        self._dropped: int = 0
+        self._closed: bool = False
+        self._error: Optional[Exception] = None
+        self._condition: Condition = Condition()
+
+    def wait_for_space(self, timeout: Optional[float]=None) -> bool:
+        '''Wait until a buffer is free. Returns False if the stream closed or the timeout expired.'''
+        with self._condition:
+            self._condition.wait_for(lambda: len(self._free) > 0 or self._closed, timeout)
+            return len(self._free) > 0 and not self._closed
+
+    def publish(self, capture: NDArray[np.float64], time: float) -> bool:
+        if len(capture) > self._slots.shape[1]:
+            raise ValueError('The capture is longer than the stream buffers.')
+        with self._condition:
+            self._sequence += 1
+            sequence: int = self._sequence
+            if len(self._free) == 0:
+                if self._policy == BackPressure.BLOCK:
+                    self._condition.wait_for(lambda: len(self._free) > 0 or self._closed)
+                elif self._policy == BackPressure.DROP_NEWEST:
+                    self._dropped += 1
+                    return False
+                else:
+                    self._free.append(self._ready.popleft()[0])
+                    self._dropped += 1
+            if self._closed:
+                return False
+            slot: int = self._free.popleft()
+        # The slot belongs to the producer until it is queued, so the copy does not need the lock.
+        self._slots[slot, :len(capture)] = capture
+        self._lengths[slot] = len(capture)
+        with self._condition:
+            self._ready.append((slot, sequence, time))
+            self._condition.notify_all()
+        return True
+
+    def take(self, timeout: Optional[float]=None) -> Optional[StreamedCapture]:
+        '''Release the previous capture and return the oldest waiting one, None if the stream closed first.'''
+        with self._condition:
+            if self._held is not None:
+                self._free.append(self._held)
+                self._held = None
+                self._condition.notify_all()
+            self._condition.wait_for(lambda: len(self._ready) > 0 or self._closed, timeout)
+            if len(self._ready) == 0:
+                return None
+            slot, sequence, time = self._ready.popleft()
+            self._held = slot
+            return StreamedCapture(self._slots[slot, :self._lengths[slot]], sequence, time, self._dropped)
+
+    def close(self, error: Optional[Exception]=None) -> None:
+        with self._condition:
+            self._closed = True
+            if error is not None:
+                self._error = error
+            self._condition.notify_all()
+
+    @property
+    def policy(self) -> BackPressure: return self._policy
+
+    @property
+    def closed(self) -> bool: return self._closed
+
+    @property
+    def error(self) -> Optional[Exception]: return self._error
+
+    @property
+    def dropped(self) -> int: return self._dropped
+
+    @property
+    def pending(self) -> int: return len(self._ready)
@@ -35,9 +35,46 @@
 
 <b>probe10</b> - Multiply readings and scales by 10. <br><br>
 
-<b>cal</b> - Recalibrate the oscilloscope offsets. Scope input must be disconnected. <br><br>
+<b>cal</b> {reference volts} - Recalibrate the oscilloscope offsets. Scope input must be disconnected. Each vertical 
+setting is averaged over repeated captures until the mean settles, and the mean and noise of each setting are printed. 
+With a reference voltage, for example "cal 0.5", apply that voltage to the input after the offsets are calibrated and the 
+gain of every vertical setting that can hold it is calibrated too. <br><br>
+
+<b>clearcal</b> - Forget the cached calibration offsets of the connected scopes and read them from the scopes again. 
+Offsets are cached per USB serial number so reconnecting a known scope is faster. Without a connected scope the offsets 
+of every cached scope are forgotten. Gains from "cal volts" are kept, running it again replaces them. <br><br>
 
 <b>png</b> - Export a png of the current graticule display. <br><br>
+
+<b>filter</b> {filter} - Set the digital filter applied to each capture. The filter is "none", "boxcar:{length}" for a 
+moving average or "sinc:{length}" for a windowed sinc low pass. For example "filter sinc:63". <br><br>
+
+<b>peak</b> - Toggle peak detect. At slow horizontal scales each pixel column is drawn as a span from the minimum to the 
+maximum sample it covers, so narrow glitches between pixel columns stay visible. <br><br>
+
+<b>zoom</b> - Enter adjust mode to zoom and pan the held capture while the trigger is stopped or after a single 
+trigger. "k" and "j" step the horizontal scale in and out, "h" and "l" move the view one division. Nothing is sent to the 
+scope. Leaving adjust mode returns to the acquired horizontal scale. <br><br>
+
+<b>history</b> {prev|next|live} - Step through the most recent captures of each scope. "history prev" shows the 
+capture before the one on the display and "history next" the one after it, with its capture time printed. Captures keep 
+being taken and stored while an older one is shown, "history live" returns to them. The history is stored as raw samples 
+and is capped at 32 MB per scope. The captures looked at least recently are dropped first. <br><br>
+
+<b>timing</b> - Print the p50 and p99 time of each stage from the USB transfer to the display, and how long each 
+scope event waited in the queue. Settings requested again before the scope received them are only sent once, and the 
+number of events skipped this way is printed for each scope. Timing is always collected with --debug, otherwise the first timing command starts it. 
+The readout shows the USB and render times while timing is collected. <br><br>
+
+<b>stats</b> - Print the acquisition statistics of each scope: the waveforms per second, the dead time from arming the 
+scope to the capture arriving, and the number of incomplete captures, timeouts, stopped triggers and read errors. The 
+readout shows the rate, the dead time and the missed captures. "stats reset" clears the statistics. <br><br>
+
+<b>rec</b> - "rec start directory" writes the raw samples and settings of every capture to the directory, in a 
+scope0 folder for the first scope and so on. The files are written in the background, if the disk falls behind 
+captures are dropped rather than slowing the scope down. "rec stop" finishes the recording and prints the captures 
+written, the write rate and the captures dropped. "rec" prints the same while recording. A recording is read back 
+with voltpeek.recorder.read_recording. <br><br>
 '''
 
 EXIT: str = 'exit'
@@ -58,7 +95,21 @@ ADJUST_CURS: str = 'adjustcurs'
 PROBE_1: str = 'probe1'
 PROBE_10: str = 'probe10'
 CAL: str = 'cal'
+CLEAR_CAL: str = 'clearcal'
 PNG: str = 'png'
+FILTER: str = 'filter'
+PEAK_DETECT: str = 'peak'
+TIMING: str = 'timing'
+STATS: str = 'stats'
+STATS_RESET: str = 'reset'
 ROLL: str = 'roll'
-
-ADJUST_COMMANDS: tuple[str, str, str] = (SCALE, TRIGGER_LEVEL, ADJUST_CURS)
\ No newline at end of file
+ZOOM: str = 'zoom'
+HISTORY: str = 'history'
+HISTORY_PREVIOUS: str = 'prev'
+HISTORY_NEXT: str = 'next'
+HISTORY_LIVE: str = 'live'
+REC: str = 'rec'
+REC_START: str = 'start'
+REC_STOP: str = 'stop'
+
+ADJUST_COMMANDS: tuple[str, str, str, str] = (SCALE, TRIGGER_LEVEL, ADJUST_CURS, ZOOM)
\ No newline at end of file
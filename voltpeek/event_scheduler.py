@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from enum import Enum
+from time import perf_counter
+from typing import Optional
+
+from voltpeek.timing import QUEUE_WAIT_PREFIX, StageTimings
+
+@dataclass
+class _PendingEvent:
+    event: Enum
+    # perf_counter time the first event it replaced was added
+    added: float
+
+class EventScheduler:
+    '''
+    The pending start events of one scope. Events of a lower priority number are taken first and events of
+    equal priority keep the order they were added in. An event with a group replaces a pending event of the
+    same group where it stands, since only the latest setting matters. How long each event waited until it
+    was taken is recorded in the stage timings.
+    '''
+    def __init__(self, priorities: dict[Enum, int], groups: dict[Enum, str],
+                 timings: Optional[StageTimings]=None) -> None:
+        self._priorities: dict[Enum, int] = priorities
+        self._groups: dict[Enum, str] = groups
+        self._timings: Optional[StageTimings] = timings
+        self._queues: list[list[_PendingEvent]] = [[] for _ in range(0, max(priorities.values(), default=0) + 1)]
+        # Events that replaced a pending event instead of being queued
+        self.coalesced: int = 0
+
+    def add(self, event: Enum) -> None:
+        queue: list[_PendingEvent] = self._queues[self._priorities.get(event, 0)]
+        group: Optional[str] = self._groups.get(event)
+        if group is not None:
+            for pending in queue:
+                if self._groups.get(pending.event) == group:
+                    pending.event = event
+                    self.coalesced += 1
+                    return
+        queue.append(_PendingEvent(event, perf_counter()))
+
+    def _head_queue(self) -> Optional[list[_PendingEvent]]:
+        for queue in self._queues:
+            if len(queue) > 0:
+                return queue
+        return None
+
+    def peek(self) -> Optional[Enum]:
+        queue: Optional[list[_PendingEvent]] = self._head_queue()
+        return None if queue is None else queue[0].event
+
+    def pop(self) -> Enum:
+        queue: Optional[list[_PendingEvent]] = self._head_queue()
+        if queue is None:
+            raise IndexError('pop from an empty scheduler')
+        pending: _PendingEvent = queue.pop(0)
+        if self._timings is not None:
+            self._timings.record(f'{QUEUE_WAIT_PREFIX}{pending.event.name}', perf_counter() - pending.added)
+        return pending.event
+
+    # Remove every pending event of this kind.
+    def discard(self, event: Enum) -> None:
+        for queue in self._queues:
+            queue[:] = [pending for pending in queue if pending.event != event]
+
+    def clear(self) -> None: [queue.clear() for queue in self._queues]
+
+    def __len__(self) -> int: return sum(len(queue) for queue in self._queues)
+
+    # Pending events in the order they will be taken
+    def __iter__(self): return (pending.event for queue in self._queues for pending in queue)
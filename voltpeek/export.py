@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 from tkinter import filedialog
-import itertools
 
+import numpy as np
+from numpy.typing import NDArray
 from PIL import Image, ImageDraw, ImageFont 
 
 from voltpeek.cursors import Cursor_Data
@@ -11,12 +12,11 @@ class ExportSettings:
     vertical_setting: float
     horizontal_setting: float
     probe_div: int
-    map: list[list[tuple[int]]]
+    map: NDArray[np.uint8]
     cursor_data: Cursor_Data
 
-def export_png(settings: ExportSettings, filename: str, image_size: int):
-    image = Image.new('RGB', (image_size, image_size))
-    image.putdata(list(itertools.chain.from_iterable(settings.map)))
+def render_png(settings: ExportSettings) -> Image.Image:
+    image = Image.fromarray(settings.map)
     font = ImageFont.load_default()
     draw = ImageDraw.Draw(image)
     y_offset = 5
@@ -28,6 +28,10 @@ def export_png(settings: ExportSettings, filename: str, image_size: int):
         if value:
             draw.text((10, y_offset), f"{key}: {value}", font=font, fill='white')
             y_offset += 10
+    return image
+
+def export_png(settings: ExportSettings, filename: str):
+    image = render_png(settings)
     save_path = filedialog.asksaveasfilename(defaultextension='.png', filetypes=[('PNG files', '*.png')], initialfile=filename+'.png')
     if save_path:
         image.save(save_path)
\ No newline at end of file
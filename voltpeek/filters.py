@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy import signal
+
+class FilterType(Enum):
+    NONE = 'none'
+    BOXCAR = 'boxcar'
+    SINC = 'sinc'
+
+@dataclass(frozen=True)
+class FilterSpec:
+    filter_type: FilterType
+    length: int
+
+    def __str__(self) -> str:
+        return self.filter_type.value if self.filter_type == FilterType.NONE else f'{self.filter_type.value}:{self.length}'
+
+NO_FILTER = FilterSpec(FilterType.NONE, 1)
+
+# Windowed sinc cutoff, this is roughly the analog bandwidth of the NS1 front end.
+SINC_CUTOFF: float = 10e6
+# The cutoff is pulled below nyquist at low sample rates.
+SINC_MAX_CUTOFF_FRACTION: float = 0.45
+# Kernels at least this long are applied with overlap add instead of direct convolution.
+OVERLAP_ADD_LENGTH: int = 64
+MAX_FILTER_LENGTH: int = 1025
+
+def parse_filter(filter_text: str) -> FilterSpec:
+    '''Parse a filter argument such as none, boxcar:5 or sinc:63.'''
+    filter_name, _, length_text = filter_text.partition(':')
+    try:
+        filter_type = FilterType(filter_name)
+    except ValueError:
+        raise ValueError(f'Unknown filter type {filter_name}.')
+    if filter_type == FilterType.NONE:
+        return NO_FILTER
+    if not length_text.isdigit() or not 1 <= int(length_text) <= MAX_FILTER_LENGTH:
+        raise ValueError(f'Filter length must be between 1 and {MAX_FILTER_LENGTH}.')
+    return FilterSpec(filter_type, int(length_text))
+
+@lru_cache(maxsize=32)
+def get_kernel(filter_type: FilterType, length: int, fs: float) -> NDArray[np.float64]:
+    if filter_type == FilterType.NONE:
+        kernel = np.ones(1)
+    elif filter_type == FilterType.BOXCAR:
+        kernel = np.full(length, 1/length)
+    else:
+        kernel = signal.firwin(length, min(SINC_CUTOFF, SINC_MAX_CUTOFF_FRACTION*fs), fs=fs, window='hamming')
+    # Kernels are shared between callers through the cache.
+    kernel.setflags(write=False)
+    return kernel
+
+def running_average(xx: NDArray, length: int) -> NDArray[np.float64]:
+    sums = np.cumsum(xx, dtype=np.float64)
+    window_sums = sums[length-1:].copy()
+    window_sums[1:] -= sums[:-length]
+    return np.multiply(window_sums, 1/length)
+
+def apply_filter(xx: NDArray, filter_spec: FilterSpec, fs: float) -> NDArray[np.float64]:
+    '''Filter xx in valid mode, the result is filter_spec.length - 1 samples shorter than the input.'''
+    if filter_spec.filter_type == FilterType.NONE or filter_spec.length == 1:
+        return np.asarray(xx, dtype=np.float64)
+    if filter_spec.filter_type == FilterType.BOXCAR:
+        return running_average(xx, filter_spec.length)
+    kernel = get_kernel(filter_spec.filter_type, filter_spec.length, fs)
+    if filter_spec.length >= OVERLAP_ADD_LENGTH:
+        return signal.oaconvolve(xx, kernel, mode='valid')
+    return np.convolve(xx, kernel, mode='valid')
@@ -3,6 +3,7 @@ from tkinter import ttk
 
 from voltpeek import constants
 
+from voltpeek.acquisition_stats import AcquisitionSnapshot
 from voltpeek.cursors import Cursor_Data
 from voltpeek.trigger import EdgeType
 
@@ -13,6 +14,11 @@ class Readout:
     RMS_STRING: str = 'rms: '
     PROBE_STRING: str = 'probe: '
     TRIGGER_STRING: str = 'trigger: '
+    USB_STRING: str = 'usb p50: '
+    RENDER_STRING: str = 'render p50: '
+    RATE_STRING: str = 'rate: '
+    DEAD_TIME_STRING: str = 'dead time: '
+    MISSED_STRING: str = 'missed: '
     BACKGROUND_COLOR: str = 'black'
 
     def __init__(self, master: tk.Tk, vertical_setting: float, horizontal_setting: float) -> None:
@@ -33,6 +39,11 @@ class Readout:
         self._probe_text: tk.StringVar = tk.StringVar()
         self._average_text: tk.StringVar = tk.StringVar()
         self._rms_text: tk.StringVar = tk.StringVar()
+        self._rate_text: tk.StringVar = tk.StringVar()
+        self._dead_time_text: tk.StringVar = tk.StringVar()
+        self._missed_text: tk.StringVar = tk.StringVar()
+        self._usb_time_text: tk.StringVar = tk.StringVar()
+        self._render_time_text: tk.StringVar = tk.StringVar()
         self._cursor_text = {
             'h1': tk.StringVar(),
             'h2': tk.StringVar(),
@@ -68,6 +79,9 @@ class Readout:
             tk.Label(self.frame, textvariable=self._probe_text, **label_style),
             tk.Label(self.frame, textvariable=self._average_text, **label_style),
             tk.Label(self.frame, textvariable=self._rms_text, **label_style),
+            tk.Label(self.frame, textvariable=self._rate_text, **label_style),
+            tk.Label(self.frame, textvariable=self._dead_time_text, **label_style),
+            tk.Label(self.frame, textvariable=self._missed_text, **label_style),
         ]
         self.cursor_labels = []
         for key in self._cursor_text:
@@ -77,6 +91,11 @@ class Readout:
                 **label_style
             )
             self.cursor_labels.append(label)
+        # Only shown once stage timings are reported.
+        self.timing_labels = [
+            tk.Label(self.frame, textvariable=self._usb_time_text, **label_style),
+            tk.Label(self.frame, textvariable=self._render_time_text, **label_style),
+        ]
 
     def get_vertical_str(self) -> str: return f'{self._vertical_setting} V/div'
 
@@ -90,6 +109,22 @@ class Readout:
 
     def set_probe(self, probe_div: int) -> None: self._probe_text.set(f"{self.PROBE_STRING}{probe_div}X")
 
+    def set_acquisition(self, snapshot: AcquisitionSnapshot) -> None:
+        if snapshot.capture_rate is not None:
+            self._rate_text.set(f"{self.RATE_STRING}{snapshot.capture_rate:.1f} wfm/s")
+        if snapshot.dead_time is not None:
+            self._dead_time_text.set(f"{self.DEAD_TIME_STRING}{snapshot.dead_time*1e3:.2f} ms")
+        # Stopped triggers are expected and not counted.
+        self._missed_text.set(f"{self.MISSED_STRING}{snapshot.incomplete + snapshot.timeouts + snapshot.errors}")
+
+    def set_timing(self, usb_seconds: float, render_seconds: float) -> None:
+        self._usb_time_text.set(f"{self.USB_STRING}{usb_seconds*1e3:.2f} ms")
+        self._render_time_text.set(f"{self.RENDER_STRING}{render_seconds*1e3:.2f} ms")
+        # Below the status, the main labels, the cursor separator and the cursor labels
+        base_row = len(self.main_labels) + len(self.cursor_labels) + 3
+        for i, label in enumerate(self.timing_labels):
+            label.grid(row=base_row + i, column=0, sticky='ew')
+
     def set_trigger_type(self, trigger_type: EdgeType):
         trigger_character = '/' if trigger_type == EdgeType.RISING_EDGE else '\\'
         self._trigger_text.set(f"{self.TRIGGER_STRING}{trigger_character}")
@@ -125,6 +160,9 @@ class Readout:
         self._horizontal_text.set(self.get_horizontal_str())
         self._average_text.set(f"{self.AVERAGE_STRING}----")
         self._rms_text.set(f"{self.RMS_STRING}----")
+        self._rate_text.set(f"{self.RATE_STRING}----")
+        self._dead_time_text.set(f"{self.DEAD_TIME_STRING}----")
+        self._missed_text.set(f"{self.MISSED_STRING}0")
         self.frame.grid_columnconfigure(0, weight=1)
         self.frame.grid(sticky=tk.N, row=scope_index, column=1, padx=constants.Application.PADDING, pady=constants.Application.PADDING)
 
@@ -1,14 +1,16 @@
 from typing import Optional
 
 import tkinter as tk
-from scipy.interpolate import interp1d
 import numpy as np
 from numpy.typing import NDArray
 
-from voltpeek import constants 
+from voltpeek import constants, raster, timing
 
 from voltpeek.cursors import Cursors, Selected_Cursor
+from voltpeek.pyramid import MinMaxPyramid
 from voltpeek.trigger import EdgeType
+from voltpeek.resample import Resampler, quantize_vertical
+from voltpeek.timing import stage_timings
 
 class Scope_Display:
     BACKGROUND_COLOR = (0, 0, 0)
@@ -18,6 +20,10 @@ class Scope_Display:
     TRIGGER_COLOR = (255, 255, 255)
     MAX_TRIGGER_CORRECTION_PIXELS: int = 6
     DASH_PATTERN = (4, 2) # 4 pixels on 2 off
+    TRACE_WIDTH: int = 3
+    # Cursors and the trigger line are kept above the traces.
+    OVERLAY_TAG: str = 'overlay'
+    RECORD_TAG: str = 'record'
 
     COURSE_STEP = 10
     FINE_STEP = 1
@@ -27,9 +33,17 @@ class Scope_Display:
     def __init__(self, master: tk.Tk, cursors: Optional[Cursors], size: int) -> None:
         self.master: tk.Tk = master        
         self._size = size
+        self._resampler: Resampler = Resampler(size)
         self.frame = tk.Frame(self.master)
         self.canvas = tk.Canvas(self.frame, height=self._size, width=self._size, bg=self._hex_string_from_rgb(self.BACKGROUND_COLOR))
-        self._draw_grid()
+        # Canvas items are created once and moved with coords on every frame.
+        self._grid_items: list[tuple[int, int]] = self._create_grid()
+        self._trace_items: list[int] = []
+        self._cursor_items: dict[Selected_Cursor, int] = {cursor: self._create_overlay_line(constants.Display.CURSOR_COLOR) 
+                                                          for cursor in Selected_Cursor}
+        self._trigger_item: int = self._create_overlay_line(self._hex_string_from_rgb(self.TRIGGER_COLOR))
+        self._display_vectors = []
+        self._display_envelopes = []
         self.cursors: Optional[Cursors] = cursors
         self._trigger_level: int = 0
         self._trigger_set: bool = False
@@ -37,6 +51,7 @@ class Scope_Display:
         self._record: list[float] = None
         self._record_index: int = 0
         self._time_shift: float = 0
+        self.peak_detect: bool = False
 
     def __call__(self):
         self.canvas.pack()
@@ -45,28 +60,41 @@ class Scope_Display:
     def init_vectors(self, scope_count: int): 
         self._vectors = [None for _ in range(0, scope_count)]
         self._display_vectors = [None for _ in range(0, scope_count)]
-
-    def _draw_grid(self) -> None:
+        # Quantized (min, max) pair of every pixel column when peak detect is in use
+        self._display_envelopes = [None for _ in range(0, scope_count)]
+        # Built from a held capture the first time it is zoomed
+        self._pyramids: list[Optional[MinMaxPyramid]] = [None for _ in range(0, scope_count)]
+        for trace_item in self._trace_items:
+            self.canvas.delete(trace_item)
+        self._trace_items = [self.canvas.create_line(0, 0, 0, 0, fill=self._hex_string_from_rgb(self.SIGNAL_COLORS[i]), 
+                                                     width=self.TRACE_WIDTH, capstyle=tk.PROJECTING, state=tk.HIDDEN) 
+                             for i in range(0, scope_count)]
+        self.canvas.tag_raise(self.OVERLAY_TAG)
+
+    def _create_grid(self) -> list[tuple[int, int]]:
+        grid_items = [(self.canvas.create_line(0, 0, 0, 0, fill=self._hex_string_from_rgb(self.GRID_LINE_COLOR)), 
+                       self.canvas.create_line(0, 0, 0, 0, fill=self._hex_string_from_rgb(self.GRID_LINE_COLOR))) 
+                      for _ in range(0, constants.Display.GRID_LINE_COUNT)]
+        self._place_grid(grid_items)
+        return grid_items
+
+    def _place_grid(self, grid_items: list[tuple[int, int]]) -> None:
         grid_spacing:int = int(self._size/constants.Display.GRID_LINE_COUNT)
-        for i in range(1, constants.Display.GRID_LINE_COUNT+1):
-            # Draw Vertical Grid Lines
-            self.canvas.create_line(grid_spacing*i, 0, grid_spacing*i, self._size, fill=self._hex_string_from_rgb(self.GRID_LINE_COLOR))
-            # Draw Horizontal Grid Lines
-            self.canvas.create_line(0, grid_spacing*i,  self._size, grid_spacing*i, fill=self._hex_string_from_rgb(self.GRID_LINE_COLOR))
+        for i, (vertical_item, horizontal_item) in enumerate(grid_items, start=1):
+            self.canvas.coords(vertical_item, grid_spacing*i, 0, grid_spacing*i, self._size)
+            self.canvas.coords(horizontal_item, 0, grid_spacing*i,  self._size, grid_spacing*i)
+
+    def _create_overlay_line(self, color: str) -> int:
+        return self.canvas.create_line(0, 0, 0, 0, fill=color, state=tk.HIDDEN, tags=self.OVERLAY_TAG)
                         
     def _quantize_vertical(self, vector: list[float], vertical_setting: float) -> list[int]:
-        pixel_resolution: float = vertical_setting/(self._size/constants.Display.GRID_LINE_COUNT)
-        return np.add(np.multiply(vector, 1/pixel_resolution), int(self._size/2))
+        return quantize_vertical(vector, vertical_setting, self._size)
 
     def _resample_horizontal_vector(self, vector: NDArray[np.float64], hor_setting: float, vert_setting: float, 
                                     fs: float, memory_depth: int, edge: EdgeType, triggered: bool, time_shift: bool) -> list[int]:
-        # Fill value is -100 because the signal can never possibly reach this amplitude. This distinguishes real signal vs out of horizontal capture.
-        f = interp1d(np.arange(len(vector))/fs, vector, kind='linear', fill_value=-100, bounds_error=False)
-        new_T: float = (hor_setting)/(self._size/constants.Display.GRID_LINE_COUNT)
-        chop_time: float = (1/fs)*memory_depth - hor_setting*constants.Display.GRID_LINE_COUNT
         hor_pixel_time: float = hor_setting/(self._size/constants.Display.GRID_LINE_COUNT)
         set_trigger_voltage: float = self.get_trigger_voltage(vert_setting)
-        centered_vector: list[float] = f(np.add(np.arange(self._size)*new_T,(chop_time/2)))
+        centered_vector: NDArray[np.float64] = self._resampler.resample(vector, hor_setting, fs)
         if triggered:
             # Trigger Position Correction
             trigger_crossings = np.where(np.diff(np.sign(np.subtract(centered_vector, set_trigger_voltage))))[0]
@@ -76,13 +104,12 @@ class Scope_Display:
                 error_magnitude_time = np.abs(trigger_crossings[error_distance_index] - (self._size//2)+1)*hor_pixel_time 
                 if error_sign:
                     self._time_shift = error_magnitude_time
-                    return f((np.arange(self._size)*new_T) + (chop_time/2) + error_magnitude_time) 
                 else:
                     self._time_shift = -1*error_magnitude_time
-                    return f((np.arange(self._size)*new_T) + (chop_time/2) - error_magnitude_time) 
+                return self._resampler.resample(vector, hor_setting, fs, self._time_shift)
             return []
         elif time_shift:
-            return f((np.arange(self._size)*new_T) + (chop_time/2) + self._time_shift)
+            return self._resampler.resample(vector, hor_setting, fs, self._time_shift)
         else:
             return centered_vector
 
@@ -96,15 +123,59 @@ class Scope_Display:
         if len(self._vectors[scope_index]) == memory_depth-(FIR_length-1):
             # Horizontal resampling must be done before vertical quantization because amplitude information is 
             # needed for trigger point interpolation.
-            if scope_index == 0:
-                self._display_vectors[scope_index] = self._resample_horizontal_vector(self._vectors[scope_index], hor_setting, vert_setting, 
-                                                                        fs, memory_depth-(FIR_length-1), edge, triggered, False)
-            else:
-                self._display_vectors[scope_index] = self._resample_horizontal_vector(self._vectors[scope_index], hor_setting, vert_setting, 
-                                                                        fs, memory_depth-(FIR_length-1), edge, False, True)
+            with stage_timings.measure(timing.RESAMPLE):
+                if scope_index == 0:
+                    self._display_vectors[scope_index] = self._resample_horizontal_vector(self._vectors[scope_index], hor_setting, vert_setting, 
+                                                                            fs, memory_depth-(FIR_length-1), edge, triggered, False)
+                else:
+                    self._display_vectors[scope_index] = self._resample_horizontal_vector(self._vectors[scope_index], hor_setting, vert_setting, 
+                                                                            fs, memory_depth-(FIR_length-1), edge, False, True)
             if len(self._display_vectors[scope_index]) > 0:
-                self._display_vectors[scope_index] = self._quantize_vertical(self._display_vectors[scope_index], vert_setting)
-                self._redraw()
+                with stage_timings.measure(timing.QUANTIZE):
+                    self._display_vectors[scope_index] = self._quantize_vertical(self._display_vectors[scope_index], vert_setting)
+                    self._display_envelopes[scope_index] = self._resample_envelope(self._vectors[scope_index], hor_setting, 
+                                                                                   vert_setting, fs, triggered or scope_index != 0)
+                with stage_timings.measure(timing.DRAW):
+                    self._redraw()
+
+    def _resample_envelope(self, vector: NDArray[np.float64], hor_setting: float, vert_setting: float, fs: float, 
+                           time_shift: bool) -> Optional[tuple[NDArray[np.float64], NDArray[np.float64]]]:
+        if not self.peak_detect or not self._resampler.peak_detect_available(hor_setting, fs):
+            return None
+        mins, maxs = self._resampler.min_max(vector, hor_setting, fs, self._time_shift if time_shift else 0)
+        return self._quantize_vertical(mins, vert_setting), self._quantize_vertical(maxs, vert_setting)
+
+    def _pyramid(self, scope_index: int) -> MinMaxPyramid:
+        if self._pyramids[scope_index] is None:
+            self._pyramids[scope_index] = MinMaxPyramid(self._vectors[scope_index])
+        return self._pyramids[scope_index]
+
+    def resample_zoom(self, hor_setting: float, vert_setting: float, fs: float, offset: float, triggered: bool) -> None:
+        '''
+        Redraw the held captures at hor_setting with the view centre moved offset seconds from the trigger point,
+        without a new capture. The trigger position correction of the held capture is kept. Zoomed out past one
+        sample per pixel column, each column is reduced from the min/max pyramid instead of interpolated, so
+        every sample counts and the trace does not alias. The trace is the middle of each column's span.
+        '''
+        samples_per_column: float = self._resampler.samples_per_column(hor_setting, fs)
+        with stage_timings.measure(timing.RESAMPLE):
+            for scope_index, vector in enumerate(self._vectors):
+                if vector is None or len(vector) == 0:
+                    continue
+                time_shift: float = offset + (self._time_shift if triggered or scope_index != 0 else 0)
+                self._display_envelopes[scope_index] = None
+                if samples_per_column <= 1:
+                    self._display_vectors[scope_index] = self._quantize_vertical(
+                        self._resampler.resample(vector, hor_setting, fs, time_shift), vert_setting)
+                    continue
+                sample_positions = self._resampler.sample_positions(hor_setting, fs, len(vector), time_shift)
+                mins, maxs = self._pyramid(scope_index).min_max(sample_positions, samples_per_column)
+                self._display_vectors[scope_index] = self._quantize_vertical((mins + maxs)/2, vert_setting)
+                if self.peak_detect and self._resampler.peak_detect_available(hor_setting, fs):
+                    self._display_envelopes[scope_index] = (self._quantize_vertical(mins, vert_setting), 
+                                                            self._quantize_vertical(maxs, vert_setting))
+        with stage_timings.measure(timing.DRAW):
+            self._redraw()
 
     def resample_record(self, vert_setting: float):
         print(self._record)
@@ -121,7 +192,6 @@ class Scope_Display:
         self._trigger_level: int = int(trigger_level)
         self._trigger_set = True
         self._redraw()
-        self._draw_trigger_level()
 
     def get_trigger_voltage(self, vertical_setting: float) -> float:
         pixel_resolution:float = vertical_setting/(self._size/constants.Display.GRID_LINE_COUNT)
@@ -143,101 +213,106 @@ class Scope_Display:
 
     def decrement_trigger_level_course(self) -> None: self._decrement_trigger_level(self.COURSE_STEP)
 
-    def _draw_horizontal_cursors(self) -> None:
-        if self.cursors.selected_cursor == Selected_Cursor.HOR1:
-            self._draw_dashed_horizontal_line(self.cursors.hor1_pos, constants.Display.CURSOR_COLOR)
+    def _place_cursor(self, cursor: Selected_Cursor, position: int, vertical: bool) -> None:
+        if vertical:
+            self.canvas.coords(self._cursor_items[cursor], position, 0, position, self._size)
         else:
-            self._draw_horizontal_line(self.cursors.hor1_pos, constants.Display.CURSOR_COLOR)  
-        if self.cursors.selected_cursor == Selected_Cursor.HOR2:
-            self._draw_dashed_horizontal_line(self.cursors.hor2_pos, constants.Display.CURSOR_COLOR)
+            self.canvas.coords(self._cursor_items[cursor], 0, position, self._size, position)
+        self.canvas.itemconfigure(self._cursor_items[cursor], state=tk.NORMAL, 
+                                  dash=self.DASH_PATTERN if self.cursors.selected_cursor == cursor else '')
+
+    def _update_cursors(self) -> None:
+        if self.cursors is not None and self.cursors.hor_visible:
+            self._place_cursor(Selected_Cursor.HOR1, self.cursors.hor1_pos, False)
+            self._place_cursor(Selected_Cursor.HOR2, self.cursors.hor2_pos, False)
         else:
-            self._draw_horizontal_line(self.cursors.hor2_pos, constants.Display.CURSOR_COLOR)
-
-    def _draw_vertical_cursors(self) -> None:
-        if self.cursors.selected_cursor == Selected_Cursor.VERT1:
-            self._draw_dashed_vertical_line(self.cursors.vert1_pos, constants.Display.CURSOR_COLOR)
-        else:
-            self._draw_vertical_line(self.cursors.vert1_pos, constants.Display.CURSOR_COLOR)
-        if self.cursors.selected_cursor == Selected_Cursor.VERT2:
-            self._draw_dashed_vertical_line(self.cursors.vert2_pos, constants.Display.CURSOR_COLOR)
+            self._hide(self._cursor_items[Selected_Cursor.HOR1], self._cursor_items[Selected_Cursor.HOR2])
+        if self.cursors is not None and self.cursors.vert_visible:
+            self._place_cursor(Selected_Cursor.VERT1, self.cursors.vert1_pos, True)
+            self._place_cursor(Selected_Cursor.VERT2, self.cursors.vert2_pos, True)
         else:
-            self._draw_vertical_line(self.cursors.vert2_pos, constants.Display.CURSOR_COLOR)
+            self._hide(self._cursor_items[Selected_Cursor.VERT1], self._cursor_items[Selected_Cursor.VERT2])
 
-    def _redraw(self) -> None:
-        self.canvas.delete('all')
-        self._draw_grid()
-        for i, display_vector in enumerate(self._display_vectors): 
-            if display_vector is not None and len(display_vector) > 0:
-                self._draw_vector(display_vector, self.SIGNAL_COLORS[i])
-        if self.cursors.hor_visible:
-            self._draw_horizontal_cursors()
-        if self.cursors.vert_visible:
-            self._draw_vertical_cursors()
+    def _update_trigger_level(self) -> None:
         if self._trigger_set:
-            self._draw_trigger_level()
+            self.canvas.coords(self._trigger_item, 0, self._trigger_level, self._size, self._trigger_level)
+            self.canvas.itemconfigure(self._trigger_item, state=tk.NORMAL)
+
+    def _hide(self, *items: int) -> None:
+        for item in items:
+            self.canvas.itemconfigure(item, state=tk.HIDDEN)
 
-    def _draw_vector(self, display_vector, color: tuple[int, int, int]):
-        y = self._size - np.array(display_vector)
+    def _redraw(self) -> None:
+        self.canvas.delete(self.RECORD_TAG)
+        for i, trace_item in enumerate(self._trace_items):
+            coords: list[float] = []
+            if self._display_envelopes[i] is not None:
+                coords = self._envelope_coords(*self._display_envelopes[i])
+            elif self._display_vectors[i] is not None and len(self._display_vectors[i]) > 0:
+                coords = self._vector_coords(self._display_vectors[i])
+            self._update_trace(trace_item, coords)
+        self._update_cursors()
+        self._update_trigger_level()
+
+    def _update_trace(self, trace_item: int, coords: list[float]) -> None:
+        # A line item needs at least two points.
+        if len(coords) < 4:
+            self._hide(trace_item)
+            return
+        self.canvas.coords(trace_item, coords)
+        self.canvas.itemconfigure(trace_item, state=tk.NORMAL)
+
+    def _vector_coords(self, display_vector) -> list[float]:
+        y = self._size - np.asarray(display_vector)
         y_filtered = y[y <= self._size]
         x = np.arange(len(display_vector))[y <= self._size]
-        coords = np.column_stack((x[1:], y_filtered[:-1], x[1:], y_filtered[1:])).reshape(-1).tolist()
-        self.canvas.create_line(*coords, fill=self._hex_string_from_rgb(color))
-        self.canvas.create_line(*[c + (0 if i % 2 == 0 else 1) for i, c in enumerate(coords)], fill=self._hex_string_from_rgb(color))
-        self.canvas.create_line(*[c - (0 if i % 2 == 0 else 1) for i, c in enumerate(coords)], fill=self._hex_string_from_rgb(color))
-        if len(x) > 0:
-            last_x, last_y = x[-1], y[-1]
-            for offset in [-1, 0, 1]:
-                self.canvas.create_line(last_x-1, last_y+offset, last_x+2, last_y+offset, fill=self._hex_string_from_rgb(color))
+        # Each pixel column steps vertically from the previous sample to its own.
+        return np.column_stack((x[1:], y_filtered[:-1], x[1:], y_filtered[1:])).reshape(-1).tolist()
+
+    def _envelope_spans(self, display_mins, display_maxs) -> tuple[NDArray, NDArray, NDArray]:
+        '''Pixel column, top row and bottom row of every column span inside the capture.'''
+        top = self._size - np.asarray(display_maxs)
+        bottom = self._size - np.asarray(display_mins)
+        in_capture = bottom <= self._size
+        return np.arange(len(top))[in_capture], top[in_capture], bottom[in_capture]
+
+    def _envelope_coords(self, display_mins, display_maxs) -> list[float]:
+        x, top, bottom = self._envelope_spans(display_mins, display_maxs)
+        if len(x) == 0:
+            return []
+        # A single polyline that zigzags through the span of each column, alternating the direction so
+        # neighbouring spans are joined at the same end.
+        ys = np.column_stack((top, bottom))
+        ys[1::2] = ys[1::2, ::-1]
+        coords = np.column_stack((np.repeat(x, 2), ys.reshape(-1))).reshape(-1).tolist()
+        if len(x) == 1:
+            coords += [x[0] + 1, ys[0, 1]]
+        return coords
 
     def _draw_record(self):
         self._record_index += len(self._display_record)
         self.canvas.create_line(self._size - self._record_index, self._display_record[0], self._size - self._record_index+1, self._display_record[0], 
-                                fill=self._hex_string_from_rgb(self.SIGNAL_COLORS[0]))
-        self.canvas.create_line(self._size - self._record_index, self._display_record[0]+1, self._size - self._record_index+1, self._display_record[0]+1, 
-                                fill=self._hex_string_from_rgb(self.SIGNAL_COLORS[0]))
-        self.canvas.create_line(self._size - self._record_index, self._display_record[0]-1, self._size - self._record_index+1, self._display_record[0]-1, 
-                                fill=self._hex_string_from_rgb(self.SIGNAL_COLORS[0]))
-
-    def _draw_dashed_horizontal_line(self, position, color): 
-        self.canvas.create_line(0, position, self._size, position, fill=color, dash=self.DASH_PATTERN)
-    
-    def _draw_horizontal_line(self, position, color): self.canvas.create_line(0, position, self._size, position, fill=color)
-
-    def _draw_dashed_vertical_line(self, position, color):
-        self.canvas.create_line(position, 0, position, self._size, fill=color, dash=self.DASH_PATTERN)
-
-    def _draw_vertical_line(self, position, color): self.canvas.create_line(position, 0, position, self._size, fill=color)
-
-    def _draw_trigger_level(self): self._draw_horizontal_line(self._trigger_level, self._hex_string_from_rgb(self.TRIGGER_COLOR))
+                                fill=self._hex_string_from_rgb(self.SIGNAL_COLORS[0]), width=self.TRACE_WIDTH, tags=self.RECORD_TAG)
 
     @property
-    def image_map(self):
+    def image_map(self) -> NDArray[np.uint8]:
         map = np.full((self._size, self._size, 3), self.BACKGROUND_COLOR, dtype=np.uint8)
         # Draw the Grid Lines
         grid_spacing = int(self._size/constants.Display.GRID_LINE_COUNT)
         grid_lines = np.arange(grid_spacing, self._size, grid_spacing)
         map[grid_lines, :] = self.GRID_LINE_COLOR
         map[:, grid_lines] = self.GRID_LINE_COLOR
-        # Draw the Signal
-        if self._display_vectors[0] is not None:
-            y = self._size - np.array(self._display_vectors[0])
-            y_filtered = y[y <= self._size]
-            x = np.arange(len(self._display_vectors[0]))[y <= self._size]
-            y_indices = y_filtered.astype(int)
-            valid_y = (y_indices >= 0) & (y_indices < self._size)
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    y_shifted = y_indices[valid_y] + dy
-                    x_shifted = x[valid_y] + dx
-                    valid_points = (y_shifted >= 0) & (y_shifted < self._size) & (x_shifted >= 0) & (x_shifted < self._size)
-                    map[y_shifted[valid_points], x_shifted[valid_points]] = self.SIGNAL_COLORS[0]
-            for i in range(len(x)-1):
-                if 0 <= x[i] < self._size:
-                    y1, y2 = int(y_filtered[i]), int(y_filtered[i+1])
-                    y_start = max(0, min(y1, y2))
-                    y_end = min(self._size, max(y1, y2))
-                    if int(x[i]) > 0 and int(x[i]) < self._size:
-                        map[y_start:y_end, int(x[i]) + dx] = self.SIGNAL_COLORS[0]
+        # Draw the Signals
+        for i, display_vector in enumerate(self._display_vectors):
+            if self._display_envelopes[i] is not None:
+                top, bottom = raster.column_spans(*self._envelope_spans(*self._display_envelopes[i]), self._size)
+            elif display_vector is not None and len(display_vector) > 0:
+                y = self._size - np.asarray(display_vector)
+                in_capture = y <= self._size
+                top, bottom = raster.staircase_spans(np.arange(len(y))[in_capture], y[in_capture], self._size)
+            else:
+                continue
+            raster.fill_spans(map, *raster.thicken(top, bottom, self.TRACE_WIDTH//2), self.SIGNAL_COLORS[i])
         # Draw the Cursors
         if self.cursors and self.cursors.hor_visible:
             map[self.cursors.hor1_pos] = self.CURSOR_COLOR
@@ -248,15 +323,22 @@ class Scope_Display:
         # Draw the trigger level
         if self._trigger_set:
             map[self._trigger_level] = self.TRIGGER_COLOR
-        return [[(int(r), int(g), int(b)) for r, g, b in row] for row in map]
+        return map
 
-    def add_vector(self, new_vector: NDArray[np.float64], index: int): self._vectors[index] = new_vector  
+    def add_vector(self, new_vector: NDArray[np.float64], index: int): 
+        self._vectors[index] = new_vector
+        self._pyramids[index] = None
 
     @property
     def size(self) -> int: return self._size
         
     @size.setter
-    def size(self, value: int) -> None: self._size = value
+    def size(self, value: int) -> None: 
+        self._size = value
+        self._resampler = Resampler(value)
+        self.canvas.configure(height=value, width=value)
+        self._place_grid(self._grid_items)
+        self._redraw()
 
     @property
     def record(self) -> list[float]: return self._record
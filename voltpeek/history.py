@@ -0,0 +1,104 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from time import time
+from typing import Optional
+
+from voltpeek.capture import Capture
+
+@dataclass(frozen=True)
+class HistoryFrame:
+    capture: Capture
+    # Wall clock time the frame was added
+    timestamp: float
+    # Counts the frames of a history from 1
+    sequence: int
+
+class WaveformHistory:
+    '''
+    The most recent captures of one scope as raw codes, stepped through by sequence number. Once the frames
+    take more than max_bytes the least recently used frames are evicted, so a frame that is being looked at
+    outlives older frames nobody has looked at. The newest frame is never evicted. One thread adds frames
+    while another reads them.
+    '''
+    DEFAULT_MAX_BYTES: int = 32*2**20
+
+    def __init__(self, max_bytes: int=DEFAULT_MAX_BYTES) -> None:
+        if max_bytes <= 0:
+            raise ValueError('A history needs a positive byte cap.')
+        self._max_bytes: int = max_bytes
+        # Least recently used first
+        self._frames: OrderedDict[int, HistoryFrame] = OrderedDict()
+        # Sequence numbers of the frames still held, in capture order
+        self._sequences: list[int] = []
+        self._nbytes: int = 0
+        self._sequence: int = 0
+        self._evicted: int = 0
+        self._lock: Lock = Lock()
+
+    def add(self, capture: Capture, timestamp: Optional[float]=None) -> int:
+        '''Store a copy of the capture's codes, the driver may reuse its buffer. Returns the sequence number of the frame.'''
+        frame_capture: Capture = capture.copy()
+        with self._lock:
+            self._sequence += 1
+            frame = HistoryFrame(frame_capture, time() if timestamp is None else timestamp, self._sequence)
+            self._frames[frame.sequence] = frame
+            self._sequences.append(frame.sequence)
+            self._nbytes += frame_capture.nbytes
+            self._evict()
+            return frame.sequence
+
+    def _evict(self) -> None:
+        while self._nbytes > self._max_bytes and len(self._frames) > 1:
+            sequence, frame = next(iter(self._frames.items()))
+            if sequence == self._sequences[-1]:
+                # The newest frame was just viewed, evict the next least recently used one instead.
+                self._frames.move_to_end(sequence)
+                continue
+            del self._frames[sequence]
+            self._sequences.pop(bisect_left(self._sequences, sequence))
+            self._nbytes -= frame.capture.nbytes
+            self._evicted += 1
+
+    def get(self, sequence: int) -> Optional[HistoryFrame]:
+        '''The frame with this sequence number, None if it was evicted. Getting a frame marks it as used.'''
+        with self._lock:
+            frame: Optional[HistoryFrame] = self._frames.get(sequence)
+            if frame is not None:
+                self._frames.move_to_end(sequence)
+            return frame
+
+    def previous(self, sequence: Optional[int]=None) -> Optional[int]:
+        '''The sequence number of the frame held before sequence, or of the newest frame when sequence is None.'''
+        with self._lock:
+            if sequence is None:
+                return self._sequences[-1] if len(self._sequences) > 0 else None
+            index: int = bisect_left(self._sequences, sequence)
+            return self._sequences[index - 1] if index > 0 else None
+
+    def next(self, sequence: int) -> Optional[int]:
+        with self._lock:
+            index: int = bisect_right(self._sequences, sequence)
+            return self._sequences[index] if index < len(self._sequences) else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self._sequences.clear()
+            self._nbytes = 0
+
+    @property
+    def newest(self) -> Optional[int]: return self.previous()
+
+    @property
+    def nbytes(self) -> int: return self._nbytes
+
+    @property
+    def max_bytes(self) -> int: return self._max_bytes
+
+    # Frames evicted to stay under the byte cap
+    @property
+    def evicted(self) -> int: return self._evicted
+
+    def __len__(self) -> int: return len(self._frames)
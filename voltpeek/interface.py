@@ -1,17 +1,30 @@
-from typing import Callable
+from typing import Callable, Optional
+from datetime import datetime
 from enum import Enum
 from threading import Event
 from inspect import signature
+from queue import SimpleQueue
+from time import perf_counter
 import logging
+import os
 import sys
 
 import tkinter as tk
+import numpy as np
+from numpy.typing import NDArray
 
 from voltpeek import messages
 from voltpeek import constants
 from voltpeek import commands
+from voltpeek import timing
 from voltpeek.measurements import average, rms
+from voltpeek.calibration import CalibrationReport
+from voltpeek.calibration_cache import CalibrationCache
+from voltpeek.capture import Capture, CaptureSettings
+from voltpeek.history import HistoryFrame, WaveformHistory
+from voltpeek.recorder import Recorder, RecorderSnapshot
 from voltpeek.scope_interface import ScopeInterface, ScopeAction
+from voltpeek.scopes.scope_base import ReadOutcome
 from voltpeek.scopes import get_available_scopes
 
 from voltpeek.gui.scope_display import Scope_Display
@@ -21,8 +34,12 @@ from voltpeek.gui.readout import Readout
 from voltpeek.trigger import Trigger, EdgeType, TriggerType
 from voltpeek.cursors import Cursors, Cursor_Data
 from voltpeek.scale import Scale
+from voltpeek.zoom import Zoom
 
 from voltpeek.export import export_png, ExportSettings
+from voltpeek.filters import FilterSpec, parse_filter
+from voltpeek.event_scheduler import EventScheduler
+from voltpeek.timing import stage_timings
 
 from voltpeek.scopes.NS1 import NS1
 
@@ -31,6 +48,7 @@ class Mode(Enum):
     ADJUST_SCALE = 1
     ADJUST_TRIGGER_LEVEL = 2
     ADJUST_CURSORS = 3
+    ADJUST_ZOOM = 4
 
 class Scope_Status(Enum):
     DISCONNECTED = 0
@@ -76,13 +94,43 @@ class Event(Enum):
     DISABLE_SIGNAL_TRIGGER = 17
     START_RECORD = 18
 
+# Trigger cycles wait until the pending settings have reached the scope.
+SETTING_PRIORITY: int = 0
+ACQUISITION_PRIORITY: int = 1
+EVENT_PRIORITIES: dict[Event, int] = {
+    Event.SINGLE_TRIGGER: ACQUISITION_PRIORITY,
+    Event.AUTO_TRIGGER: ACQUISITION_PRIORITY,
+    Event.NORMAL_TRIGGER: ACQUISITION_PRIORITY,
+    Event.RECORD_SAMPLE: ACQUISITION_PRIORITY,
+}
+# A pending event is replaced by a later event of its group. The start handlers read the current settings, so
+# one pending event sends the latest scale or trigger level however many were requested.
+EVENT_GROUPS: dict[Event, str] = {
+    Event.CHANGE_SCALE: 'clock div',
+    Event.SET_RANGE: 'range',
+    Event.SET_AMPLIFIER_GAIN: 'amplifier gain',
+    Event.SET_TRIGGER_LEVEL: 'trigger level',
+    Event.SET_RISING_EDGE_TRIGGER: 'trigger edge',
+    Event.SET_FALLING_EDGE_TRIGGER: 'trigger edge',
+    Event.ENABLE_SIGNAL_TRIGGER: 'signal trigger',
+    Event.DISABLE_SIGNAL_TRIGGER: 'signal trigger',
+    Event.SINGLE_TRIGGER: 'trigger',
+    Event.AUTO_TRIGGER: 'trigger',
+    Event.NORMAL_TRIGGER: 'trigger',
+    Event.RECORD_SAMPLE: 'record',
+    Event.SET_CAL_OFFSETS: 'calibration',
+}
+
 class UserInterface:
     INVALID_SCOPE_ERROR = 'The scope identifier entered is not supported.'
     SCOPE_NOT_CONNECTED_ERROR = 'The scope is not connected.'
     IMAGE_PLOT_ERROR = 'Cannot plot image. There is no signal displayed.'
+    WAKEUP_EVENT = '<<ScopeWakeup>>'
+    DISPLAY_LATENCY_HISTORY: int = 100
 
     def __init__(self, debug=False) -> None:
         self.debug = debug
+        stage_timings.enabled = debug
         logging.basicConfig(stream=sys.stdout,level=logging.INFO,format='%(asctime)s - %(levelname)s - %(message)s')
         
         self._build_tk_root()
@@ -91,7 +139,7 @@ class UserInterface:
         self.cursors: Cursors = Cursors(self._display_size)
 
         self.scope_display: Scope_Display = Scope_Display(self.root, self.cursors, self._display_size)
-        self.command_input: CommandInput = CommandInput(self.root, self.process_command, self._display_size)
+        self.command_input: CommandInput = CommandInput(self.root, self._on_command, self._display_size)
         # Readouts are not created until the scopes are connected
         self._readout_frame: tk.Frame = tk.Frame(self.root, bg=constants.Window.BACKGROUND_COLOR)
         self._readout_frame.grid(sticky=tk.N, row=0, column=1, padx=constants.Application.PADDING, pady=constants.Application.PADDING)
@@ -105,28 +153,96 @@ class UserInterface:
         self.serial_scope_connected: bool = False
         self.scope_status = Scope_Status.DISCONNECTED
 
-        self._start_event_queue: list[list[Event]] = []
+        # Start events record how long they waited in the stage timings.
+        self._start_event_queue: list[EventScheduler] = []
         self._end_event_queue: list[list[Event]] = []
+        # Reference volts of each scope's pending SET_CAL_OFFSETS event, None calibrates the offsets
+        self._calibration_references: list[Optional[float]] = []
+        # Each start event's handler and the end event that follows it once the scope has started the action
+        self._start_handlers: dict[Event, tuple[Callable[[int], bool], Optional[Event]]] = {
+            Event.CONNECT: (self._start_connect, Event.CONNECT),
+            Event.SINGLE_TRIGGER: (self._start_single_trigger, Event.SINGLE_TRIGGER),
+            Event.AUTO_TRIGGER: (self._start_auto_trigger_cycle, Event.AUTO_TRIGGER),
+            Event.NORMAL_TRIGGER: (self._start_normal_trigger_cycle, Event.NORMAL_TRIGGER),
+            Event.CHANGE_SCALE: (self._start_change_scale, Event.CHANGE_SCALE),
+            Event.SET_TRIGGER_LEVEL: (self._start_set_trigger_level, None),
+            Event.READ_CAL_OFFSETS: (self._start_read_cal_offsets, None),
+            Event.SET_CAL_OFFSETS: (self._start_set_calibration, Event.SET_CAL_OFFSETS),
+            Event.SET_RANGE: (self._start_set_range, None),
+            Event.SET_AMPLIFIER_GAIN: (self._start_set_amplifier_gain, None),
+            Event.SET_RISING_EDGE_TRIGGER: (self._start_set_rising_edge_trigger, Event.SET_RISING_EDGE_TRIGGER),
+            Event.SET_FALLING_EDGE_TRIGGER: (self._start_set_falling_edge_trigger, Event.SET_FALLING_EDGE_TRIGGER),
+            Event.RECORD_SAMPLE: (self._start_record_sample, Event.RECORD_SAMPLE),
+            Event.ENABLE_SIGNAL_TRIGGER: (self._start_enable_signal_trigger, None),
+            Event.DISABLE_SIGNAL_TRIGGER: (self._start_disable_signal_trigger, None),
+            Event.START_RECORD: (self._start_record, None),
+        }
+        self._end_handlers: dict[Event, Callable[[int], None]] = {
+            Event.CONNECT: self._finish_connect,
+            Event.AUTO_TRIGGER: self._finish_auto_trigger_cycle,
+            Event.NORMAL_TRIGGER: self._finish_normal_trigger_cycle,
+            Event.SINGLE_TRIGGER: self._finish_single_trigger,
+            Event.CHANGE_SCALE: self._finish_change_scale,
+            Event.SET_RISING_EDGE_TRIGGER: lambda _: self._finish_set_rising_edge_trigger(),
+            Event.SET_FALLING_EDGE_TRIGGER: lambda _: self._finish_set_falling_edge_trigger(),
+            Event.RECORD_SAMPLE: self._finish_record_sample,
+            Event.SET_CAL_OFFSETS: self._finish_set_calibration,
+        }
 
         self._connect_initiated: bool = False
         self._record_running: bool = False
         self._calibration: bool = False
         self._triggered: bool = False
         self._calibration_step: int = 0
+        # Trigger volts and vertical scale last sent with SET_TRIGGER_LEVEL
+        self._trigger_setting: Optional[tuple[float, float]] = None
+        # Set while the held capture is zoomed
+        self._zoom: Optional[Zoom] = None
+        # Sequence number of the history frame shown for each scope, None while the live captures are shown
+        self._history_sequences: Optional[list[Optional[int]]] = None
 
         self._scope_interfaces: list[ScopeInterface] = []
+        # Calibration offsets of known scopes, so reconnecting does not read them from the device
+        self._calibration_cache: CalibrationCache = CalibrationCache()
+        # Scope workers post finished actions here and wake the Tk loop, nothing polls while idle.
+        self._completed_actions: SimpleQueue[tuple[ScopeInterface, ScopeAction]] = SimpleQueue()
+        self._check_state_scheduled: bool = False
+        self._display_latency: list[float] = []
 
     def _build_tk_root(self) -> None:
         self.root:tk.Tk = tk.Tk()
         self.root.title(__name__.split('.')[0])
         self.root.configure(bg=constants.Window.BACKGROUND_COLOR) 
         self.root.tk.call('tk', 'scaling', 1)
-        self.root.after(1, self.check_state)
+        self.root.bind(self.WAKEUP_EVENT, self._on_scope_wakeup)
         self.root.bind('<KeyPress>', self.on_key_press)
         # set the initial graticule size based on the users display
         self._display_size: int = int(0.75*min(self.root.winfo_screenwidth(), self.root.winfo_screenheight()))
 
+    # Called on a scope worker thread.
+    def _on_scope_action_complete(self, scope_interface: ScopeInterface, action: ScopeAction) -> None:
+        self._completed_actions.put((scope_interface, action))
+        try:
+            self.root.event_generate(self.WAKEUP_EVENT, when='tail')
+        except (RuntimeError, tk.TclError) as _:
+            # The Tk loop is not running, for example while the window closes.
+            pass
+
+    def _on_scope_wakeup(self, _) -> None:
+        while not self._completed_actions.empty():
+            scope_interface, action = self._completed_actions.get()
+            if self.debug:
+                logging.info(f'action complete: {action.name}, scope index: {self._scope_interfaces.index(scope_interface)}')
+        self.check_state()
+
+    def _schedule_check_state(self) -> None:
+        if not self._check_state_scheduled:
+            self._check_state_scheduled = True
+            self.root.after_idle(self.check_state)
+
     def check_state(self):
+        self._check_state_scheduled = False
+        progressed: bool = False
         if self._connect_initiated:
             for i, scope_interface in enumerate(self._scope_interfaces):
                 if scope_interface.disconnected_error:
@@ -134,97 +250,53 @@ class UserInterface:
                     self.command_input.display_error()
                     scope_interface.clear_disconnected_error()
                     self._connect_initiated = False
-                    self._start_event_queue[i] = []
+                    self._start_event_queue[i].clear()
                     self._end_event_queue[i] = []
+                    scope_interface.set_auto_rearm(False)
+                    self._calibration_references[i] = None
                 else:
                     # The end events must go first otherwise the start events will always have priority.
-                    if scope_interface.data_available and len(self._end_event_queue[i]) > 0:
+                    if len(self._end_event_queue[i]) > 0 and self._end_event_ready(i):
                         if self.debug:
                             logging.info(f'end event: {self._end_event_queue[i][0].name}, scope index: {i}')
-                        if self._end_event_queue[i][0] == Event.CONNECT:
-                            self._finish_connect(i)
-                        if self._end_event_queue[i][0] == Event.AUTO_TRIGGER:
-                            self._finish_auto_trigger_cycle(i)
-                        if self._end_event_queue[i][0] == Event.NORMAL_TRIGGER:
-                            self._finish_normal_trigger_cycle(i)
-                        if self._end_event_queue[i][0] == Event.SINGLE_TRIGGER:
-                            self._finish_single_trigger(i)
-                        if self._end_event_queue[i][0] == Event.CHANGE_SCALE:
-                            self._finish_change_scale(i)
-                        if self._end_event_queue[i][0] == Event.SET_RISING_EDGE_TRIGGER:
-                            self._finish_set_rising_edge_trigger()
-                        if self._end_event_queue[i][0] == Event.SET_FALLING_EDGE_TRIGGER:
-                            self._finish_set_falling_edge_trigger()
-                        if self._end_event_queue[i][0] == Event.RECORD_SAMPLE:
-                            self._finish_record_sample(i)
+                        self._end_handlers[self._end_event_queue[i][0]](i)
                         self._end_event_queue[i].pop(0)
+                        progressed = True
                     if scope_interface.data_available and len(self._start_event_queue[i]) > 0:
+                        event: Event = self._start_event_queue[i].peek()
                         if self.debug:
-                            logging.info(f'start event: {self._start_event_queue[i][0].name}, scope index: {i}')
-                        if self._start_event_queue[i][0] == Event.CONNECT:
-                            if self._start_connect(i):
-                                self._end_event_queue[i].append(Event.CONNECT)
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.SINGLE_TRIGGER:
-                            if self._start_single_trigger(i):
-                                self._end_event_queue[i].append(Event.SINGLE_TRIGGER)
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.AUTO_TRIGGER:
-                            if self._start_auto_trigger_cycle(i):
-                                self._end_event_queue[i].append(Event.AUTO_TRIGGER)
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.NORMAL_TRIGGER:
-                            if self._start_normal_trigger_cycle(i):
-                                self._end_event_queue[i].append(Event.NORMAL_TRIGGER)
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.CHANGE_SCALE:
-                            if self._start_change_scale(i):
-                                self._end_event_queue[i].append(Event.CHANGE_SCALE)
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.SET_TRIGGER_LEVEL:
-                            if self._start_set_trigger_level(i):
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.READ_CAL_OFFSETS:
-                            if self._start_read_cal_offsets(i):
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.SET_CAL_OFFSETS:
-                            if self._start_set_calibration(i):
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.SET_RANGE:
-                            if self._start_set_range(i):
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.SET_AMPLIFIER_GAIN:
-                            if self._start_set_amplifier_gain(i):
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.SET_RISING_EDGE_TRIGGER:
-                            if self._start_set_rising_edge_trigger(i):
-                                self._end_event_queue[i].append(Event.SET_RISING_EDGE_TRIGGER)
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.SET_FALLING_EDGE_TRIGGER:
-                            if self._start_set_falling_edge_trigger(i):
-                                self._end_event_queue[i].append(Event.SET_FALLING_EDGE_TRIGGER)
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.RECORD_SAMPLE:
-                            if self._start_record_sample(i):
-                                self._end_event_queue[i].append(Event.RECORD_SAMPLE)
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.ENABLE_SIGNAL_TRIGGER:
-                            if self._start_enable_signal_trigger(i):
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.DISABLE_SIGNAL_TRIGGER:
-                            if self._start_disable_signal_trigger(i):
-                                self._start_event_queue[i].pop(0)
-                        elif self._start_event_queue[i][0] == Event.START_RECORD:
-                            if self._start_record(i):
-                                self._start_event_queue[i].pop(0)
-        self.root.after(1, self.check_state)
+                            logging.info(f'start event: {event.name}, scope index: {i}')
+                        start, end_event = self._start_handlers[event]
+                        if start(i):
+                            self._start_event_queue[i].pop()
+                            if end_event is not None:
+                                self._end_event_queue[i].append(end_event)
+                            progressed = True
+        # Keep going while events are still being processed, otherwise wait for a scope to wake the loop.
+        if progressed:
+            self._schedule_check_state()
+
+    # In auto mode the scope re-arms itself, so the auto end event runs for each capture it publishes and once it stops.
+    def _end_event_ready(self, scope_index: int) -> bool:
+        scope_interface: ScopeInterface = self._scope_interfaces[scope_index]
+        if self._end_event_queue[scope_index][0] != Event.AUTO_TRIGGER:
+            return scope_interface.data_available
+        if scope_interface.new_capture_available:
+            return True
+        return scope_interface.data_available and not scope_interface.rearming
+
+    def _on_command(self, command: str) -> None:
+        self.process_command(command)
+        self._schedule_check_state()
 
     # TODO: This all needs to be refactored
     def on_key_press(self, event) -> None:
-        if self.mode == Mode.ADJUST_SCALE or self.mode == Mode.ADJUST_TRIGGER_LEVEL or self.mode == Mode.ADJUST_CURSORS:
+        if self.mode in (Mode.ADJUST_SCALE, Mode.ADJUST_TRIGGER_LEVEL, Mode.ADJUST_CURSORS, Mode.ADJUST_ZOOM):
             if (event.keysym == 'Escape') or (event.state & 0x4 and event.keysym == 'c'): 
                 if self.mode == Mode.ADJUST_TRIGGER_LEVEL: 
                     self._set_trigger_level()
+                elif self.mode == Mode.ADJUST_ZOOM:
+                    self._end_zoom()
                 self._set_command_mode()
         if self.mode == Mode.ADJUST_SCALE:
             if event.char == Keys.VERTICAL_UP:
@@ -235,6 +307,15 @@ class UserInterface:
                 self._set_update_scale(self.scale.increment_hor)
             elif event.char == Keys.HORIZONTAL_LEFT:
                 self._set_update_scale(self.scale.decrement_hor)
+        elif self.mode == Mode.ADJUST_ZOOM:
+            if event.char == Keys.VERTICAL_UP:
+                self._update_zoom(self._zoom.zoom_in)
+            elif event.char == Keys.VERTICAL_DOWN:
+                self._update_zoom(self._zoom.zoom_out)
+            elif event.char == Keys.HORIZONTAL_RIGHT:
+                self._update_zoom(self._zoom.pan_right)
+            elif event.char == Keys.HORIZONTAL_LEFT:
+                self._update_zoom(self._zoom.pan_left)
         elif self.mode == Mode.ADJUST_TRIGGER_LEVEL:
             if event.state & 0x4:
                 if event.keysym == 'u':
@@ -270,10 +351,11 @@ class UserInterface:
                 self.command_input.set_command_stack_increment()
             elif event.keycode == KeyCodes.DOWN_ARROW:
                 self.command_input.set_command_stack_decrement()
+        self._schedule_check_state()
 
     def get_commands(self): 
         return {
-            commands.EXIT: lambda: exit(),
+            commands.EXIT: self._exit,
             commands.CONNECT: lambda identifier: self._connect(identifier),
             commands.SCALE: self._set_adjust_scale_mode, 
             commands.TRIGGER_LEVEL: self._set_adjust_trigger_level_mode,  
@@ -290,16 +372,24 @@ class UserInterface:
             commands.TRIGGER_FALLING_EDGE: self._on_trigger_falling_edge_command,
             commands.PROBE_1: lambda: self._set_probe(1),
             commands.PROBE_10: lambda: self._set_probe(10),
-            commands.CAL: self._on_set_cal_offsets_command,
+            commands.CAL: lambda reference=None: self._on_set_cal_offsets_command(reference),
+            commands.CLEAR_CAL: self._on_clear_cal_command,
             commands.PNG: lambda filename: self._run_png_export(filename),
+            commands.FILTER: lambda filter_text: self._set_filter(filter_text),
+            commands.PEAK_DETECT: self._toggle_peak_detect,
+            commands.ZOOM: self._set_adjust_zoom_mode,
+            commands.TIMING: self._on_timing_command,
+            commands.STATS: lambda action=None: self._on_stats_command(action),
+            commands.HISTORY: lambda action: self._on_history_command(action),
+            commands.REC: lambda action=None: self._on_rec_command(action),
             'record': self._on_record_command
         }
 
     def process_command(self, command: str) -> None:
         argument = None
         if ' ' in command:
-            argument = command.split(' ')[1]
-            command = command.split(' ')[0]
+            # The argument is the rest of the line, rec start takes a directory after the action.
+            command, argument = command.split(' ', 1)
         for key in self.get_commands():
             if key == command: 
                 sig = signature(self.get_commands()[key])
@@ -336,9 +426,10 @@ class UserInterface:
         self._readouts.append(Readout(self._readout_frame, self.scale.vert, self.scale.hor))
         self._readouts[len(self._readouts)-1](scope_index)
         self._set_probe(1)
-        self._start_event_queue[scope_index].append(Event.CHANGE_SCALE)
-        self._start_event_queue[scope_index].append(Event.SET_RISING_EDGE_TRIGGER)
-        self._start_event_queue[scope_index].append(Event.SET_TRIGGER_LEVEL)
+        self._start_event_queue[scope_index].add(Event.CHANGE_SCALE)
+        self._start_event_queue[scope_index].add(Event.SET_RISING_EDGE_TRIGGER)
+        self._start_event_queue[scope_index].add(Event.SET_TRIGGER_LEVEL)
+        self._trigger_setting = None
         self._update_scope_status()
     
     '''
@@ -373,12 +464,22 @@ class UserInterface:
         for readout in self._readouts:
             readout.update_settings(self.scale.vert*self.scale.probe_div, self.scale.hor)
             readout.set_fs(self.scale.fs)
+        if self._history_sequences is not None:
+            # The history frame is redrawn with the sample rate it was captured at.
+            self._show_history_frame(scope_index)
+            return
         if self._scope_interfaces[0].xx is not None and len(self._scope_interfaces[0].xx) > 0:
-            fir_length = self._scope_interfaces[0].scope.FIR_LENGTH if self._scope_interfaces[0].scope.DIGITAL_FILTER else None
             self.scope_display.resample_vector(self.scale.hor, self.scale.vert, self._last_fs, 
                                                self._scope_interfaces[0].scope.SCOPE_SPECS['memory_depth'], 
                                                self.scope_trigger.trigger_type, self._triggered,
-                                               scope_index, FIR_length=fir_length)
+                                               scope_index, FIR_length=self._fir_length(scope_index))
+
+    # The filter of the held capture, the scope's filter may have changed since it was taken.
+    def _fir_length(self, scope_index: int) -> int:
+        capture: Optional[Capture] = self._scope_interfaces[scope_index].capture
+        if capture is not None and capture.settings is not None:
+            return capture.settings.fir_filter.length
+        return self._scope_interfaces[scope_index].scope.fir_length
 
     '''
     EVENT: READ CAL OFFSET
@@ -430,13 +531,25 @@ class UserInterface:
     def _start_auto_trigger_cycle(self, scope_index: int) -> bool:
         self._scope_interfaces[scope_index].fs = self.scale.fs
         self._last_fs = self.scale.fs
+        self._scope_interfaces[scope_index].set_auto_rearm(True)
         return self._scope_interfaces[scope_index].set_scope_action(ScopeAction.FORCE_TRIGGER)
 
+    # The worker keeps capturing into the capture ring while the display draws, only the newest capture is drawn.
     def _finish_auto_trigger_cycle(self, scope_index: int) -> None:
         self._triggered = False
-        self.display_signal(self._scope_interfaces[scope_index].xx, self._triggered, scope_index)
+        scope_interface: ScopeInterface = self._scope_interfaces[scope_index]
+        self._readouts[scope_index].set_acquisition(scope_interface.stats.snapshot())
+        xx = scope_interface.latest_capture() if scope_interface.new_capture_available else None
         if self.scope_trigger.trigger_type == TriggerType.AUTO:
-            self._start_event_queue[scope_index].append(Event.AUTO_TRIGGER)
+            end_event_queue: list[Event] = self._end_event_queue[scope_index]
+            if scope_interface.rearming:
+                # Wait for the next capture, one pending auto end event is enough.
+                if end_event_queue.count(Event.AUTO_TRIGGER) == 1:
+                    end_event_queue.append(Event.AUTO_TRIGGER)
+            else:
+                # An action ended the re-arming, the next cycle starts after the pending settings.
+                self._start_event_queue[scope_index].add(Event.AUTO_TRIGGER)
+        self.display_signal(xx, self._triggered, scope_index)
 
     '''
     EVENT: NORMAL TRIGGER
@@ -448,14 +561,14 @@ class UserInterface:
         return self._scope_interfaces[scope_index].set_scope_action(ScopeAction.TRIGGER)
 
     def _finish_normal_trigger_cycle(self, scope_index: int) -> None:
-        if len(self._scope_interfaces[scope_index].xx) > 0: 
+        xx = self._new_capture(scope_index)
+        if xx is not None and len(xx) > 0: 
             self._triggered = True
-            self.display_signal(self._scope_interfaces[scope_index].xx, self._triggered, scope_index)
+            self.display_signal(xx, self._triggered, scope_index)
         if self.scope_trigger._trigger_type == TriggerType.NORMAL:
             for start_event_queue in self._start_event_queue:
-                # We don't want to over schedule
-                if len(start_event_queue) == 0 or start_event_queue[len(start_event_queue) - 1] != Event.NORMAL_TRIGGER:
-                    start_event_queue.append(Event.NORMAL_TRIGGER)
+                # A pending re-arm absorbs this one.
+                start_event_queue.add(Event.NORMAL_TRIGGER)
 
     '''
     EVENT: SINGLE TRIGGER
@@ -467,9 +580,10 @@ class UserInterface:
         return self._scope_interfaces[scope_index].set_scope_action(ScopeAction.TRIGGER)
 
     def _finish_single_trigger(self, scope_index: int) -> None:
-        if len(self._scope_interfaces[scope_index].xx) > 0:
+        xx = self._new_capture(scope_index)
+        if xx is not None and len(xx) > 0:
             self._triggered = True
-            self.display_signal(self._scope_interfaces[scope_index].xx, self._triggered, scope_index)
+            self.display_signal(xx, self._triggered, scope_index)
 
     '''
     EVENT: RECORD SAMPLE
@@ -484,7 +598,7 @@ class UserInterface:
         self.scope_display.record = self._scope_interfaces[scope_index]._record
         self.scope_display.resample_record(self.scale.vert)
         if self._record_running:
-            self._start_event_queue[scope_index].append(Event.RECORD_SAMPLE)
+            self._start_event_queue[scope_index].add(Event.RECORD_SAMPLE)
 
     '''
     EVENT: READ CAL OFFSETS
@@ -492,7 +606,21 @@ class UserInterface:
 
     def _start_set_calibration(self, scope_index: int) -> bool:
         self._scope_interfaces[scope_index].set_value(self.scale.vert)
-        return self._scope_interfaces[scope_index].set_scope_action(ScopeAction.SET_CAL_OFFSETS)
+        self._scope_interfaces[scope_index].set_calibration_reference(self._calibration_references[scope_index])
+        if not self._scope_interfaces[scope_index].set_scope_action(ScopeAction.SET_CAL_OFFSETS):
+            return False
+        # A cal command issued while this calibration runs queues its own reference.
+        self._calibration_references[scope_index] = None
+        return True
+
+    def _finish_set_calibration(self, scope_index: int) -> None:
+        report: Optional[CalibrationReport] = self._scope_interfaces[scope_index].calibration_report
+        if report is None:
+            return
+        logging.info(f'scope {scope_index} calibration\n{report.describe()}')
+        if not report.converged:
+            self.command_input.set_error(messages.Errors.CALIBRATION_ERROR)
+            self.command_input.display_error()
 
     '''
     EVENT: ENABLE SIGNAL TRIGGER
@@ -522,18 +650,23 @@ class UserInterface:
             if list(scope.keys())[0] == identifier:
                 if len(scope[identifier].find_scope_ports()) > 0:
                     for i, connected_device in enumerate(scope[identifier].find_scope_ports()):
-                        self._scope_interfaces.append(ScopeInterface(scope[identifier], device=connected_device))
-                        self._start_event_queue.append([])
+                        scope_interface = ScopeInterface(scope[identifier], device=connected_device, 
+                                                         calibration_cache=self._calibration_cache)
+                        scope_interface.set_action_listener(self._on_scope_action_complete)
+                        self._scope_interfaces.append(scope_interface)
+                        self._start_event_queue.append(EventScheduler(EVENT_PRIORITIES, EVENT_GROUPS, stage_timings))
                         self._end_event_queue.append([])
+                        self._calibration_references.append(None)
                     self.scope_display.init_vectors(len(self._scope_interfaces))
+                    self._history_sequences = None
                     self._connect_initiated = True
                     for scope_event_queue in self._start_event_queue:
-                        scope_event_queue.append(Event.CONNECT)
-                        scope_event_queue.append(Event.SET_RANGE)
-                        scope_event_queue.append(Event.SET_AMPLIFIER_GAIN)
+                        scope_event_queue.add(Event.CONNECT)
+                        scope_event_queue.add(Event.SET_RANGE)
+                        scope_event_queue.add(Event.SET_AMPLIFIER_GAIN)
                     for i, scope_interface in enumerate(self._scope_interfaces):
                         if isinstance(scope_interface.scope, NS1):
-                            self._start_event_queue[i].append(Event.READ_CAL_OFFSETS)
+                            self._start_event_queue[i].add(Event.READ_CAL_OFFSETS)
                     self._update_scope_status()
                     self._update_scope_probe()
                 else:
@@ -547,19 +680,23 @@ class UserInterface:
             self._trigger_rearm = self.scope_trigger.trigger_type
             self._stop_trigger()
 
-    def _resume_trigger(self, start_event_queue: list[Event]):
+    def _resume_trigger(self, start_event_queue: EventScheduler):
         if self._trigger_rearm == TriggerType.NORMAL:
-            start_event_queue.append(Event.NORMAL_TRIGGER)
+            start_event_queue.add(Event.NORMAL_TRIGGER)
             self.scope_trigger.trigger_type = TriggerType.NORMAL
         elif self._trigger_rearm == TriggerType.SINGLE:
-            start_event_queue.append(Event.SINGLE_TRIGGER)
+            start_event_queue.add(Event.SINGLE_TRIGGER)
             self.scope_trigger.trigger_type = TriggerType.SINGLE
         self._trigger_rearm = TriggerType.NONE
 
     def _set_trigger_level(self) -> None:
+        trigger_setting: tuple[float, float] = (self.scope_display.get_trigger_voltage(self.scale.vert), self.scale.vert)
+        if trigger_setting == self._trigger_setting:
+            return
+        self._trigger_setting = trigger_setting
         self._pause_trigger()
         for start_event_queue in self._start_event_queue:
-            start_event_queue.append(Event.SET_TRIGGER_LEVEL)
+            start_event_queue.add(Event.SET_TRIGGER_LEVEL)
             self._resume_trigger(start_event_queue)
             if self.debug:
                 logging.info('RESUMING NORMAL from set trigger level')
@@ -581,6 +718,31 @@ class UserInterface:
         self.root.focus_set()
         self.scope_display.set_trigger_level(self._display_size/2)
 
+    def _set_adjust_zoom_mode(self) -> None:
+        if self.scope_trigger.trigger_type not in (TriggerType.NONE, TriggerType.SINGLE):
+            self.command_input.set_error(messages.Errors.ZOOM_RUNNING_ERROR)
+            return
+        if len(self._scope_interfaces) == 0 or self._scope_interfaces[0].xx is None:
+            self.command_input.set_error(messages.Errors.ZOOM_NO_CAPTURE_ERROR)
+            return
+        self._zoom = Zoom(self.scale.hor, len(self._scope_interfaces[0].xx)/self._last_fs)
+        self.mode = Mode.ADJUST_ZOOM
+        self.command_input.set_adjust_mode()
+        self.root.focus_set()
+
+    # Redraws the held captures only, nothing is sent to the scopes.
+    def _update_zoom(self, update_fn: Optional[Callable[[], None]]=None) -> None:
+        if update_fn is not None:
+            update_fn()
+        for readout in self._readouts:
+            readout.update_settings(self.scale.vert*self.scale.probe_div, self._zoom.hor)
+        self.scope_display.resample_zoom(self._zoom.hor, self.scale.vert, self._last_fs, self._zoom.offset, self._triggered)
+
+    def _end_zoom(self) -> None:
+        self._zoom = None
+        for scope_index in range(0, len(self._scope_interfaces)):
+            self._finish_change_scale(scope_index)
+
     def _set_command_mode(self) -> None:
         self.mode = Mode.COMMAND
         self.command_input.set_command_mode()
@@ -597,29 +759,221 @@ class UserInterface:
     def _update_scope_probe(self) -> None: [readout.set_probe(self.scale.probe_div) for readout in self._readouts]
 
     def _set_update_scale(self, update_fn: Callable[[], None]) -> None:
+        clock_div: int = self.scale.clock_div
         if update_fn is not None:
             update_fn()
-        self._pause_trigger()
         self.scale.update_sample_rate(self._scope_interfaces[0].scope.SCOPE_SPECS['sample_rate'], 
                                       self._scope_interfaces[0].scope.SCOPE_SPECS['memory_depth'])
+        if self.scale.clock_div == clock_div:
+            # Nothing to send to the scopes, so the trigger keeps running and only the display is redrawn.
+            for scope_index in range(0, len(self._scope_interfaces)):
+                self._finish_change_scale(scope_index)
+            return
+        self._pause_trigger()
         if self.scope_trigger.trigger_type == TriggerType.AUTO or self.scope_trigger.trigger_type == TriggerType.NORMAL:
             for scope_interface in self._scope_interfaces:
                 scope_interface.fs = self.scale.fs
         for start_event_queue in self._start_event_queue:
-            start_event_queue.append(Event.CHANGE_SCALE)
+            start_event_queue.add(Event.CHANGE_SCALE)
             self._resume_trigger(start_event_queue)
             if self.debug:
                 logging.info('RESUMING NORMAL from horizontal scale')
 
     def _update_scale_vert(self, update_fn: Callable[[], None]) -> None:
+        vert: float = self.scale.vert
         if update_fn is not None:
             update_fn()
+        if self.scale.vert == vert:
+            return
         self._pause_trigger() 
         for start_event_queue in self._start_event_queue:
-            start_event_queue.append(Event.SET_RANGE)
-            start_event_queue.append(Event.SET_AMPLIFIER_GAIN)
+            start_event_queue.add(Event.SET_RANGE)
+            start_event_queue.add(Event.SET_AMPLIFIER_GAIN)
             self._resume_trigger(start_event_queue)
 
+    def _set_filter(self, filter_text: str) -> None:
+        try:
+            fir_filter: FilterSpec = parse_filter(filter_text)
+        except ValueError as error:
+            self.command_input.set_error(str(error))
+            return
+        for scope_index, scope_interface in enumerate(self._scope_interfaces):
+            if scope_interface.scope.DIGITAL_FILTER:
+                scope_interface.scope.set_filter(fir_filter)
+                scope_interface.refilter_capture(fir_filter)
+                # A held history frame keeps the filter it was captured with.
+                if self._history_sequences is None:
+                    self._redraw_held_capture(scope_index)
+
+    def _toggle_peak_detect(self) -> None:
+        self.scope_display.peak_detect = not self.scope_display.peak_detect
+        # Redraw the held captures so the change also shows while stopped.
+        for scope_index in range(0, len(self._scope_interfaces)):
+            self._finish_change_scale(scope_index)
+
+    def _on_stats_command(self, action: Optional[str]) -> None:
+        if action == commands.STATS_RESET:
+            for scope_interface in self._scope_interfaces:
+                scope_interface.stats.reset()
+            return
+        if action is not None:
+            self.command_input.set_error(messages.Errors.INVALID_COMMAND_ERROR)
+            return
+        for i, scope_interface in enumerate(self._scope_interfaces):
+            snapshot = scope_interface.stats.snapshot()
+            rate: str = '----' if snapshot.capture_rate is None else f'{snapshot.capture_rate:.1f} wfm/s'
+            dead_time: str = '----' if snapshot.dead_time is None else f'{snapshot.dead_time*1e3:.2f} ms'
+            logging.info(f'scope {i}: captures {snapshot.captures}, rate {rate}, dead time {dead_time}, '
+                         f'incomplete {snapshot.incomplete}, timeouts {snapshot.timeouts}, stops {snapshot.stops}, '
+                         f'errors {snapshot.errors}, dropped by the display {scope_interface.dropped_captures}')
+
+    def _on_history_command(self, action: str) -> None:
+        if action == commands.HISTORY_LIVE:
+            self._show_live()
+            return
+        if action not in (commands.HISTORY_PREVIOUS, commands.HISTORY_NEXT):
+            self.command_input.set_error(messages.Errors.INVALID_COMMAND_ERROR)
+            return
+        sequences: list[Optional[int]] = [self._step_history(i, action == commands.HISTORY_PREVIOUS) 
+                                          for i in range(0, len(self._scope_interfaces))]
+        if all(sequence is None for sequence in sequences):
+            self.command_input.set_error(messages.Errors.HISTORY_EMPTY_ERROR)
+            return
+        self._history_sequences = sequences
+        for scope_index in range(0, len(self._scope_interfaces)):
+            self._show_history_frame(scope_index)
+
+    def _step_history(self, scope_index: int, backwards: bool) -> Optional[int]:
+        history: WaveformHistory = self._scope_interfaces[scope_index].history
+        # While live the newest frame is the one on the display.
+        sequence: Optional[int] = history.newest if self._history_sequences is None else self._history_sequences[scope_index]
+        if sequence is None:
+            return None
+        step: Optional[int] = history.previous(sequence) if backwards else history.next(sequence)
+        # The oldest and newest frames are kept at the ends.
+        return sequence if step is None else step
+
+    def _show_history_frame(self, scope_index: int) -> None:
+        sequence: Optional[int] = self._history_sequences[scope_index]
+        frame: Optional[HistoryFrame] = None
+        if sequence is not None:
+            frame = self._scope_interfaces[scope_index].history.get(sequence)
+        if frame is None:
+            return
+        xx: NDArray[np.float64] = frame.capture.volts
+        settings: CaptureSettings = frame.capture.settings
+        self._last_fs = settings.fs
+        self._readouts[scope_index].set_average(average(xx))
+        self._readouts[scope_index].set_rms(rms(xx))
+        self._readouts[scope_index].set_status(f'HISTORY {sequence}')
+        self.scope_display.add_vector(xx, scope_index)
+        self.scope_display.resample_vector(self.scale.hor, self.scale.vert, settings.fs, 
+                                           self._scope_interfaces[0].scope.SCOPE_SPECS['memory_depth'], 
+                                           self.scope_trigger.trigger_type, self._triggered,
+                                           scope_index, FIR_length=settings.fir_filter.length)
+        if self._zoom is not None:
+            self._update_zoom()
+        captured: str = datetime.fromtimestamp(frame.timestamp).strftime('%H:%M:%S.%f')[:-3]
+        logging.info(f'scope {scope_index}: frame {sequence} of {len(self._scope_interfaces[scope_index].history)} held, '
+                     f'captured {captured}, {settings.full_scale} V full scale, clock div {settings.clock_div}')
+
+    def _show_live(self) -> None:
+        if self._history_sequences is None:
+            return
+        self._history_sequences = None
+        self._last_fs = self.scale.fs
+        self._update_scope_status()
+        for scope_index in range(0, len(self._scope_interfaces)):
+            self._redraw_held_capture(scope_index)
+
+    def _redraw_held_capture(self, scope_index: int) -> None:
+        xx: Optional[NDArray[np.float64]] = self._scope_interfaces[scope_index].xx
+        if xx is not None and len(xx) > 0:
+            self._readouts[scope_index].set_average(average(xx))
+            self._readouts[scope_index].set_rms(rms(xx))
+            self.scope_display.add_vector(xx, scope_index)
+            self._finish_change_scale(scope_index)
+            if self._zoom is not None:
+                self._update_zoom()
+
+    def _on_rec_command(self, argument: Optional[str]) -> None:
+        if argument is None:
+            self._log_recording()
+            return
+        action, _, directory = argument.partition(' ')
+        if action == commands.REC_START and directory.strip() != '':
+            self._start_recording(directory.strip())
+        elif action == commands.REC_STOP and directory == '':
+            self._stop_recording()
+        else:
+            self.command_input.set_error(messages.Errors.INVALID_COMMAND_ERROR)
+
+    def _start_recording(self, directory: str) -> None:
+        if len(self._scope_interfaces) == 0:
+            self.command_input.set_error(messages.Errors.SCOPE_DISCONNECTED_ERROR)
+            return
+        if any(scope_interface.recorder is not None for scope_interface in self._scope_interfaces):
+            self.command_input.set_error(messages.Errors.RECORDING_RUNNING_ERROR)
+            return
+        recorders: list[Recorder] = []
+        try:
+            for i, scope_interface in enumerate(self._scope_interfaces):
+                recorders.append(Recorder(os.path.join(directory, f'scope{i}'), 
+                                          scope_interface.scope.SCOPE_SPECS['memory_depth']))
+                recorders[-1].start()
+        except OSError as error:
+            for recorder in recorders:
+                recorder.stop()
+            logging.error(error)
+            self.command_input.set_error(messages.Errors.RECORDING_DIRECTORY_ERROR)
+            return
+        for scope_interface, recorder in zip(self._scope_interfaces, recorders):
+            scope_interface.set_recorder(recorder)
+            logging.info(f'recording to {recorder.directory}')
+
+    def _stop_recording(self) -> None:
+        if all(scope_interface.recorder is None for scope_interface in self._scope_interfaces):
+            self.command_input.set_error(messages.Errors.NOT_RECORDING_ERROR)
+            return
+        for i, scope_interface in enumerate(self._scope_interfaces):
+            recorder: Optional[Recorder] = scope_interface.recorder
+            if recorder is not None:
+                scope_interface.set_recorder(None)
+                self._log_recorder(i, recorder.directory, recorder.stop())
+
+    def _log_recording(self) -> None:
+        if all(scope_interface.recorder is None for scope_interface in self._scope_interfaces):
+            logging.info('not recording')
+        for i, scope_interface in enumerate(self._scope_interfaces):
+            if scope_interface.recorder is not None:
+                self._log_recorder(i, scope_interface.recorder.directory, scope_interface.recorder.snapshot())
+
+    def _log_recorder(self, scope_index: int, directory: str, snapshot: RecorderSnapshot) -> None:
+        error: str = '' if snapshot.error is None else f', write error: {snapshot.error}'
+        logging.info(f'scope {scope_index}: {snapshot.written} captures written to {directory}, '
+                     f'{snapshot.throughput/2**20:.1f} MB/s, dropped {snapshot.dropped}, '
+                     f'queue {snapshot.queue_depth} (max {snapshot.max_queue_depth}){error}')
+
+    def _exit(self) -> None:
+        # Queued captures are written and the recording index is closed before leaving.
+        for scope_interface in self._scope_interfaces:
+            if scope_interface.recorder is not None:
+                scope_interface.recorder.stop()
+        exit()
+
+    def _on_timing_command(self) -> None:
+        # Without --debug the first timing command starts collecting.
+        stage_timings.enabled = True
+        logging.info('stage timings\n' + stage_timings.report())
+        for i, start_event_queue in enumerate(self._start_event_queue):
+            logging.info(f'scope {i}: {start_event_queue.coalesced} superseded events were not sent')
+
+    def _update_timing_readout(self, scope_index: int) -> None:
+        serial = stage_timings.percentiles(timing.SERIAL) or stage_timings.percentiles(timing.ARMED)
+        render_stages = [stage_timings.percentiles(stage) for stage in (timing.RESAMPLE, timing.QUANTIZE, timing.DRAW)]
+        if serial is not None and None not in render_stages:
+            self._readouts[scope_index].set_timing(serial[0], sum(stage[0] for stage in render_stages))
+
     def _update_cursor(self, arithmatic_fn: Callable[[], None]) -> None:
         arithmatic_fn()
         self._readouts[0].update_cursors(self.cursors.get_cursor_dict(self.scale.hor, self.scale.vert))
@@ -631,13 +985,13 @@ class UserInterface:
                                   probe_div=self.scale.probe_div,
                                   map=self.scope_display.image_map,
                                   cursor_data=self.cursors.get_cursor_dict(self.scale.hor, self.scale.vert))
-        export_png(settings, filename, self.scope_display.size)
+        export_png(settings, filename)
 
     def _on_auto_trigger_command(self):
         if self.scope_trigger.trigger_type == TriggerType.NORMAL or self.scope_trigger.trigger_type == TriggerType.SINGLE:
             self._stop_trigger()
         for start_event_queue in self._start_event_queue:
-            start_event_queue.append(Event.AUTO_TRIGGER)
+            start_event_queue.add(Event.AUTO_TRIGGER)
         self.scope_trigger.trigger_type = TriggerType.AUTO
 
     def _on_normal_trigger_command(self):
@@ -645,17 +999,17 @@ class UserInterface:
             self._stop_trigger()
             for i, start_event_queue in enumerate(self._start_event_queue):
                 if i == 0:
-                    start_event_queue.append(Event.ENABLE_SIGNAL_TRIGGER)
+                    start_event_queue.add(Event.ENABLE_SIGNAL_TRIGGER)
                 else:
-                    start_event_queue.append(Event.DISABLE_SIGNAL_TRIGGER)
-                start_event_queue.append(Event.NORMAL_TRIGGER)
+                    start_event_queue.add(Event.DISABLE_SIGNAL_TRIGGER)
+                start_event_queue.add(Event.NORMAL_TRIGGER)
         else:
             for i, start_event_queue in enumerate(self._start_event_queue):
                 if i == 0:
-                    start_event_queue.append(Event.ENABLE_SIGNAL_TRIGGER)
+                    start_event_queue.add(Event.ENABLE_SIGNAL_TRIGGER)
                 else:
-                    start_event_queue.append(Event.DISABLE_SIGNAL_TRIGGER)
-                start_event_queue.append(Event.NORMAL_TRIGGER)
+                    start_event_queue.add(Event.DISABLE_SIGNAL_TRIGGER)
+                start_event_queue.add(Event.NORMAL_TRIGGER)
         self.scope_trigger.trigger_type = TriggerType.NORMAL
         self.scope_status = Scope_Status.ARMED
         self._update_scope_status()
@@ -664,7 +1018,7 @@ class UserInterface:
         if self.scope_trigger.trigger_type == TriggerType.AUTO or self.scope_trigger.trigger_type == TriggerType.NORMAL:
             self._stop_trigger()
         for start_event_queue in self._start_event_queue:
-            start_event_queue.append(Event.SINGLE_TRIGGER)
+            start_event_queue.add(Event.SINGLE_TRIGGER)
         self.scope_trigger.trigger_type = TriggerType.SINGLE
         self.scope_status = Scope_Status.ARMED
         self._update_scope_status()
@@ -672,36 +1026,89 @@ class UserInterface:
     def _on_trigger_rising_edge_command(self):
         self._pause_trigger()
         for start_event_queue in self._start_event_queue:
-            start_event_queue.append(Event.SET_RISING_EDGE_TRIGGER)
+            start_event_queue.add(Event.SET_RISING_EDGE_TRIGGER)
             self._resume_trigger(start_event_queue)
 
     def _on_trigger_falling_edge_command(self):
         self._pause_trigger()
         for start_event_queue in self._start_event_queue:
-            start_event_queue.append(Event.SET_FALLING_EDGE_TRIGGER)
+            start_event_queue.add(Event.SET_FALLING_EDGE_TRIGGER)
             self._resume_trigger(start_event_queue)
 
-    def _on_set_cal_offsets_command(self) -> None: [start_event_queue.append(Event.SET_CAL_OFFSETS) for start_event_queue in self._start_event_queue]
+    def _on_set_cal_offsets_command(self, reference: Optional[str]=None) -> None:
+        try:
+            reference_volts: Optional[float] = None if reference is None else float(reference)
+        except ValueError as _:
+            self.command_input.set_error(messages.Errors.INVALID_COMMAND_ERROR)
+            return
+        # The reference goes to the scope when the event starts, a pending calibration takes the latest one.
+        for i, start_event_queue in enumerate(self._start_event_queue):
+            self._calibration_references[i] = reference_volts
+            start_event_queue.add(Event.SET_CAL_OFFSETS)
+
+    def _on_clear_cal_command(self) -> None:
+        if len(self._scope_interfaces) == 0:
+            self._calibration_cache.invalidate()
+            return
+        for i, scope_interface in enumerate(self._scope_interfaces):
+            scope_interface.invalidate_calibration_cache()
+            if isinstance(scope_interface.scope, NS1):
+                self._start_event_queue[i].add(Event.READ_CAL_OFFSETS)
+
+    def _on_record_command(self) -> None: [start_event_queue.add(Event.RECORD_SAMPLE) for start_event_queue in self._start_event_queue]
 
-    def _on_record_command(self) -> None: [start_event_queue.append(Event.RECORD_SAMPLE) for start_event_queue in self._start_event_queue]
+    def _new_capture(self, scope_index: int) -> Optional[NDArray[np.float64]]:
+        '''The capture the scope just returned, None if it failed so the previous capture is not shown as new.'''
+        scope_interface: ScopeInterface = self._scope_interfaces[scope_index]
+        self._readouts[scope_index].set_acquisition(scope_interface.stats.snapshot())
+        if scope_interface.last_outcome != ReadOutcome.COMPLETE:
+            if self.debug:
+                logging.info(f'capture {scope_interface.last_outcome.name}, scope index: {scope_index}')
+            return None
+        return scope_interface.latest_capture()
 
     def display_signal(self, xx: list[float], triggered: bool, scope_index: int) -> None:
+        # Captures still go to the history while a history frame is shown.
+        if self._history_sequences is not None:
+            return
         if xx is not None and len(xx) > 0:
             self._readouts[scope_index].set_average(average(xx))
             self._readouts[scope_index].set_rms(rms(xx))
             self.scope_display.add_vector(xx, scope_index)
-            fir_length = self._scope_interfaces[0].scope.FIR_LENGTH if self._scope_interfaces[0].scope.DIGITAL_FILTER else None
             self.scope_display.resample_vector(self.scale.hor, self.scale.vert, self.scale.fs, 
                                                self._scope_interfaces[0].scope.SCOPE_SPECS['memory_depth'], 
                                                self.scope_trigger.trigger_type, triggered,
-                                               scope_index, FIR_length=fir_length)
+                                               scope_index, FIR_length=self._fir_length(scope_index))
+            if self._zoom is not None:
+                # A single capture that arrives while zoomed is shown zoomed.
+                self._update_zoom()
             self.scope_status = Scope_Status.TRIGGERED
             self._update_scope_status()
+            self._record_display_latency(scope_index)
+            if stage_timings.enabled:
+                self._update_timing_readout(scope_index)
+
+    def _record_display_latency(self, scope_index: int) -> None:
+        capture_time = self._scope_interfaces[scope_index].capture_time
+        if capture_time is not None:
+            latency: float = perf_counter() - capture_time
+            stage_timings.record(timing.CAPTURE_TO_DISPLAY, latency)
+            self._display_latency.append(latency)
+            if len(self._display_latency) > self.DISPLAY_LATENCY_HISTORY:
+                self._display_latency.pop(0)
+            if self.debug:
+                logging.info(f'capture to display latency: {latency*1000:.2f} ms, scope index: {scope_index}')
     
     def _stop_trigger(self) -> None:
+        for scope_interface in self._scope_interfaces:
+            scope_interface.set_auto_rearm(False)
         if self.scope_trigger.trigger_type == TriggerType.NORMAL or self.scope_trigger.trigger_type == TriggerType.SINGLE:
             for scope_interface in self._scope_interfaces:
                 scope_interface.stop_trigger()
+            # A trigger that has not started yet would wait for a trigger event after the stop.
+            for start_event_queue in self._start_event_queue:
+                start_event_queue.discard(Event.NORMAL_TRIGGER)
+                start_event_queue.discard(Event.SINGLE_TRIGGER)
             for end_event_queue in self._end_event_queue:
                 if len(end_event_queue) > 0:
                     if end_event_queue[0] == Event.NORMAL_TRIGGER or end_event_queue[0] == Event.SINGLE_TRIGGER:
@@ -2,6 +2,13 @@ class Errors:
     SERIAL_PORT_CONNECTION_ERROR:str = 'Could not connect to scope serial port.'
     SCOPE_DISCONNECTED_ERROR:str = 'No Scope is Connected.'
     INVALID_COMMAND_ERROR:str = 'Invalid Command.'
+    CALIBRATION_ERROR:str = 'Calibration did not converge, check the input.'
+    ZOOM_RUNNING_ERROR:str = 'Stop the trigger to zoom the held capture.'
+    ZOOM_NO_CAPTURE_ERROR:str = 'There is no capture to zoom.'
+    HISTORY_EMPTY_ERROR:str = 'There are no captures in the history.'
+    RECORDING_RUNNING_ERROR:str = 'A recording is already running.'
+    NOT_RECORDING_ERROR:str = 'No recording is running.'
+    RECORDING_DIRECTORY_ERROR:str = 'Could not create the recording directory.'
 
 class Messages:
     SERIAL_PORT_CONNECTION_SUCCESS:str = 'Successfully connected to scope.'
@@ -0,0 +1,48 @@
+import numpy as np
+from numpy.typing import NDArray
+
+from voltpeek.resample import FILL_VALUE
+
+class MinMaxPyramid:
+    '''
+    The minimum and maximum of one capture over blocks of 1, 2, 4, 8 ... samples, built once per capture.
+    A query reduces the coarsest level whose blocks still fit in a pixel column, so it costs about two blocks
+    per column however many samples the columns cover. Column edges are rounded to that level's blocks.
+    '''
+    def __init__(self, vector: NDArray[np.float64]) -> None:
+        self._length: int = len(vector)
+        mins: NDArray[np.float64] = np.asarray(vector, dtype=np.float64)
+        maxs: NDArray[np.float64] = mins
+        self._levels: list[tuple[NDArray[np.float64], NDArray[np.float64]]] = [(mins, maxs)]
+        while len(mins) > 1:
+            if len(mins) % 2 == 1:
+                mins = np.append(mins, mins[-1])
+                maxs = np.append(maxs, maxs[-1])
+            mins = np.minimum(mins[0::2], mins[1::2])
+            maxs = np.maximum(maxs[0::2], maxs[1::2])
+            self._levels.append((mins, maxs))
+
+    def level(self, samples_per_column: float) -> int:
+        if samples_per_column < 2:
+            return 0
+        return min(int(np.floor(np.log2(samples_per_column))), len(self._levels) - 1)
+
+    def min_max(self, sample_positions: NDArray[np.float64],
+                samples_per_column: float) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        '''The minimum and maximum of each column, a column starts at its sample position and spans samples_per_column.'''
+        level: int = self.level(samples_per_column)
+        mins, maxs = self._levels[level]
+        boundaries = np.append(sample_positions, sample_positions[-1] + samples_per_column)/(2**level)
+        starts = np.clip(np.floor(boundaries).astype(np.intp), 0, len(mins) - 1)
+        # The extra boundary closes the last column, its reduction is dropped.
+        column_mins = np.minimum.reduceat(mins, starts)[:-1]
+        column_maxs = np.maximum.reduceat(maxs, starts)[:-1]
+        out_of_capture = (sample_positions < 0) | (sample_positions > self._length - 1)
+        column_mins[out_of_capture] = FILL_VALUE
+        column_maxs[out_of_capture] = FILL_VALUE
+        return column_mins, column_maxs
+
+    @property
+    def levels(self) -> int: return len(self._levels)
+
+    def __len__(self) -> int: return self._length
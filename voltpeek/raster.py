@@ -0,0 +1,39 @@
+import numpy as np
+from numpy.typing import NDArray
+
+# Traces are rasterized as one vertical span per pixel column, top and bottom are the rows at either end. Columns
+# without a span have top > bottom.
+
+def empty_spans(width: int) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    return np.full(width, np.inf), np.full(width, -np.inf)
+
+def column_spans(x: NDArray, top: NDArray, bottom: NDArray, width: int) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    column_top, column_bottom = empty_spans(width)
+    in_image = (x >= 0) & (x < width)
+    column_top[x[in_image]] = top[in_image]
+    column_bottom[x[in_image]] = bottom[in_image]
+    return column_top, column_bottom
+
+def staircase_spans(x: NDArray, y: NDArray, width: int) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    '''Spans of a trace that steps vertically from the previous sample to the next in each column.'''
+    if len(x) == 0:
+        return empty_spans(width)
+    previous_y = np.concatenate((y[:1], y[:-1]))
+    return column_spans(x, np.minimum(previous_y, y), np.maximum(previous_y, y), width)
+
+def thicken(top: NDArray[np.float64], bottom: NDArray[np.float64],
+            radius: int) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    '''Grow every span by radius pixels in each direction.'''
+    top, bottom = top - radius, bottom + radius
+    grown_top, grown_bottom = top.copy(), bottom.copy()
+    for shift in range(1, radius+1):
+        np.minimum(grown_top[shift:], top[:-shift], out=grown_top[shift:])
+        np.minimum(grown_top[:-shift], top[shift:], out=grown_top[:-shift])
+        np.maximum(grown_bottom[shift:], bottom[:-shift], out=grown_bottom[shift:])
+        np.maximum(grown_bottom[:-shift], bottom[shift:], out=grown_bottom[:-shift])
+    return grown_top, grown_bottom
+
+def fill_spans(image: NDArray[np.uint8], top: NDArray[np.float64], bottom: NDArray[np.float64],
+               color: tuple[int, int, int]) -> None:
+    rows = np.arange(image.shape[0])[:, np.newaxis]
+    image[(rows >= np.floor(top)) & (rows <= np.floor(bottom))] = color
@@ -0,0 +1,223 @@
+from dataclasses import dataclass
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+from time import perf_counter, time
+from typing import Callable, Iterator, Optional
+import json
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from voltpeek.capture import Capture, CaptureSettings
+from voltpeek.filters import parse_filter
+from voltpeek.history import HistoryFrame
+
+INDEX_FILENAME: str = 'recording.json'
+# Fields stored for each frame next to its codes
+FRAME_DTYPE = np.dtype([('sequence', np.int64), ('timestamp', np.float64), ('full_scale', np.float64),
+                        ('high_range', np.bool_), ('amplifier_gain', np.bool_), ('clock_div', np.int32),
+                        ('fs', np.float64), ('fir_filter', 'U16'), ('volts_per_code', np.float64),
+                        ('zero_code', np.float64), ('calibration_offset', np.float64), ('calibration_gain', np.float64)])
+
+def codes_filename(segment: int) -> str: return f'codes_{segment:05d}.npy'
+
+def frames_filename(segment: int) -> str: return f'frames_{segment:05d}.npy'
+
+@dataclass(frozen=True)
+class RecorderSnapshot:
+    written: int
+    # Captures dropped because the queue was full or the writer failed
+    dropped: int
+    bytes_written: int
+    queue_depth: int
+    max_queue_depth: int
+    # Bytes per second written since the recording started
+    throughput: float
+    error: Optional[str]
+
+class Recorder:
+    '''
+    Writes the raw codes and settings of every capture of one scope to disk. The scope worker only copies
+    the codes into a bounded queue, a writer thread moves them into segment files that are allocated
+    SEGMENT_FRAMES frames at a time and memory mapped, so the acquisition never waits on the disk. When the
+    queue is full the capture is dropped and counted. Each segment is a codes .npy file of frames by
+    samples and a frames .npy file of per frame settings. The index that counts the frames of each segment
+    is replaced whenever a segment fills and at least every index_interval seconds while frames are written,
+    so a recording whose process died can be read up to then. read_recording reads a recording back.
+    '''
+    QUEUE_SIZE: int = 64
+    SEGMENT_FRAMES: int = 256
+    INDEX_INTERVAL: float = 1
+
+    def __init__(self, directory: str, frame_length: int, queue_size: int=QUEUE_SIZE,
+                 segment_frames: int=SEGMENT_FRAMES, index_interval: float=INDEX_INTERVAL) -> None:
+        if queue_size < 1 or segment_frames < 1:
+            raise ValueError('A recorder needs a queue and segments of at least one frame.')
+        self._directory: str = directory
+        self._frame_length: int = frame_length
+        self._segment_frames: int = segment_frames
+        self._index_interval: float = index_interval
+        self._queue: Queue[Optional[HistoryFrame]] = Queue(queue_size)
+        self._writer: Thread = Thread(target=self._run_writer, daemon=True)
+        self._sequence: int = 0
+        # Frames in each segment, the last one is still being written
+        self._segment_lengths: list[int] = []
+        self._codes: Optional[np.memmap] = None
+        self._frames: Optional[np.memmap] = None
+        # Set while written frames are missing from the index
+        self._index_stale: bool = False
+        self._index_time: float = 0
+        self._written: int = 0
+        self._dropped: int = 0
+        self._max_queue_depth: int = 0
+        self._started: Optional[float] = None
+        self._stopped: Optional[float] = None
+        self._error: Optional[str] = None
+        self._lock: Lock = Lock()
+
+    def start(self) -> None:
+        '''Create the directory and start the writer. Raises OSError if the directory cannot be written.'''
+        os.makedirs(self._directory, exist_ok=True)
+        self._write_index()
+        self._started = perf_counter()
+        self._writer.start()
+
+    # Called on the scope worker, it never blocks. Every capture takes a sequence number, so drops show as gaps.
+    def submit(self, capture: Capture, timestamp: Optional[float]=None) -> bool:
+        with self._lock:
+            self._sequence += 1
+            sequence: int = self._sequence
+        if self._error is not None or capture.codes is None or len(capture.codes) != self._frame_length:
+            return self._drop()
+        try:
+            self._queue.put_nowait(HistoryFrame(capture.copy(), time() if timestamp is None else timestamp, sequence))
+        except Full:
+            return self._drop()
+        with self._lock:
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return True
+
+    def _drop(self) -> bool:
+        with self._lock:
+            self._dropped += 1
+        return False
+
+    def stop(self, timeout: Optional[float]=None) -> RecorderSnapshot:
+        '''Write the frames still queued, close the last segment and return the final snapshot.'''
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout)
+        self._stopped = perf_counter()
+        return self.snapshot()
+
+    def _run_writer(self) -> None:
+        while True:
+            try:
+                # Frames missing from the index are added once no capture arrives for index_interval.
+                frame: Optional[HistoryFrame] = self._queue.get(timeout=self._index_interval if self._index_stale else None)
+            except Empty:
+                self._write_to_disk(self._update_index)
+                continue
+            if frame is None:
+                break
+            if self._error is not None or not self._write_to_disk(lambda: self._write_frame(frame)):
+                self._drop()
+        self._write_to_disk(self._close_segment)
+        self._write_to_disk(self._update_index)
+
+    # An OSError stops the recording, it is reported in the snapshot.
+    def _write_to_disk(self, write: Callable[[], None]) -> bool:
+        try:
+            write()
+            return True
+        except OSError as error:
+            self._error = str(error)
+            return False
+
+    def _open_segment(self) -> None:
+        segment: int = len(self._segment_lengths)
+        self._codes = open_memmap(os.path.join(self._directory, codes_filename(segment)), mode='w+', dtype=np.uint8,
+                                  shape=(self._segment_frames, self._frame_length))
+        self._frames = open_memmap(os.path.join(self._directory, frames_filename(segment)), mode='w+',
+                                   dtype=FRAME_DTYPE, shape=(self._segment_frames,))
+        self._segment_lengths.append(0)
+
+    def _close_segment(self) -> None:
+        if self._codes is not None:
+            self._codes.flush()
+            self._frames.flush()
+            self._codes = None
+            self._frames = None
+
+    def _write_frame(self, frame: HistoryFrame) -> None:
+        if self._codes is None:
+            self._open_segment()
+        row: int = self._segment_lengths[-1]
+        settings: CaptureSettings = frame.capture.settings
+        self._codes[row] = frame.capture.codes
+        self._frames[row] = (frame.sequence, frame.timestamp, settings.full_scale, settings.high_range,
+                             settings.amplifier_gain, settings.clock_div, settings.fs, str(settings.fir_filter),
+                             settings.volts_per_code, settings.zero_code, settings.calibration_offset,
+                             settings.calibration_gain)
+        self._segment_lengths[-1] += 1
+        self._index_stale = True
+        with self._lock:
+            self._written += 1
+        if self._segment_lengths[-1] == self._segment_frames:
+            self._close_segment()
+            self._update_index()
+        elif perf_counter() - self._index_time >= self._index_interval:
+            self._update_index()
+
+    def _update_index(self) -> None:
+        # The frames reach the segment files before the index counts them.
+        if self._codes is not None:
+            self._codes.flush()
+            self._frames.flush()
+        self._write_index()
+        self._index_stale = False
+        self._index_time = perf_counter()
+
+    # Readers see the old or the new index, never a partly written one.
+    def _write_index(self) -> None:
+        index = {'frame_length': self._frame_length, 'segment_frames': self._segment_frames,
+                 'segments': list(self._segment_lengths)}
+        index_path: str = os.path.join(self._directory, INDEX_FILENAME)
+        with open(index_path + '.tmp', 'w') as index_file:
+            json.dump(index, index_file, indent=4)
+        os.replace(index_path + '.tmp', index_path)
+
+    def snapshot(self) -> RecorderSnapshot:
+        with self._lock:
+            written, dropped, max_queue_depth = self._written, self._dropped, self._max_queue_depth
+        elapsed: float = 0
+        if self._started is not None:
+            elapsed = (perf_counter() if self._stopped is None else self._stopped) - self._started
+        bytes_written: int = written*self._frame_length
+        return RecorderSnapshot(written, dropped, bytes_written, self._queue.qsize(), max_queue_depth,
+                                bytes_written/elapsed if elapsed > 0 else 0, self._error)
+
+    @property
+    def directory(self) -> str: return self._directory
+
+    @property
+    def recording(self) -> bool: return self._writer.is_alive()
+
+def read_recording(directory: str) -> Iterator[HistoryFrame]:
+    '''
+    The frames of a recording in the order they were written, up to the last index update while it is still
+    being written. Their codes are memory mapped.
+    '''
+    with open(os.path.join(directory, INDEX_FILENAME), 'r') as index_file:
+        index = json.load(index_file)
+    for segment, length in enumerate(index['segments']):
+        codes = np.load(os.path.join(directory, codes_filename(segment)), mmap_mode='r')
+        frames = np.load(os.path.join(directory, frames_filename(segment)))
+        for row in range(0, length):
+            frame = frames[row]
+            settings = CaptureSettings(float(frame['full_scale']), bool(frame['high_range']), bool(frame['amplifier_gain']),
+                                       int(frame['clock_div']), float(frame['fs']), parse_filter(str(frame['fir_filter'])),
+                                       float(frame['volts_per_code']), float(frame['zero_code']),
+                                       float(frame['calibration_offset']), float(frame['calibration_gain']))
+            yield HistoryFrame(Capture(codes[row], settings), float(frame['timestamp']), int(frame['sequence']))
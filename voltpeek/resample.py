@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import NDArray
+
+from voltpeek import constants
+
+# The signal can never possibly reach this amplitude. This distinguishes real signal vs out of horizontal capture.
+FILL_VALUE: float = -100
+# Peak detection only helps when several samples land in each pixel column.
+PEAK_DETECT_MIN_SAMPLES: float = 2
+
+@dataclass
+class ResampleGrid:
+    lower_indices: NDArray[np.intp]
+    upper_indices: NDArray[np.intp]
+    weights: NDArray[np.float64]
+    out_of_capture: NDArray[np.bool_]
+
+def make_grid(sample_positions: NDArray[np.float64], vector_length: int) -> ResampleGrid:
+    # Linear interpolation between the two samples around each fractional sample position.
+    lower_indices = np.clip(np.floor(sample_positions).astype(np.intp), 0, max(vector_length - 2, 0))
+    upper_indices = np.minimum(lower_indices + 1, vector_length - 1)
+    weights = sample_positions - lower_indices
+    out_of_capture = (sample_positions < 0) | (sample_positions > vector_length - 1)
+    return ResampleGrid(lower_indices, upper_indices, weights, out_of_capture)
+
+def quantize_vertical(vector: NDArray[np.float64], vertical_setting: float, size: int) -> NDArray[np.float64]:
+    pixel_resolution: float = vertical_setting/(size/constants.Display.GRID_LINE_COUNT)
+    return np.add(np.multiply(vector, 1/pixel_resolution), int(size/2))
+
+class Resampler:
+    '''
+    Resamples captures onto the display pixel columns. The fractional sample position of every column only
+    depends on the horizontal setting, sample rate, capture length, display size and time shift, so it is
+    computed once for each combination and the interpolation is a gather into a reused buffer.
+    '''
+    MAX_CACHED_GRIDS: int = 32
+
+    def __init__(self, size: int) -> None:
+        self._size: int = size
+        self._grids: dict[tuple[float, float, int, float], tuple[NDArray[np.float64], ResampleGrid]] = {}
+        # Kept apart so the many shifts of trigger corrections and zoom pans never evict the unshifted grids
+        self._shifted_grids: dict[tuple[float, float, int, float], tuple[NDArray[np.float64], ResampleGrid]] = {}
+        self._columns: NDArray[np.float64] = np.arange(size, dtype=np.float64)
+        self._lower: NDArray[np.float64] = np.zeros(size)
+        self._upper: NDArray[np.float64] = np.zeros(size)
+        self._out: NDArray[np.float64] = np.zeros(size)
+
+    def sample_positions(self, hor_setting: float, fs: float, memory_depth: int, 
+                         time_shift: float=0) -> NDArray[np.float64]:
+        return self._cached_grid(hor_setting, fs, memory_depth, time_shift)[0]
+
+    def _cached_grid(self, hor_setting: float, fs: float, memory_depth: int, 
+                     time_shift: float=0) -> tuple[NDArray[np.float64], ResampleGrid]:
+        grids = self._grids if time_shift == 0 else self._shifted_grids
+        key = (hor_setting, fs, memory_depth, time_shift)
+        if key not in grids:
+            if len(grids) >= self.MAX_CACHED_GRIDS:
+                grids.clear()
+            if time_shift == 0:
+                new_T: float = hor_setting/(self._size/constants.Display.GRID_LINE_COUNT)
+                chop_time: float = (1/fs)*memory_depth - hor_setting*constants.Display.GRID_LINE_COUNT
+                sample_positions = np.add(self._columns*new_T, chop_time/2)*fs
+            else:
+                sample_positions = self._cached_grid(hor_setting, fs, memory_depth)[0] + time_shift*fs
+            grids[key] = (sample_positions, make_grid(sample_positions, memory_depth))
+        return grids[key]
+
+    def resample(self, vector: NDArray[np.float64], hor_setting: float, fs: float, time_shift: float=0) -> NDArray[np.float64]:
+        '''Returns a reused buffer, it is overwritten by the next call.'''
+        grid: ResampleGrid = self._cached_grid(hor_setting, fs, len(vector), time_shift)[1]
+        np.take(vector, grid.lower_indices, out=self._lower)
+        np.take(vector, grid.upper_indices, out=self._upper)
+        np.subtract(self._upper, self._lower, out=self._upper)
+        np.multiply(self._upper, grid.weights, out=self._upper)
+        np.add(self._lower, self._upper, out=self._out)
+        self._out[grid.out_of_capture] = FILL_VALUE
+        return self._out
+
+    def samples_per_column(self, hor_setting: float, fs: float) -> float:
+        return (hor_setting/(self._size/constants.Display.GRID_LINE_COUNT))*fs
+
+    def peak_detect_available(self, hor_setting: float, fs: float) -> bool:
+        return self.samples_per_column(hor_setting, fs) >= PEAK_DETECT_MIN_SAMPLES
+
+    def min_max(self, vector: NDArray[np.float64], hor_setting: float, fs: float, 
+                time_shift: float=0) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        '''The minimum and maximum of the samples falling in each pixel column.'''
+        sample_positions = self.sample_positions(hor_setting, fs, len(vector), time_shift)
+        # Each column starts at its own sample position and ends where the next column starts. The extra
+        # boundary closes the last column, its reduction is dropped.
+        boundaries = np.append(sample_positions, sample_positions[-1] + self.samples_per_column(hor_setting, fs))
+        starts = np.clip(np.floor(boundaries).astype(np.intp), 0, len(vector) - 1)
+        mins = np.minimum.reduceat(vector, starts)[:-1]
+        maxs = np.maximum.reduceat(vector, starts)[:-1]
+        out_of_capture = (sample_positions < 0) | (sample_positions > len(vector) - 1)
+        mins[out_of_capture] = FILL_VALUE
+        maxs[out_of_capture] = FILL_VALUE
+        return mins, maxs
+
+    @property
+    def size(self) -> int: return self._size
@@ -41,6 +41,21 @@ class Scale:
         if self._horizontal_index > 0: 
             self._horizontal_index -= 1
 
+    def set_vert(self, vert: float) -> None:
+        if vert not in self._verticals:
+            raise ValueError(f'{vert} V/div is not an available vertical scale.')
+        self._vertical_index = self._verticals.index(vert)
+        self._high_range_flip = False
+        self._low_range_flip = False
+
+    def set_hor(self, hor: float) -> None:
+        if hor not in self.HORIZONTALS:
+            raise ValueError(f'{hor} s/div is not an available horizontal scale.')
+        self._horizontal_index = self.HORIZONTALS.index(hor)
+
+    @property
+    def verticals(self) -> list[float]: return self._verticals
+
     @property
     def fs(self) -> Optional[int]: return self._fs
 
@@ -68,7 +83,6 @@ class Scale:
             raise ValueError('Not an existing probe division.')
         self._probe_div = probe_div
 
-    # TODO: possibly move these methods so they can be exposed to the scripting API
     def get_max_sample_rate(self, memory_depth: int) -> float:
         return (memory_depth/(self.hor*constants.Display.GRID_LINE_COUNT)) 
 
@@ -1,7 +1,22 @@
+from dataclasses import replace
 from typing import Optional, Callable, Dict
 from enum import Enum
-from threading import Thread, Lock
-from functools import wraps
+from threading import Thread, Event
+from queue import Queue
+from time import perf_counter
+
+import numpy as np
+from numpy.typing import NDArray
+
+from voltpeek.acquisition_stats import AcquisitionStats
+from voltpeek.calibration import CalibrationReport
+from voltpeek.calibration_cache import CalibrationCache, DeviceIdentity
+from voltpeek.capture import Capture
+from voltpeek.capture_ring import CaptureRing
+from voltpeek.filters import FilterSpec
+from voltpeek.history import WaveformHistory
+from voltpeek.recorder import Recorder
+from voltpeek.scopes.scope_base import ReadOutcome
 
 # Probably can just use the method names directly instead of this
 class ScopeAction(Enum):
@@ -22,30 +37,49 @@ class ScopeAction(Enum):
     DISABLE_SIGNAL_TRIGGER = 14
     START_RECORD = 15
 
-def scope_action_handler(func):
-    @wraps(func)
-    def wrapper(self, *args, **kwargs):
-        result = func(self, *args, **kwargs) 
-        self._action_complete = True
-        if self._data_available.locked():
-            self._data_available.release()
-        return result
-    return wrapper
-
 class ScopeInterface:
-    def __init__(self, scope, device=None):
+    # Three buffers let the worker fill one while the display holds one and one completed capture waits.
+    CAPTURE_RING_SIZE: int = 3
+    CAPTURE_ACTIONS: tuple[ScopeAction, ...] = (ScopeAction.TRIGGER, ScopeAction.FORCE_TRIGGER)
+
+    def __init__(self, scope, device=None, calibration_cache: Optional[CalibrationCache]=None):
         self._scope_connected: bool = False
-        self._xx: Optional[list[float]] = None
+        # What the driver returned for the most recent capture, a Capture or volts for drivers without raw codes
+        self._xx: Optional[Capture | list[float]] = None
+        self._captures: CaptureRing = CaptureRing(self.CAPTURE_RING_SIZE)
+        # The capture held by the reader and the publish time of the ring buffer it wraps
+        self._held_capture: Optional[Capture] = None
+        self._held_time: Optional[float] = None
+        self._capture_count: int = 0
+        # Recent captures of drivers that keep the raw codes
+        self._history: WaveformHistory = WaveformHistory()
+        # Streams the raw captures to disk while set
+        self._recorder: Optional[Recorder] = None
+        self._stats: AcquisitionStats = AcquisitionStats()
+        self._last_outcome: ReadOutcome = ReadOutcome.COMPLETE
         self._record: list[float] = []
         self._calibration_ints: list[int] = None
+        self._calibration_cache: Optional[CalibrationCache] = calibration_cache
+        # Set while offsets loaded from the cache wait for the first capture to show the scope answers.
+        self._unchecked_identity: Optional[DeviceIdentity] = None
+        # Volts applied to the input for a gain calibration, None calibrates the offsets of a disconnected input.
+        self._calibration_reference: Optional[float] = None
+        self._calibration_report: Optional[CalibrationReport] = None
         if device is None:
             self._scope = scope() 
         else:
             self._device = device
             self._scope = scope(port=device)
-        self._data_available: Lock = Lock()
+        # Set while the worker is waiting for an action.
+        self._idle: Event = Event()
+        self._idle.set()
+        self._actions: Queue[Optional[ScopeAction]] = Queue()
         self._action: ScopeAction = None
         self._action_complete: bool = True
+        self._action_listener: Optional[Callable[['ScopeInterface', ScopeAction], None]] = None
+        # Requested for auto mode, the worker starts the next force trigger itself while rearming is set.
+        self._auto_rearm: bool = False
+        self._rearming: bool = False
         self._value: Optional[int] = None
         self._stop_flag = False
         self._full_scale = 10
@@ -73,6 +107,37 @@ class ScopeInterface:
             ScopeAction.START_RECORD: self._start_record
         }
 
+        # Every action for this scope runs in order on one long lived worker thread.
+        self._worker: Thread = Thread(target=self._run_worker, daemon=True)
+        self._worker.start()
+
+    def _run_worker(self) -> None:
+        while True:
+            action: Optional[ScopeAction] = self._actions.get()
+            if action is None:
+                return
+            self._scope_available(self._action_handlers[action])
+            self._rearming = action == ScopeAction.FORCE_TRIGGER and self._continue_rearming()
+            self._action_complete = True
+            self._idle.set()
+            self._notify(action)
+            # The scope stays available while it re-arms, an action queued meanwhile runs after the capture in progress.
+            while self._rearming:
+                self._scope_available(self._force_trigger)
+                self._rearming = self._continue_rearming()
+                self._notify(ScopeAction.FORCE_TRIGGER)
+
+    def _continue_rearming(self) -> bool:
+        return self._auto_rearm and self._actions.empty() and not self._disconnected_error
+
+    def _notify(self, action: ScopeAction) -> None:
+        if self._action_listener is not None:
+            self._action_listener(self, action)
+
+    # The listener is called on the worker thread after every action.
+    def set_action_listener(self, listener: Optional[Callable[['ScopeInterface', ScopeAction], None]]) -> None:
+        self._action_listener = listener
+
     def _scope_available(self, scope_action: Callable):
         try:
             scope_action()
@@ -80,71 +145,217 @@ class ScopeInterface:
             print(_)
             self._disconnected_error = True
 
-    @scope_action_handler
     def _connect_scope(self):
         self._scope.connect()
         self._scope_connected = True
 
-    @scope_action_handler
-    def _force_trigger(self):
-        self._xx = self._scope.get_scope_force_trigger_data(self._full_scale)
+    def _read_capture(self) -> Optional[Capture]:
+        if self._xx is None or len(self._xx) == 0:
+            return None
+        return self._xx if isinstance(self._xx, Capture) else Capture.from_volts(self._xx)
+
+    # Only the codes are copied into the ring, the volts are converted once the capture is displayed.
+    def _publish_capture(self, capture: Optional[Capture]) -> None:
+        if capture is None:
+            return
+        self._capture_count += 1
+        if capture.codes is None:
+            self._captures.publish(capture.volts)
+        else:
+            self._captures.publish(capture.codes, capture.settings)
 
-    @scope_action_handler
-    def _trigger(self):
-        self._xx = self._scope.get_scope_trigger_data(self._full_scale)
+    def _acquire(self, read: Callable[[float], Optional[Capture | NDArray[np.float64]]]) -> None:
+        armed: float = perf_counter()
+        self._last_outcome = ReadOutcome.ERROR
+        try:
+            self._xx = read(self._full_scale)
+            self._last_outcome = self._read_outcome()
+        finally:
+            self._stats.record(self._last_outcome, armed, perf_counter())
+        self._check_cached_scope_answers()
+        capture: Optional[Capture] = self._read_capture()
+        self._publish_capture(capture)
+        if capture is not None and capture.codes is not None:
+            self._history.add(capture)
+            recorder: Optional[Recorder] = self._recorder
+            if recorder is not None:
+                recorder.submit(capture)
+
+    def _read_outcome(self) -> ReadOutcome:
+        if self._xx is not None and len(self._xx) > 0:
+            return ReadOutcome.COMPLETE
+        # Drivers that do not report how the read ended only return nothing when stopped or short.
+        outcome: Optional[ReadOutcome] = getattr(self._scope, 'last_read', None)
+        if outcome is not None and outcome != ReadOutcome.COMPLETE:
+            return outcome
+        return ReadOutcome.STOPPED if self._stop_flag else ReadOutcome.INCOMPLETE
+
+    # Drivers that keep the raw codes return a Capture, the others return volts.
+    def _force_trigger(self): 
+        self._acquire(getattr(self._scope, 'get_scope_force_trigger_capture', self._scope.get_scope_force_trigger_data))
+
+    def _trigger(self): self._acquire(getattr(self._scope, 'get_scope_trigger_capture', self._scope.get_scope_trigger_data))
 
-    @scope_action_handler
     def _set_clock_div(self): self._scope.set_clock_div(self._value)
 
-    @scope_action_handler
     def _set_range(self): self._scope.set_range(self._full_scale)
 
-    @scope_action_handler
     def _set_amplifier_gain(self): self._scope.set_amplifier_gain(self._full_scale)
 
-    @scope_action_handler
     def _set_trigger_level(self): self._scope.set_trigger_voltage(self._value, self._full_scale)
 
-    @scope_action_handler
+    def _device_identity(self) -> Optional[DeviceIdentity]:
+        if self._calibration_cache is None or not hasattr(self._scope, 'device_identity'):
+            return None
+        return self._scope.device_identity(self._scope.port)
+
     def _read_cal_offsets(self):
+        identity: Optional[DeviceIdentity] = self._device_identity()
+        if identity is not None:
+            # Gains outlive the cached offsets, they are loaded even when the offsets are read from the device.
+            gains = self._calibration_cache.load_gains(identity)
+            if gains is not None and hasattr(self._scope, 'load_calibration_gains'):
+                self._scope.load_calibration_gains(gains)
+            offsets = self._calibration_cache.load(identity)
+            if offsets is not None:
+                self._scope.load_calibration_offsets(offsets)
+                self._calibration_ints = True
+                self._unchecked_identity = identity
+                return
+        self._read_device_cal_offsets(identity)
+
+    def _read_device_cal_offsets(self, identity: Optional[DeviceIdentity]) -> None:
         self._calibration_ints = self._scope.read_calibration_offsets()
         if self._calibration_ints is None:
             self._disconnected_error = True
+        elif identity is not None:
+            self._store_calibration(identity)
+
+    def _store_calibration(self, identity: DeviceIdentity) -> None:
+        self._calibration_cache.store(identity, self._scope.calibration_offsets, 
+                                      getattr(self._scope, 'calibration_gains', None))
+
+    # The input signal is unknown, so the cached offsets themselves cannot be checked. The first capture after loading
+    # them only shows that the scope with this serial number still completes a capture, it costs nothing extra.
+    def _check_cached_scope_answers(self) -> None:
+        identity: Optional[DeviceIdentity] = self._unchecked_identity
+        if identity is None or self._last_outcome == ReadOutcome.STOPPED:
+            return
+        self._unchecked_identity = None
+        if self._last_outcome != ReadOutcome.COMPLETE:
+            # The scope did not answer like the one that was cached, so read the offsets it holds.
+            self._calibration_cache.invalidate(identity.serial_number)
+            self._read_device_cal_offsets(identity)
+
+    def _set_cal_offsets(self):
+        try:
+            if self._calibration_reference is None:
+                self._calibration_report = self._scope.set_calibration_offsets(self._full_scale)
+            else:
+                self._calibration_report = self._scope.set_gain_calibration(self._calibration_reference, self._full_scale)
+        finally:
+            self._calibration_reference = None
+        identity: Optional[DeviceIdentity] = self._device_identity()
+        if identity is not None:
+            self._store_calibration(identity)
+
+    # Set right before each SET_CAL_OFFSETS action, it is cleared once the calibration has run.
+    def set_calibration_reference(self, reference: Optional[float]) -> None:
+        if self.data_available:
+            self._calibration_reference = reference
 
-    @scope_action_handler
-    def _set_cal_offsets(self): self._scope.set_calibration_offsets(self._full_scale)
+    # Drop this scope's cached offsets, the next READ_CAL_OFFSETS reads them from the device.
+    def invalidate_calibration_cache(self) -> None:
+        identity: Optional[DeviceIdentity] = self._device_identity()
+        self._unchecked_identity = None
+        if identity is not None:
+            self._calibration_cache.invalidate(identity.serial_number)
 
-    @scope_action_handler
     def _set_rising_edge_trigger(self): self._scope.set_rising_edge_trigger()
 
-    @scope_action_handler
     def _set_falling_edge_trigger(self): self._scope.set_falling_edge_trigger()
 
-    @scope_action_handler
     def _enable_signal_trigger(self): self._scope.enable_signal_trigger()
 
-    @scope_action_handler
     def _disable_signal_trigger(self): self._scope.disable_signal_trigger()
 
-    @scope_action_handler
     def _record_sample(self): 
         record_point = self._scope.record_sample(self._full_scale)
         self._record = [record_point]
         if record_point is None:
             self._disconnected_error = True
 
-    @scope_action_handler
     def _start_record(self) -> float: return self._scope.start_record() 
 
     @property
-    def data_available(self) -> bool: return not self._data_available.locked()
+    def data_available(self) -> bool: return self._idle.is_set()
+
+    def take_capture(self) -> Optional[Capture]:
+        '''The newest capture, it stays valid until the next one is taken. Its volts are converted on first use.'''
+        data: Optional[NDArray] = self._captures.take_latest()
+        held_time: Optional[float] = self._captures.held_time
+        if data is not None and held_time != self._held_time:
+            settings = self._captures.held_metadata
+            self._held_capture = Capture.from_volts(data) if settings is None else Capture(data, settings)
+            self._held_time = held_time
+        return self._held_capture
+
+    def refilter_capture(self, fir_filter: FilterSpec) -> Optional[Capture]:
+        '''Convert the held codes again with another filter. A capture held as volts is kept as it is.'''
+        capture: Optional[Capture] = self._held_capture
+        if capture is not None and capture.settings is not None:
+            self._held_capture = Capture(capture.codes, replace(capture.settings, fir_filter=fir_filter))
+        return self._held_capture
+
+    # Set while a published capture waits that has not been taken.
+    @property
+    def new_capture_available(self) -> bool: return self._captures.has_newest
+
+    # The capture most recently taken with take_capture or latest_capture
+    @property
+    def capture(self) -> Optional[Capture]: return self._held_capture
+
+    @property
+    def xx(self) -> Optional[NDArray[np.float64]]: return None if self._held_capture is None else self._held_capture.volts
+
+    def latest_capture(self) -> Optional[NDArray[np.float64]]:
+        capture: Optional[Capture] = self.take_capture()
+        return None if capture is None else capture.volts
+
+    # perf_counter time the held capture arrived
+    @property
+    def capture_time(self) -> Optional[float]: return self._captures.held_time
+
+    @property
+    def dropped_captures(self) -> int: return self._captures.dropped
 
+    # Number of captures the scope has returned, failed and stopped captures are not counted.
     @property
-    def xx(self) -> Optional[list[float]]: return self._xx
+    def capture_count(self) -> int: return self._capture_count
+
+    @property
+    def stats(self) -> AcquisitionStats: return self._stats
+
+    @property
+    def history(self) -> WaveformHistory: return self._history
+
+    # Captures taken after this are handed to the recorder, None stops handing them over.
+    def set_recorder(self, recorder: Optional[Recorder]) -> None: self._recorder = recorder
+
+    @property
+    def recorder(self) -> Optional[Recorder]: return self._recorder
+
+    # How the most recent trigger or force trigger ended, only a complete one published a capture.
+    @property
+    def last_outcome(self) -> ReadOutcome: return self._last_outcome
 
     @property
     def value(self) -> Optional[int]: return self._value
 
+    # Report of the most recent SET_CAL_OFFSETS, None until one has run or for drivers that do not report
+    @property
+    def calibration_report(self) -> Optional[CalibrationReport]: return self._calibration_report
+
     @property
     def calibration_ints(self) -> Optional[list[int]]: return self._calibration_ints
 
@@ -173,17 +384,33 @@ class ScopeInterface:
         if self.data_available and self._action_complete and new_scope_action in self._action_handlers:
             self._action = new_scope_action
             self._action_complete = False
-            self._data_available.acquire()
-            thread = Thread(target=lambda: self._scope_available(self._action_handlers[self._action]))
-            thread.start()
+            self._idle.clear()
+            # A stop left from an earlier capture must not end or be counted against this one, a stop from here on does.
+            if new_scope_action in self.CAPTURE_ACTIONS:
+                self._stop_flag = False
+                if hasattr(self._scope, 'clear_stop'):
+                    self._scope.clear_stop()
+            self._actions.put(new_scope_action)
             return True
         return False
-        
+
+    # In auto mode each force trigger is followed by the next one on the worker, without waiting for the display to
+    # take the capture. It ends once another action is queued or auto_rearm is cleared.
+    def set_auto_rearm(self, auto_rearm: bool) -> None: self._auto_rearm = auto_rearm
+
+    # Set while the worker is taking captures on its own, each one wakes the action listener.
+    @property
+    def rearming(self) -> bool: return self._rearming
+
+    def wait_for_action(self, timeout: Optional[float]=None) -> bool: return self._idle.wait(timeout)
+
+    # The worker finishes the interrupted read and then becomes available again. A stop that arrives before the
+    # read starts ends the read as soon as it starts.
     def stop_trigger(self): 
         self._stop_flag = True
         self._scope.stop_trigger()
-        if self._data_available.locked():
-            self._data_available.release()
+
+    def close(self) -> None: self._actions.put(None)
 
     def reset_stop_flag(self): self._stop_flag = False
 
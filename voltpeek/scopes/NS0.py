@@ -1,14 +1,17 @@
 from typing import Optional
 from threading import Event
-from time import sleep
 
 from serial import Serial
 
 import numpy as np
 from numpy.typing import NDArray
 
-from voltpeek.scopes.scope_base import ScopeBase, SoftwareScopeSpecs
+from voltpeek.scopes.scope_base import ScopeBase, SoftwareScopeSpecs, ReadOutcome, DeviceState
 from voltpeek.scopes.pico import Pico
+from voltpeek.scopes.serial_read import read_exact
+
+from voltpeek import timing
+from voltpeek.timing import stage_timings
 
 class NS0(ScopeBase, Pico):
     DIGITAL_FILTER = False
@@ -40,13 +43,24 @@ class NS0(ScopeBase, Pico):
     ENABLE_SIGNAL_TRIGGER_COMMAND: bytes = b'I'
     DISABLE_SIGNAL_TRIGGER_COMMAND: bytes = b'i'
 
+    # Serial reads block for at most this long so a stop request is noticed quickly.
+    READ_POLL_INTERVAL: float = 0.05
+    FORCE_TRIGGER_TIMEOUT: float = 2
+
     def __init__(self, baudrate: int=115200, port: Optional[str]=None):
         self.baudrate = baudrate
         self.port: Optional[str] = port
         self.error: bool = False
         self._stop: Event = Event()
         self._xx: list[float] = []
+        # How the most recent capture read ended
+        self.last_read: ReadOutcome = ReadOutcome.COMPLETE
+        # Captures are read straight into this buffer, it is reused for every capture.
+        self._glob_buffer: bytearray = bytearray(self.SCOPE_SPECS['memory_depth'])
+        self._glob_view: memoryview = memoryview(self._glob_buffer)
         self._cal_offset = 0
+        # Only the clock divider is a setting on the NS0.
+        self._device_state: DeviceState = DeviceState()
 
     def connect(self) -> None:
         try:
@@ -56,63 +70,67 @@ class NS0(ScopeBase, Pico):
             self.serial_port: Serial = Serial(timeout=1)
             self.serial_port.baudrate = self.baudrate
             self.serial_port.port = self.port
-            self.serial_port.timeout = 100 #ms
+            self.serial_port.timeout = self.READ_POLL_INTERVAL
             self.serial_port.open()
             self._purge_serial_buffers()
+            self._device_state = DeviceState()
         except Exception as _:
             print('NS0 connect exception')
             print(_)
             self.error = True
 
-    def read_glob_data(self):
-        codes: list[str] = []
-        while len(codes) < self.SCOPE_SPECS['memory_depth']: 
-            if self._stop.is_set():
-                self._purge_serial_buffers()
-                self._stop.clear()
-                return None
-            try:
-                new_data = self.serial_port.read(self.serial_port.inWaiting())
-                if new_data is None:
-                    # This is probably dead code
-                    return None
-                else:
-                    codes += list(new_data)
-                    sleep(0.0001)
-            except (OSError, IOError) as _:
-                return None
-            except Exception as _:
-                return None
+    def read_glob_data(self, timeout: Optional[float]=None) -> Optional[NDArray[np.uint8]]:
+        try:
+            received: int = read_exact(self.serial_port, self._glob_view, self._stop, timeout)
+        except (OSError, IOError) as _:
+            self.last_read = ReadOutcome.ERROR
+            return None
+        except Exception as _:
+            self.last_read = ReadOutcome.ERROR
+            return None
         if self._stop.is_set():
             self._purge_serial_buffers()
             self._stop.clear()
+            self.last_read = ReadOutcome.STOPPED
             return None
-        return codes[0:self.SCOPE_SPECS['memory_depth']]
+        if received < self.SCOPE_SPECS['memory_depth']:
+            self.last_read = ReadOutcome.INCOMPLETE if received > 0 else ReadOutcome.TIMEOUT
+            return None
+        self.last_read = ReadOutcome.COMPLETE
+        # Zero copy view of the capture buffer, it is only valid until the next read.
+        return np.frombuffer(self._glob_buffer, dtype=np.uint8)
     
     def _purge_serial_buffers(self):
         while self.serial_port.in_waiting:
             self.serial_port.read(self.serial_port.inWaiting())
+        # Only stale input is discarded, flushing the output could drop setting commands that are still queued.
         self.serial_port.reset_input_buffer()
-        self.serial_port.reset_output_buffer()
 
     def get_scope_trigger_data(self):
         pass
 
-    def _reconstruct(self, codes: list[int]) -> NDArray:
+    def _reconstruct(self, codes: NDArray[np.uint8]) -> NDArray:
         LSB: float = self.SCOPE_SPECS['voltage_ref']/self.SCOPE_SPECS['resolution']
         return np.multiply(np.array(codes), LSB)
     
     def get_scope_force_trigger_data(self, full_scale: float, offset_null=True) -> list[float]:
         self._purge_serial_buffers()
         self.serial_port.write(self.FORCE_TRIGGER_COMMAND) 
-        new_codes = self.read_glob_data()
+        with stage_timings.measure(timing.SERIAL):
+            new_codes = self.read_glob_data(self.FORCE_TRIGGER_TIMEOUT)
+        # A failed read returns no capture rather than the previous one.
+        self._xx = []
         if new_codes is not None and len(new_codes) == self.SCOPE_SPECS['memory_depth']:
-            self._xx = self._reconstruct(new_codes)
+            with stage_timings.measure(timing.RECONSTRUCT):
+                self._xx = self._reconstruct(new_codes)
         return self._xx 
 
     def set_clock_div(self, clock_div: int) -> None:
+        if self._device_state.clock_div == clock_div:
+            return
         self.serial_port.write(self.CLOCK_DIV_COMMAND) 
         self.serial_port.write(bytes(str(clock_div) + '\0', 'utf-8')) 
+        self._device_state.clock_div = clock_div
 
     def set_trigger_voltage(self, trigger_voltage: float, full_scale: float) -> None:
         pass
@@ -132,4 +150,6 @@ class NS0(ScopeBase, Pico):
     def disconnect(self) -> None:
         pass
 
-    def stop_trigger(self) -> None: self._stop.set()
\ No newline at end of file
+    def stop_trigger(self) -> None: self._stop.set()
+
+    def clear_stop(self) -> None: self._stop.clear()
\ No newline at end of file
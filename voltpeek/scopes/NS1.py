@@ -1,16 +1,23 @@
+from dataclasses import replace
 from typing import Optional
 from threading import Event
 from time import sleep
 
 import numpy as np
+from numpy.typing import NDArray
 from serial import Serial
 from serial.tools import list_ports
 
-from voltpeek.scopes.scope_base import ScopeBase, SoftwareScopeSpecs
+from voltpeek.scopes.scope_base import ScopeBase, SoftwareScopeSpecs, ReadOutcome, DeviceState
 from voltpeek.scopes.pico import Pico
+from voltpeek.scopes.serial_read import read_exact
 
-from voltpeek.measurements import average
+from voltpeek.calibration import AveragingCalibrator, CalibrationReport, SettingCalibration
+from voltpeek.filters import FilterSpec, FilterType, NO_FILTER, apply_filter
+from voltpeek.capture import Capture, CaptureSettings
 from voltpeek.helpers import pad_zero, negative_base10_encode, negative_base10_decode
+from voltpeek import timing
+from voltpeek.timing import stage_timings
 
 class NS1(ScopeBase, Pico):
     DIGITAL_FILTER = True
@@ -48,11 +55,19 @@ class NS1(ScopeBase, Pico):
     DISABLE_SIGNAL_TRIGGER_COMMAND: bytes = b'i'
 
     LOW_RANGE_THRESHOLD: float = 4
-    CAL_DELAY = 0.1
     CAL_BITS = 13
     CAL_MEMORY_DIGITS = 4
     CAL_INT_MULTIPLIER = 1000
+    # The full scale each calibrated vertical setting is measured at
+    CALIBRATION_SETTINGS: tuple[tuple[str, float], ...] = (('range_high', 10), ('range_high_gain', 5), 
+                                                           ('range_low', 2), ('range_low_gain', 1))
+    # A gain reference must stay this far inside a setting's full scale.
+    GAIN_REFERENCE_HEADROOM: float = 0.9
     DATA_HANG_THRESHOLD = 100
+    # Serial reads block for at most this long so a stop request is noticed quickly.
+    READ_POLL_INTERVAL: float = 0.05
+    FORCE_TRIGGER_TIMEOUT: float = 2
+    CAL_READ_TIMEOUT: float = 1
 
     def __init__(self, baudrate: int=115200, port: Optional[str]=None):
         self.baudrate: int = baudrate
@@ -60,7 +75,21 @@ class NS1(ScopeBase, Pico):
         self.error: bool = False
         self._stop: Event = Event()
         self._xx: list[float] = []
+        # How the most recent capture read ended
+        self.last_read: ReadOutcome = ReadOutcome.COMPLETE
+        # Captures are read straight into this buffer, it is reused for every capture.
+        self._glob_buffer: bytearray = bytearray(self.SCOPE_SPECS['memory_depth'])
+        self._glob_view: memoryview = memoryview(self._glob_buffer)
+        self._clock_div: int = 1
+        self._fir_filter: FilterSpec = FilterSpec(FilterType.BOXCAR, self.FIR_LENGTH) if self.DIGITAL_FILTER else NO_FILTER
         self._cal_offsets = {'range_high':0, 'range_high_gain':0, 'range_low':0, 'range_low_gain':0}
+        # Gain corrections only live on the host, the scope stores the offsets.
+        self._cal_gains = {'range_high':1, 'range_high_gain':1, 'range_low':1, 'range_low_gain':1}
+        self._calibrator: AveragingCalibrator = AveragingCalibrator()
+        # Code to volt tables for each vertical setting, rebuilt when the calibration offsets change.
+        self._conversion_tables: dict[tuple[float, bool, bool], NDArray[np.float64]] = {}
+        # Settings already on the scope are not sent again.
+        self._device_state: DeviceState = DeviceState()
 
     def connect(self) -> None:
         try:
@@ -70,140 +99,197 @@ class NS1(ScopeBase, Pico):
             self.serial_port: Serial = Serial(timeout=1)
             self.serial_port.baudrate = self.baudrate
             self.serial_port.port = self.port
-            self.serial_port.timeout = 100 #ms
+            self.serial_port.timeout = self.READ_POLL_INTERVAL
             self.serial_port.open()
             self._purge_serial_buffers()
+            self._device_state = DeviceState()
         except Exception as _:
             self.error = True
 
-    def read_glob_data(self):
-        self._stop.clear()
-        codes: list[str] = []
-        while len(codes) < self.SCOPE_SPECS['memory_depth']: 
-            if self._stop.is_set():
-                self._purge_serial_buffers()
-                self._stop.clear()
-                return None
-            try:
-                new_data = self.serial_port.read(self.serial_port.inWaiting())
-                if new_data is None:
-                    # This is probably dead code
-                    return None
-                else:
-                    codes += list(new_data)
-                    sleep(0.0001)
-            except (OSError, IOError) as _:
-                return None
-            except Exception as _:
-                return None
+    def read_glob_data(self, timeout: Optional[float]=None) -> Optional[NDArray[np.uint8]]:
+        try:
+            received: int = read_exact(self.serial_port, self._glob_view, self._stop, timeout)
+        except (OSError, IOError) as _:
+            self.last_read = ReadOutcome.ERROR
+            return None
+        except Exception as _:
+            self.last_read = ReadOutcome.ERROR
+            return None
         if self._stop.is_set():
             self._purge_serial_buffers()
             self._stop.clear()
+            self.last_read = ReadOutcome.STOPPED
             return None
-        return codes
+        if received < self.SCOPE_SPECS['memory_depth']:
+            self.last_read = ReadOutcome.INCOMPLETE if received > 0 else ReadOutcome.TIMEOUT
+            return None
+        self.last_read = ReadOutcome.COMPLETE
+        # Zero copy view of the capture buffer, it is only valid until the next read.
+        return np.frombuffer(self._glob_buffer, dtype=np.uint8)
     
-    def _FIR_filter(self, xx: list[int]):
+    def _FIR_filter(self, xx: NDArray[np.uint8]):
         if len(xx) > 0:
-            return np.convolve(xx, np.array([1/self.FIR_LENGTH for _ in range(0, self.FIR_LENGTH)]), mode='valid')
+            return apply_filter(xx, self._fir_filter, self.fs)
         return []
 
-    def _reconstruct(self, xx: list[float], full_scale: float, offset_null: bool=True, force_low_range=False):
+    @property
+    def fs(self) -> float: return self.SCOPE_SPECS['sample_rate']/self._clock_div
+
+    @property
+    def fir_filter(self) -> FilterSpec: return self._fir_filter
+
+    @property
+    def fir_length(self) -> int: return self._fir_filter.length
+
+    def set_filter(self, fir_filter: FilterSpec) -> None: self._fir_filter = fir_filter
+
+    def _calibration_setting(self, full_scale: float, force_low_range: bool=False) -> str:
+        if full_scale <= self.LOW_RANGE_THRESHOLD or force_low_range:
+            return 'range_low_gain' if full_scale == 1 else 'range_low'
+        return 'range_high_gain' if full_scale == 5 else 'range_high'
+
+    def _vertical_parameters(self, full_scale: float, force_low_range: bool=False) -> tuple[float, float]:
         if full_scale <= self.LOW_RANGE_THRESHOLD or force_low_range:
             attenuation = self.SCOPE_SPECS['attenuation']['range_low']
-            if full_scale == 1:
-                offset = self._cal_offsets['range_low_gain']
-            else:
-                offset = self._cal_offsets['range_low']
         else: 
             attenuation = self.SCOPE_SPECS['attenuation']['range_high']
-            if full_scale == 5:
-                offset = self._cal_offsets['range_high_gain']
-            else:
-                offset = self._cal_offsets['range_high']
+        offset = self._cal_offsets[self._calibration_setting(full_scale, force_low_range)]
         # Adjust for amplification 
         if full_scale == 5 or full_scale == 1:
             attenuation *= 2
+        return attenuation, offset
+
+    def _gain(self, full_scale: float, force_low_range: bool=False) -> float:
+        return self._cal_gains[self._calibration_setting(full_scale, force_low_range)]
+
+    def _conversion_table(self, full_scale: float, offset_null: bool, force_low_range: bool) -> NDArray[np.float64]:
+        # Maps each of the 256 codes straight to volts.
+        key = (full_scale, offset_null, force_low_range)
+        if key not in self._conversion_tables:
+            attenuation, offset = self._vertical_parameters(full_scale, force_low_range)
+            LSB: float = self.SCOPE_SPECS['voltage_ref']/self.SCOPE_SPECS['resolution']
+            codes = np.arange(self.SCOPE_SPECS['resolution'])
+            zeroed_adc_input = np.subtract(np.multiply(codes, LSB), self.SCOPE_SPECS['bias'])
+            table = np.multiply(zeroed_adc_input, 1/attenuation)
+            if offset is not None and offset_null:
+                table = np.multiply(np.add(table, offset), self._gain(full_scale, force_low_range))
+            self._conversion_tables[key] = table
+        return self._conversion_tables[key]
+
+    def _invalidate_conversion_tables(self) -> None: self._conversion_tables.clear()
+
+    def _reconstruct(self, xx: NDArray, full_scale: float, offset_null: bool=True, force_low_range=False):
+        codes = np.asarray(xx)
+        if codes.dtype == np.uint8:
+            return self._conversion_table(full_scale, offset_null, force_low_range)[codes]
+        attenuation, offset = self._vertical_parameters(full_scale, force_low_range)
         LSB: float = self.SCOPE_SPECS['voltage_ref']/self.SCOPE_SPECS['resolution']
-        zeroed_adc_input = np.subtract(np.multiply(np.array(xx), LSB), self.SCOPE_SPECS['bias'])
+        zeroed_adc_input = np.subtract(np.multiply(codes, LSB), self.SCOPE_SPECS['bias'])
         if offset is not None and offset_null:
-            reconstructed_signal = np.add(np.multiply(zeroed_adc_input, 1/attenuation), offset)
+            reconstructed_signal = np.multiply(np.add(np.multiply(zeroed_adc_input, 1/attenuation), offset), 
+                                               self._gain(full_scale, force_low_range))
         else:
             reconstructed_signal = np.multiply(zeroed_adc_input, 1/attenuation)
         return reconstructed_signal
 
+    def capture_settings(self, full_scale: float, offset_null: bool=True) -> CaptureSettings:
+        '''The settings of a capture taken at full_scale with the current clock div, filter and calibration.'''
+        attenuation, offset = self._vertical_parameters(full_scale)
+        LSB: float = self.SCOPE_SPECS['voltage_ref']/self.SCOPE_SPECS['resolution']
+        return CaptureSettings(full_scale, full_scale > self.LOW_RANGE_THRESHOLD, full_scale == 5 or full_scale == 1, 
+                               self._clock_div, self.fs, self._fir_filter, LSB/attenuation, self.SCOPE_SPECS['bias']/LSB,
+                               offset if offset_null else 0, self._gain(full_scale) if offset_null else 1)
+
+    def _reconstruct_filtered(self, codes: NDArray[np.uint8], full_scale: float, offset_null: bool=True) -> NDArray[np.float64]:
+        return Capture(codes, self.capture_settings(full_scale, offset_null)).volts
+
     def _purge_serial_buffers(self):
         while self.serial_port.in_waiting:
             self.serial_port.read(self.serial_port.inWaiting())
+        # Only stale input is discarded, flushing the output could drop setting commands that are still queued.
         self.serial_port.reset_input_buffer()
-        self.serial_port.reset_output_buffer()
 
-    def get_scope_trigger_data(self, full_scale: float) -> list[float]:
+    def _new_capture(self, new_codes: Optional[NDArray[np.uint8]], full_scale: float, offset_null: bool=True) -> Optional[Capture]:
+        # A failed read returns no capture rather than the previous one.
+        if new_codes is None or len(new_codes) != self.SCOPE_SPECS['memory_depth']:
+            return None
+        return Capture(new_codes, self.capture_settings(full_scale, offset_null))
+
+    # The capture's codes are a view of the read buffer, they are only valid until the next capture is read.
+    def get_scope_trigger_capture(self, full_scale: float) -> Optional[Capture]:
         self._purge_serial_buffers()
         self.serial_port.write(self.TRIGGER_COMMAND) 
-        new_codes = self.read_glob_data()
-        if new_codes is not None and len(new_codes) == self.SCOPE_SPECS['memory_depth']:
-            self._xx = self._reconstruct(self._FIR_filter(new_codes), full_scale)
-        return self._xx
+        # Includes the wait for the trigger event.
+        with stage_timings.measure(timing.ARMED):
+            new_codes = self.read_glob_data()
+        return self._new_capture(new_codes, full_scale)
 
-    def get_scope_force_trigger_data(self, full_scale: float, offset_null=True) -> list[float]:
+    def get_scope_force_trigger_capture(self, full_scale: float, offset_null=True) -> Optional[Capture]:
         self._purge_serial_buffers()
         self.serial_port.write(self.FORCE_TRIGGER_COMMAND) 
-        new_codes = self.read_glob_data()
-        if new_codes is not None and len(new_codes) == self.SCOPE_SPECS['memory_depth']:
-            self._xx = self._reconstruct(self._FIR_filter(new_codes), full_scale, offset_null=offset_null)
+        with stage_timings.measure(timing.SERIAL):
+            new_codes = self.read_glob_data(self.FORCE_TRIGGER_TIMEOUT)
+        return self._new_capture(new_codes, full_scale, offset_null)
+
+    def get_scope_trigger_data(self, full_scale: float) -> list[float]:
+        capture: Optional[Capture] = self.get_scope_trigger_capture(full_scale)
+        self._xx = [] if capture is None else capture.volts
+        return self._xx
+
+    def get_scope_force_trigger_data(self, full_scale: float, offset_null=True) -> list[float]:
+        capture: Optional[Capture] = self.get_scope_force_trigger_capture(full_scale, offset_null)
+        self._xx = [] if capture is None else capture.volts
         return self._xx 
 
+    def _send_setting(self, setting: str, value, command: bytes, argument: Optional[int]=None) -> None:
+        if getattr(self._device_state, setting) == value:
+            return
+        self.serial_port.write(command)
+        if argument is not None:
+            self.serial_port.write(bytes(str(argument) + '\0', 'utf-8'))
+        # Only recorded once written, a failed write leaves the setting unknown.
+        setattr(self._device_state, setting, value)
+
+    @property
+    def device_state(self) -> DeviceState: return replace(self._device_state)
+
+    # For when the scope may have changed its settings on its own, for example after a firmware reset.
+    def invalidate_device_state(self) -> None: self._device_state = DeviceState()
+
     def set_range(self, full_scale: float) -> None:
-        # TODO: Optimize so we only send a flip command when necessary
         if full_scale <= self.LOW_RANGE_THRESHOLD: 
-            self.serial_port.write(self.LOW_RANGE_COMMAND)
+            self._set_low_range()
         else:
-            self.serial_port.write(self.HIGH_RANGE_COMMAND)
+            self._set_high_range()
 
-    def _set_high_range(self) -> None: self.serial_port.write(self.HIGH_RANGE_COMMAND)
-    def _set_low_range(self) -> None: self.serial_port.write(self.LOW_RANGE_COMMAND)
+    def _set_high_range(self) -> None: self._send_setting('high_range', True, self.HIGH_RANGE_COMMAND)
+    def _set_low_range(self) -> None: self._send_setting('high_range', False, self.LOW_RANGE_COMMAND)
 
     def set_amplifier_gain(self, full_scale: float) -> None:
-        # TODO: Optimize so we only send a gain command when necessary
         if full_scale == 5 or full_scale == 1:
-            self.serial_port.write(self.AMPLIFIER_GAIN_COMMAND)
+            self._set_amplifier_gain_on()
         else:
-            self.serial_port.write(self.AMPLIFIER_UNITY_COMMAND)
+            self._set_amplifier_gain_off()
 
-    def _set_amplifier_gain_on(self) -> None: self.serial_port.write(self.AMPLIFIER_GAIN_COMMAND)
-    def _set_amplifier_gain_off(self) -> None: self.serial_port.write(self.AMPLIFIER_UNITY_COMMAND)
+    def _set_amplifier_gain_on(self) -> None: self._send_setting('amplifier_gain', True, self.AMPLIFIER_GAIN_COMMAND)
+    def _set_amplifier_gain_off(self) -> None: self._send_setting('amplifier_gain', False, self.AMPLIFIER_UNITY_COMMAND)
 
-    def enable_signal_trigger(self) -> None: self.serial_port.write(self.ENABLE_SIGNAL_TRIGGER_COMMAND)
-    def disable_signal_trigger(self) -> None: self.serial_port.write(self.DISABLE_SIGNAL_TRIGGER_COMMAND)
+    def enable_signal_trigger(self) -> None: self._send_setting('signal_trigger', True, self.ENABLE_SIGNAL_TRIGGER_COMMAND)
+    def disable_signal_trigger(self) -> None: self._send_setting('signal_trigger', False, self.DISABLE_SIGNAL_TRIGGER_COMMAND)
 
     def set_trigger_voltage(self, trigger_voltage: float, full_scale: float) -> None:
-        if full_scale <= self.LOW_RANGE_THRESHOLD:
-            attenuation = self.SCOPE_SPECS['attenuation']['range_low']
-            if full_scale == 1:
-                offset = self._cal_offsets['range_low_gain']
-            else:
-                offset = self._cal_offsets['range_low']
-        else: 
-            attenuation = self.SCOPE_SPECS['attenuation']['range_high']
-            if full_scale == 5:
-                offset = self._cal_offsets['range_high_gain']
-            else:
-                offset = self._cal_offsets['range_high']
-        # Adjust for amplification 
-        if full_scale == 5 or full_scale == 1:
-            attenuation *= 2
-        # Adjust for calibration offset
-        trigger_voltage -= offset
+        attenuation, offset = self._vertical_parameters(full_scale)
+        # Adjust for the calibration gain and offset
+        trigger_voltage = trigger_voltage/self._gain(full_scale) - offset
         # TODO: Add error handling for non-compliant trigger voltages
         max_input_voltage: float = (self.SCOPE_SPECS['voltage_ref']/attenuation)/2   
         trigger_code: int = int(((trigger_voltage + max_input_voltage)/(max_input_voltage*2))*(self.SCOPE_SPECS['trigger_resolution']-1))
-        self.serial_port.write(self.TRIGGER_LEVEL_COMMAND) 
-        self.serial_port.write(bytes(str(trigger_code) + '\0', 'utf-8')) 
+        self._send_setting('trigger_code', trigger_code, self.TRIGGER_LEVEL_COMMAND, trigger_code)
 
     def set_clock_div(self, clock_div:int) -> None:
         # TODO: Check for non-compliant clock divs
-        self.serial_port.write(self.CLOCK_DIV_COMMAND) 
-        self.serial_port.write(bytes(str(clock_div) + '\0', 'utf-8')) 
+        self._send_setting('clock_div', clock_div, self.CLOCK_DIV_COMMAND, clock_div)
+        self._clock_div = clock_div
 
     def _encode_calibration_offsets(self) -> str:
         range_high_int = int(self._cal_offsets['range_high']*self.CAL_INT_MULTIPLIER)
@@ -220,21 +306,20 @@ class NS1(ScopeBase, Pico):
         range_low_gain_str = pad_zero(str(range_low_gain), self.CAL_MEMORY_DIGITS)
         return range_high_str + range_high_gain_str + range_low_str + range_low_gain_str
 
-    def set_calibration_offsets(self, full_scale:float) -> None:
-        self._set_amplifier_gain_off()
-        self._set_high_range()
-        sleep(self.CAL_DELAY)
-        self._cal_offsets['range_high'] = -1*average(self.get_scope_force_trigger_data(10, offset_null=False))
-        self._set_amplifier_gain_on()
-        sleep(self.CAL_DELAY)
-        self._cal_offsets['range_high_gain'] = -1*average(self.get_scope_force_trigger_data(5, offset_null=False))
-        self._set_amplifier_gain_off()
-        self._set_low_range()
-        sleep(self.CAL_DELAY)
-        self._cal_offsets['range_low'] = -1*average(self.get_scope_force_trigger_data(2, offset_null=False))
-        self._set_amplifier_gain_on()
-        sleep(self.CAL_DELAY)
-        self._cal_offsets['range_low_gain'] = -1*average(self.get_scope_force_trigger_data(1, offset_null=False))
+    def _measure_calibration_setting(self, setting: str, full_scale: float) -> SettingCalibration:
+        self.set_range(full_scale)
+        self.set_amplifier_gain(full_scale)
+        return self._calibrator.measure(setting, full_scale, 
+                                        lambda: self.get_scope_force_trigger_data(full_scale, offset_null=False))
+
+    def set_calibration_offsets(self, full_scale:float) -> CalibrationReport:
+        '''Measure and store the offset of every vertical setting, the scope input must be disconnected.'''
+        results = tuple(self._measure_calibration_setting(setting, setting_full_scale) 
+                        for setting, setting_full_scale in self.CALIBRATION_SETTINGS)
+        for result in results:
+            if result.captures > 0:
+                self._cal_offsets[result.setting] = -1*result.mean
+        self._invalidate_conversion_tables()
         self._set_amplifier_gain_off()
         self._set_high_range()
         self.serial_port.write(self.SET_CAL_COMMAND)
@@ -242,26 +327,52 @@ class NS1(ScopeBase, Pico):
         # Reset to the starting vertical setting
         self.set_amplifier_gain(full_scale)
         self.set_range(full_scale)
+        return CalibrationReport(results)
+
+    def set_gain_calibration(self, reference: float, full_scale: float) -> CalibrationReport:
+        '''
+        Measure the gain of every vertical setting that can hold the reference voltage applied to the input.
+        The offsets must already be calibrated. Settings the reference does not fit keep their gain.
+        '''
+        results: list[SettingCalibration] = []
+        for setting, setting_full_scale in self.CALIBRATION_SETTINGS:
+            if abs(reference) > setting_full_scale*self.GAIN_REFERENCE_HEADROOM:
+                continue
+            result = self._measure_calibration_setting(setting, setting_full_scale)
+            corrected_mean: float = result.mean + self._cal_offsets[setting]
+            gain: Optional[float] = None
+            if result.captures > 0 and corrected_mean != 0 and np.sign(corrected_mean) == np.sign(reference):
+                gain = reference/corrected_mean
+                self._cal_gains[setting] = gain
+            results.append(SettingCalibration(result.setting, result.full_scale, result.mean, result.noise, 
+                                              result.captures, result.converged and gain is not None, gain))
+        self._invalidate_conversion_tables()
+        self.set_amplifier_gain(full_scale)
+        self.set_range(full_scale)
+        return CalibrationReport(tuple(results), reference)
 
-    def set_rising_edge_trigger(self) -> None: self.serial_port.write(self.RISING_EDGE_TRIGGER_COMMAND)
+    @property
+    def calibration_gains(self) -> dict[str, float]: return dict(self._cal_gains)
+
+    def load_calibration_gains(self, gains: dict[str, float]) -> None:
+        self._cal_gains = {key: gains.get(key, 1) for key in self._cal_gains}
+        self._invalidate_conversion_tables()
 
-    def set_falling_edge_trigger(self) -> None: self.serial_port.write(self.FALLING_EDGE_TRIGGER_COMMAND)
+    def set_rising_edge_trigger(self) -> None: self._send_setting('rising_edge', True, self.RISING_EDGE_TRIGGER_COMMAND)
+
+    def set_falling_edge_trigger(self) -> None: self._send_setting('rising_edge', False, self.FALLING_EDGE_TRIGGER_COMMAND)
 
     def read_calibration_offsets(self) -> Optional[bool]:
         self.serial_port.reset_input_buffer()
-        self.serial_port.reset_output_buffer()
         self.serial_port.write(self.READ_CAL_COMMAND)
-        offset_bytes: list[str] = []
-        while len(offset_bytes) < 8:
-            try:
-                new_data = self.serial_port.read(self.serial_port.inWaiting())
-                if new_data is None: # timeout
-                    return None
-                offset_bytes += list(new_data)
-            except (OSError, IOError) as _:
-                return None
-            except Exception as _:
+        offset_bytes = bytearray(8)
+        try:
+            if read_exact(self.serial_port, memoryview(offset_bytes), timeout=self.CAL_READ_TIMEOUT) < len(offset_bytes):
                 return None
+        except (OSError, IOError) as _:
+            return None
+        except Exception as _:
+            return None
         high_range_offset = negative_base10_decode(offset_bytes[1] << 8 | offset_bytes[0], self.CAL_BITS)
         high_range_gain_offset = negative_base10_decode(offset_bytes[3] << 8 | offset_bytes[2], self.CAL_BITS)
         low_range_offset = negative_base10_decode(offset_bytes[5] << 8 | offset_bytes[4], self.CAL_BITS)
@@ -270,10 +381,22 @@ class NS1(ScopeBase, Pico):
         self._cal_offsets['range_high_gain'] = high_range_gain_offset/self.CAL_INT_MULTIPLIER
         self._cal_offsets['range_low'] = low_range_offset/self.CAL_INT_MULTIPLIER
         self._cal_offsets['range_low_gain'] = low_range_gain_offset/self.CAL_INT_MULTIPLIER
+        self._invalidate_conversion_tables()
         return True
 
+    @property
+    def calibration_offsets(self) -> dict[str, float]: return dict(self._cal_offsets)
+
+    # Offsets that were read from the device before, for example from the calibration cache.
+    def load_calibration_offsets(self, offsets: dict[str, float]) -> None:
+        self._cal_offsets = {key: offsets[key] for key in self._cal_offsets}
+        self._invalidate_conversion_tables()
+
     def stop_trigger(self) -> None: self._stop.set()
 
+    # A stop that arrives before the read starts still ends it, so the stop is only cleared before the next capture is queued.
+    def clear_stop(self) -> None: self._stop.clear()
+
     @property
     def stopped(self): return self._stop.is_set()
 
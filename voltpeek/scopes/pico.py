@@ -2,6 +2,8 @@ from typing import Optional
 
 from serial.tools import list_ports
 
+from voltpeek.calibration_cache import DeviceIdentity
+
 class Pico:
     PICO_VID = 0x2E8A
 
@@ -20,4 +22,11 @@ class Pico:
         return None
 
     @classmethod
-    def find_scope_ports(cls) -> list[str]: return [port.device for port in list_ports.comports() if port.vid == cls.PICO_VID]
\ No newline at end of file
+    def find_scope_ports(cls) -> list[str]: return [port.device for port in list_ports.comports() if port.vid == cls.PICO_VID]
+
+    def device_identity(self, device: Optional[str]) -> Optional[DeviceIdentity]:
+        '''The USB identity of the port, None when it is not a Pico with a serial number.'''
+        for port in list_ports.comports():
+            if port.device == device and port.vid == self.PICO_VID and port.serial_number:
+                return DeviceIdentity(port.serial_number, port.description or '', port.device)
+        return None
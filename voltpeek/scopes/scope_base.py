@@ -1,5 +1,7 @@
 from abc import ABCMeta, abstractmethod
-from typing import TypedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional, TypedDict
 
 class AttenuationSettings(TypedDict):
     range_high: float
@@ -20,6 +22,25 @@ class SoftwareScopeSpecs(ScopeSpecs):
     voltage_ref: float
     trigger_resolution: int
 
+class ReadOutcome(Enum):
+    COMPLETE = 0
+    # Some but not all of the capture arrived before the timeout.
+    INCOMPLETE = 1
+    # Nothing arrived before the timeout.
+    TIMEOUT = 2
+    STOPPED = 3
+    ERROR = 4
+
+@dataclass
+class DeviceState:
+    '''Settings last sent to the scope, None until the setting is sent after connecting.'''
+    high_range: Optional[bool] = None
+    amplifier_gain: Optional[bool] = None
+    clock_div: Optional[int] = None
+    trigger_code: Optional[int] = None
+    rising_edge: Optional[bool] = None
+    signal_trigger: Optional[bool] = None
+
 class ScopeBase(metaclass=ABCMeta):
     @property
     @abstractmethod
@@ -36,6 +57,10 @@ class ScopeBase(metaclass=ABCMeta):
     def DIGITAL_FILTER(self) -> bool:
         pass
 
+    # A digital filter shortens each capture by fir_length - 1 samples.
+    @property
+    def fir_length(self) -> int: return 1
+
     @abstractmethod
     def connect(self) -> None:
         pass
@@ -0,0 +1,20 @@
+from typing import Optional
+from threading import Event
+from time import monotonic
+
+from serial import Serial
+
+def read_exact(serial_port: Serial, buffer: memoryview, stop: Optional[Event]=None, timeout: Optional[float]=None) -> int:
+    '''
+    Block until the buffer is full, the stop event is set or the timeout expires. Each read blocks for at most
+    the serial port timeout so the stop event is checked without spinning. Returns the number of bytes read.
+    '''
+    deadline: Optional[float] = None if timeout is None else monotonic() + timeout
+    received: int = 0
+    while received < len(buffer):
+        if stop is not None and stop.is_set():
+            break
+        if deadline is not None and monotonic() >= deadline:
+            break
+        received += serial_port.readinto(buffer[received:]) or 0
+    return received
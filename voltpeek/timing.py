@@ -0,0 +1,92 @@
+from collections import deque
+from threading import Lock
+from time import perf_counter
+from typing import Optional
+
+import numpy as np
+
+# Stage names
+SERIAL: str = 'serial'
+ARMED: str = 'armed'
+RECONSTRUCT: str = 'reconstruct'
+FILTER: str = 'filter'
+RESAMPLE: str = 'resample'
+QUANTIZE: str = 'quantize'
+DRAW: str = 'draw'
+CAPTURE_TO_DISPLAY: str = 'capture to display'
+
+# Event scheduler waits are recorded as this prefix followed by the event name.
+QUEUE_WAIT_PREFIX: str = 'wait '
+
+class StageTimings:
+    '''
+    Rolling windows of the most recent durations of each hot path stage. Stages are recorded from the scope
+    workers and the Tk thread. Recording costs one flag check until the timings are enabled.
+
+        with stage_timings.measure('serial'):
+            codes = read_glob_data()
+    '''
+    WINDOW_LENGTH: int = 500
+
+    def __init__(self, window_length: int=WINDOW_LENGTH) -> None:
+        self.enabled: bool = False
+        self._window_length: int = window_length
+        self._windows: dict[str, deque[float]] = {}
+        self._lock: Lock = Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if stage not in self._windows:
+                self._windows[stage] = deque(maxlen=self._window_length)
+            self._windows[stage].append(seconds)
+
+    def measure(self, stage: str) -> '_StageTimer': return _StageTimer(self, stage)
+
+    def percentiles(self, stage: str) -> Optional[tuple[float, float]]:
+        '''The p50 and p99 of a stage in seconds, None before it was recorded.'''
+        with self._lock:
+            if stage not in self._windows or len(self._windows[stage]) == 0:
+                return None
+            samples = np.array(self._windows[stage])
+        p50, p99 = np.percentile(samples, (50, 99))
+        return float(p50), float(p99)
+
+    def count(self, stage: str) -> int:
+        with self._lock:
+            return len(self._windows.get(stage, ()))
+
+    @property
+    def stages(self) -> list[str]:
+        with self._lock:
+            return list(self._windows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+    def report(self) -> str:
+        lines: list[str] = [f'{"stage":<28}{"p50 ms":>10}{"p99 ms":>10}{"count":>8}']
+        for stage in self.stages:
+            percentiles = self.percentiles(stage)
+            if percentiles is not None:
+                lines.append(f'{stage:<28}{percentiles[0]*1e3:10.3f}{percentiles[1]*1e3:10.3f}{self.count(stage):8d}')
+        return '\n'.join(lines)
+
+class _StageTimer:
+    def __init__(self, timings: StageTimings, stage: str) -> None:
+        self._timings: StageTimings = timings
+        self._stage: str = stage
+        self._start: float = 0
+
+    def __enter__(self) -> None:
+        if self._timings.enabled:
+            self._start = perf_counter()
+
+    def __exit__(self, *_) -> None:
+        if self._timings.enabled:
+            self._timings.record(self._stage, perf_counter() - self._start)
+
+# Shared by the drivers, the display and the interface. The --debug flag enables it.
+stage_timings: StageTimings = StageTimings()
@@ -0,0 +1,43 @@
+from voltpeek.scale import Scale
+
+class Zoom:
+    '''
+    Timebase and view centre used to redraw a held capture without capturing again. The timebase steps through
+    the scale's horizontals until the view covers the whole capture, and the view stays inside the capture.
+    '''
+    def __init__(self, hor: float, capture_duration: float) -> None:
+        self._horizontal_index: int = Scale.HORIZONTALS.index(hor)
+        self._capture_duration: float = capture_duration
+        # Seconds from the trigger point to the view centre
+        self._offset: float = 0
+
+    def _view_duration(self) -> float: return self.hor*Scale.GRID_COUNT
+
+    def _clamp_offset(self) -> None:
+        max_offset: float = max(self._capture_duration - self._view_duration(), 0)/2
+        self._offset = min(max(self._offset, -max_offset), max_offset)
+
+    def zoom_in(self) -> None:
+        if self._horizontal_index > 0:
+            self._horizontal_index -= 1
+            self._clamp_offset()
+
+    def zoom_out(self) -> None:
+        if self._horizontal_index < Scale.MAX_HOR_INDEX and self._view_duration() < self._capture_duration:
+            self._horizontal_index += 1
+            self._clamp_offset()
+
+    # Pans move the view one division.
+    def pan_right(self) -> None:
+        self._offset += self.hor
+        self._clamp_offset()
+
+    def pan_left(self) -> None:
+        self._offset -= self.hor
+        self._clamp_offset()
+
+    @property
+    def hor(self) -> float: return Scale.HORIZONTALS[self._horizontal_index]
+
+    @property
+    def offset(self) -> float: return self._offset